@@ -0,0 +1,140 @@
+# Serialization and compression benchmark for the large list responses.
+#
+# Builds synthetic ORM-like rows for the existing response models (BP logs with the
+# embedded schedule, medication logs with schedule/medication/medicine, chat messages),
+# then times each JSON encoder and measures what gzip/brotli do to the payload.
+# No database or server is needed.
+#
+#     python -m benchmarks.response_encoding            # 500 rows per model
+#     python -m benchmarks.response_encoding 5000
+#
+# Encoders compared:
+#   stdlib  - jsonable python dump + json.dumps, the stock JSONResponse path
+#   orjson  - same python dump + orjson.dumps (FastJSONResponse, JSON_RESPONSE=orjson)
+#   pydantic - TypeAdapter.dump_json, FastAPI's own fast path (JSON_RESPONSE=auto on newer FastAPI)
+
+import gzip
+import json
+import sys
+import timeit
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+from typing import List
+
+from pydantic import TypeAdapter
+
+from schemas.bp_logs import BloodPressureLogOut
+from schemas.medication_logs import MedicationLogResponse
+from schemas.messages import MessageResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+REPEAT = 5
+
+
+def bp_rows(n: int):
+    now = datetime(2025, 1, 1, 8, 0)
+    schedule = SimpleNamespace(
+        id=1, user_id=1, time=time(8, 0), duration_days=30, start_date=date(2025, 1, 1),
+        end_date=date(2025, 1, 31), is_active=True, created_at=now, updated_at=now,
+    )
+    return [
+        SimpleNamespace(
+            id=i, systolic=110 + i % 40, diastolic=70 + i % 25, pulse=60 + i % 30,
+            notes="After breakfast" if i % 3 == 0 else None, schedule=schedule,
+            checked_at=now + timedelta(hours=i), created_at=now + timedelta(hours=i),
+        )
+        for i in range(n)
+    ]
+
+
+def medication_log_rows(n: int):
+    now = datetime(2025, 1, 1, 9, 0)
+    schedules = [
+        SimpleNamespace(
+            id=s, time=time(8 + s, 0), dosage_instruction="1 tablet after meal",
+            medication=SimpleNamespace(id=s, medicine=SimpleNamespace(id=s, name=f"Medicine {s} 500mg Tablet")),
+        )
+        for s in range(4)
+    ]
+    return [
+        SimpleNamespace(
+            id=i, scheduled_date=date(2025, 1, 1) + timedelta(days=i // 4),
+            taken_at=now + timedelta(hours=i) if i % 5 else None, notes=None,
+            created_at=now, updated_at=now, medication_schedule=schedules[i % 4],
+        )
+        for i in range(n)
+    ]
+
+
+def message_rows(n: int):
+    now = datetime(2025, 1, 1, 10, 0)
+    answer = (
+        "Your readings this week are within the normal range. Keep taking your medication "
+        "on time, stay hydrated and try to walk for 30 minutes a day. "
+    ) * 4
+    return [
+        SimpleNamespace(
+            id=i, chat_id=1, request=f"How was my blood pressure on day {i}?", response=answer,
+            created_at=now + timedelta(minutes=i), updated_at=now + timedelta(minutes=i),
+        )
+        for i in range(n)
+    ]
+
+
+def best_ms(fn) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=REPEAT)) * 1000
+
+
+def bench_model(name: str, model, rows) -> None:
+    adapter = TypeAdapter(List[model])
+    validated = adapter.validate_python(rows, from_attributes=True)
+
+    encoders = {
+        "stdlib": lambda: json.dumps(
+            adapter.dump_python(validated, mode="json"),
+            ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+        ).encode("utf-8"),
+        "pydantic": lambda: adapter.dump_json(validated),
+    }
+    if orjson is not None:
+        encoders["orjson"] = lambda: orjson.dumps(adapter.dump_python(validated, mode="json"))
+
+    print(f"\n=== {name}: {len(rows)} rows ===")
+    baseline = None
+    for label, encode in encoders.items():
+        ms = best_ms(encode)
+        baseline = baseline or ms
+        print(f"  encode {label:<9} {ms:8.2f} ms  ({baseline / ms:4.1f}x vs stdlib)")
+
+    body = adapter.dump_json(validated)
+    compressors = {f"gzip-{level}": (lambda level=level: gzip.compress(body, compresslevel=level)) for level in (1, 6, 9)}
+    if brotli is not None:
+        compressors.update({f"br-{q}": (lambda q=q: brotli.compress(body, quality=q)) for q in (4, 11)})
+
+    print(f"  raw body        {len(body) / 1024:8.1f} KiB")
+    for label, compress in compressors.items():
+        size = len(compress())
+        print(f"  {label:<15} {size / 1024:8.1f} KiB  ({100 * size / len(body):4.1f}% of raw, {best_ms(compress):6.2f} ms)")
+
+
+def main(n: int) -> None:
+    if orjson is None:
+        print("❌ orjson is not installed, skipping the orjson encoder")
+    if brotli is None:
+        print("❌ brotli is not installed, skipping brotli")
+    bench_model("BP logs (BloodPressureLogOut)", BloodPressureLogOut, bp_rows(n))
+    bench_model("Medication logs (MedicationLogResponse)", MedicationLogResponse, medication_log_rows(n))
+    bench_model("Chat messages (MessageResponse)", MessageResponse, message_rows(n))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -8,6 +8,54 @@ load_dotenv()
 class Settings(BaseSettings):
     DATABASE_URL: str = os.getenv("DATABASE_URL")
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY")
+    # Response pipeline: auto | orjson | json, and gzip | br | off
+    JSON_RESPONSE: str = os.getenv("JSON_RESPONSE", "auto")
+    COMPRESSION: str = os.getenv("COMPRESSION", "gzip")
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", 6))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", 4))
+    # Scheduled jobs: inline (run by the scheduler leader) | database (queued for tasks.worker)
+    JOB_BACKEND: str = os.getenv("JOB_BACKEND", "inline")
+    JOB_POLL_SECONDS: float = float(os.getenv("JOB_POLL_SECONDS", 5))
+    JOB_LOCK_TIMEOUT_MINUTES: int = int(os.getenv("JOB_LOCK_TIMEOUT_MINUTES", 120))
+    # Time zone of the scheduler's crons and of "today" for adherence, whatever the server clock is set to
+    APP_TIMEZONE: str = os.getenv("APP_TIMEZONE", "Asia/Karachi")
+    # Days the nightly adherence job looks back for days it missed (e.g. a restart over midnight)
+    ADHERENCE_CATCH_UP_DAYS: int = int(os.getenv("ADHERENCE_CATCH_UP_DAYS", 7))
+    # Weekly/monthly insights: hierarchical (from child insights + rollups) | raw (from every log)
+    INSIGHT_MODE: str = os.getenv("INSIGHT_MODE", "hierarchical")
+    # Chat context: recent turns sent verbatim, turns folded into the summary per summarizing call, token budget for both
+    CHAT_CONTEXT_TURNS: int = int(os.getenv("CHAT_CONTEXT_TURNS", 6))
+    CHAT_SUMMARY_EVERY: int = int(os.getenv("CHAT_SUMMARY_EVERY", 4))
+    CHAT_CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", 1500))
+    # Reuse answers to general questions (no Patient Summary, no earlier messages) across users by TF-IDF similarity
+    CHAT_CACHE: bool = os.getenv("CHAT_CACHE", "false").lower() in ("1", "true", "yes")
+    CHAT_CACHE_THRESHOLD: float = float(os.getenv("CHAT_CACHE_THRESHOLD", 0.85))
+    CHAT_CACHE_SIZE: int = int(os.getenv("CHAT_CACHE_SIZE", 500))
+    CHAT_CACHE_TTL_SECONDS: float = float(os.getenv("CHAT_CACHE_TTL_SECONDS", 86400))
+    # Insight responses: structured (schema-constrained JSON) | text (Title:/Summary:/```json parsed with regexes)
+    INSIGHT_OUTPUT: str = os.getenv("INSIGHT_OUTPUT", "structured")
+    # Approximate tokens allowed for the BP/sugar/medication sections of an insight prompt
+    INSIGHT_LOG_TOKEN_BUDGET: int = int(os.getenv("INSIGHT_LOG_TOKEN_BUDGET", 1200))
+    # GET /insights on a miss: sync (generate in the request) | async (queue a job, answer 202, poll /insights/jobs/{id})
+    INSIGHT_ON_DEMAND: str = os.getenv("INSIGHT_ON_DEMAND", "sync")
+    # Serialize on-demand generation of the same insight across workers (threads are always coalesced)
+    INSIGHT_ADVISORY_LOCK: bool = os.getenv("INSIGHT_ADVISORY_LOCK", "true").lower() in ("1", "true", "yes")
+    # Medicine typeahead index: reloaded from the table this often to pick up other workers' inserts
+    MEDICINE_INDEX_REFRESH_SECONDS: float = float(os.getenv("MEDICINE_INDEX_REFRESH_SECONDS", 300))
+    # Medicine rows kept in the process-wide catalog cache (utilities.medicine_catalog)
+    MEDICINE_CACHE_SIZE: int = int(os.getenv("MEDICINE_CACHE_SIZE", 5000))
+    # Users per Gemini call in insight batches; 1 keeps one call per user
+    INSIGHT_PACK_SIZE: int = int(os.getenv("INSIGHT_PACK_SIZE", 1))
+    # Gemini quota shared by chat and insights in this process; BATCH calls leave GEMINI_BATCH_RESERVE of it for chat
+    GEMINI_RPM: int = int(os.getenv("GEMINI_RPM", 15))
+    GEMINI_TPM: int = int(os.getenv("GEMINI_TPM", 1000000))
+    GEMINI_BATCH_RESERVE: float = float(os.getenv("GEMINI_BATCH_RESERVE", 0.3))
+    GEMINI_FAILURE_THRESHOLD: int = int(os.getenv("GEMINI_FAILURE_THRESHOLD", 5))
+    GEMINI_COOLDOWN_SECONDS: float = float(os.getenv("GEMINI_COOLDOWN_SECONDS", 30))
+    # Use utilities.fake_gemini instead of the real API (local runs and tests)
+    GEMINI_FAKE: bool = os.getenv("GEMINI_FAKE", "false").lower() in ("1", "true", "yes")
+    GEMINI_FAKE_LATENCY: float = float(os.getenv("GEMINI_FAKE_LATENCY", 0))
     model_config = SettingsConfigDict(env_file=".env", extra="allow")
 
 
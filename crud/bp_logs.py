@@ -4,8 +4,15 @@ from datetime import datetime, date
 
 from models.bp_logs import BloodPressureLog
 from models.bp_schedules import BloodPressureSchedule
-from schemas.bp_logs import BloodPressureLogCreate, BloodPressureLogUpdate
-
+from schemas.bp_logs import BloodPressureLogCreate, BloodPressureLogUpdate, BloodPressureLogBulkItem
+from schemas.bulk_logs import BulkLogItemResult
+from utilities.pagination import keyset_page
+from crud.vitals_rollups import record_readings, rebuild_rollups, bp_readings, reading_day
+from crud.daily_adherence import refresh_reading_adherence
+from crud.resource_versions import bump_version
+from models.resource_versions import VersionedResource
+
+from sqlalchemy import insert
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 
@@ -35,6 +42,7 @@ def create_bp_log(db: Session, user_id: int, schedule_id: int, data: BloodPressu
 
     log = BloodPressureLog(
         schedule_id=schedule.id,
+        user_id=user_id,
         systolic=data.systolic,
         diastolic=data.diastolic,
         pulse=data.pulse,
@@ -44,6 +52,10 @@ def create_bp_log(db: Session, user_id: int, schedule_id: int, data: BloodPressu
 
     try:
         db.add(log)
+        db.flush()
+        record_readings(db, user_id, bp_readings(log.systolic, log.diastolic, log.pulse, log.checked_at))
+        refresh_reading_adherence(db, user_id, [log.checked_at])
+        bump_version(db, user_id, VersionedResource.BP_LOGS)
         db.commit()
         db.refresh(log)
         return log
@@ -80,14 +92,76 @@ def create_bp_log(db: Session, user_id: int, schedule_id: int, data: BloodPressu
         )
 
 
+def create_bp_logs_bulk(db: Session, user_id: int, items: List[BloodPressureLogBulkItem]) -> List[BulkLogItemResult]:
+    """Validate readings against the user's schedules in one query and insert the valid ones in one statement."""
+    schedule_ids = {item.schedule_id for item in items}
+    owned_ids = {
+        row.id for row in db.query(BloodPressureSchedule.id).filter(
+            BloodPressureSchedule.id.in_(schedule_ids),
+            BloodPressureSchedule.user_id == user_id
+        )
+    }
+
+    results: List[Optional[BulkLogItemResult]] = [None] * len(items)
+    rows, row_indexes = [], []
+    now = datetime.utcnow()
+    for index, item in enumerate(items):
+        if item.schedule_id not in owned_ids:
+            results[index] = BulkLogItemResult(index=index, status="rejected", detail="Schedule not found for this user.")
+        elif item.systolic <= item.diastolic:
+            results[index] = BulkLogItemResult(index=index, status="rejected", detail="Systolic must be greater than diastolic.")
+        else:
+            rows.append({
+                "schedule_id": item.schedule_id,
+                "user_id": user_id,
+                "systolic": item.systolic,
+                "diastolic": item.diastolic,
+                "pulse": item.pulse,
+                "notes": item.notes,
+                "checked_at": item.checked_at or now,
+            })
+            row_indexes.append(index)
+
+    if rows:
+        try:
+            # Multi-row INSERT ... RETURNING with ids in the same order as `rows`
+            ids = db.execute(
+                insert(BloodPressureLog).returning(BloodPressureLog.id, sort_by_parameter_order=True),
+                rows
+            ).scalars().all()
+            record_readings(db, user_id, [
+                reading for row in rows
+                for reading in bp_readings(row["systolic"], row["diastolic"], row["pulse"], row["checked_at"])
+            ])
+            refresh_reading_adherence(db, user_id, [row["checked_at"] for row in rows])
+            bump_version(db, user_id, VersionedResource.BP_LOGS)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid blood pressure log data. Please check your input."
+            )
+        for index, log_id in zip(row_indexes, ids):
+            results[index] = BulkLogItemResult(index=index, status="created", id=log_id)
+
+    return results
+
+
 def update_bp_log(db: Session, log_id: int, data: BloodPressureLogUpdate) -> Optional[BloodPressureLog]:
     log = db.query(BloodPressureLog).filter(BloodPressureLog.id == log_id).first()
     if not log:
         return None
 
+    old_checked_at = log.checked_at
     for field, value in data.dict(exclude_unset=True).items():
         setattr(log, field, value)
 
+    if log.user_id is not None:
+        db.flush()
+        rebuild_rollups(db, log.user_id, {reading_day(old_checked_at), reading_day(log.checked_at)})
+        refresh_reading_adherence(db, log.user_id, [old_checked_at, log.checked_at])
+        bump_version(db, log.user_id, VersionedResource.BP_LOGS)
     db.commit()
     db.refresh(log)
     return log
@@ -99,6 +173,11 @@ def delete_bp_log(db: Session, log_id: int) -> bool:
         return False
 
     db.delete(log)
+    if log.user_id is not None:
+        db.flush()
+        rebuild_rollups(db, log.user_id, {reading_day(log.checked_at)})
+        refresh_reading_adherence(db, log.user_id, [log.checked_at])
+        bump_version(db, log.user_id, VersionedResource.BP_LOGS)
     db.commit()
     return True
 
@@ -112,15 +191,22 @@ def get_logs_by_schedule_id(db: Session, schedule_id: int) -> List[BloodPressure
 
 
 def get_logs_by_user_id(db: Session, user_id: int) -> List[BloodPressureLog]:
-    return db.query(BloodPressureLog).join(BloodPressureSchedule).filter(
-        BloodPressureSchedule.user_id == user_id
+    return db.query(BloodPressureLog).filter(
+        BloodPressureLog.user_id == user_id
     ).order_by(BloodPressureLog.checked_at.desc()).all()
 
+def get_logs_page_by_user_id(db: Session, user_id: int, fields: List[str], cursor: Optional[str], limit: int):
+    """Newest-first page of the user's logs, selecting only `fields` plus the (checked_at, id) keyset."""
+    columns = ["id", "checked_at"] + [f for f in fields if f not in ("id", "checked_at")]
+    query = db.query(*[getattr(BloodPressureLog, c) for c in columns]).filter(
+        BloodPressureLog.user_id == user_id
+    )
+    return keyset_page(query, BloodPressureLog.checked_at, BloodPressureLog.id, cursor, limit)
+
 def get_recent_bp_logs(db: Session, user_id: int, limit: int = 4) -> List[BloodPressureLog]:
     return (
         db.query(BloodPressureLog)
-        .join(BloodPressureSchedule)
-        .filter(BloodPressureSchedule.user_id == user_id)
+        .filter(BloodPressureLog.user_id == user_id)
         .order_by(BloodPressureLog.checked_at.desc())
         .limit(limit)
         .all()
@@ -131,8 +217,8 @@ def get_logs_by_date_range(db: Session, user_id: int, start_date: date, end_date
     start_dt = datetime.combine(start_date, datetime.min.time())
     end_dt = datetime.combine(end_date, datetime.max.time())
     
-    return db.query(BloodPressureLog).join(BloodPressureSchedule).filter(
-        BloodPressureSchedule.user_id == user_id,
+    return db.query(BloodPressureLog).filter(
+        BloodPressureLog.user_id == user_id,
         BloodPressureLog.checked_at >= start_dt,
         BloodPressureLog.checked_at <= end_dt
     ).order_by(BloodPressureLog.checked_at.desc()).all()
@@ -142,8 +228,8 @@ def get_logs_by_date(db: Session, user_id: int, target_date: date) -> List[Blood
     start_dt = datetime.combine(target_date, datetime.min.time())
     end_dt = datetime.combine(target_date, datetime.max.time())
 
-    return db.query(BloodPressureLog).join(BloodPressureSchedule).filter(
-        BloodPressureSchedule.user_id == user_id,
+    return db.query(BloodPressureLog).filter(
+        BloodPressureLog.user_id == user_id,
         BloodPressureLog.checked_at >= start_dt,
         BloodPressureLog.checked_at <= end_dt
     ).order_by(BloodPressureLog.checked_at.desc()).all()
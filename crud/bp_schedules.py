@@ -1,10 +1,14 @@
 from sqlalchemy.orm import Session
 from datetime import timedelta, date
 from models.bp_schedules import BloodPressureSchedule
+from crud.daily_adherence import refresh_span_adherence
+from crud.resource_versions import bump_version
+from utilities.schedule_sync import create_timed_schedules
+from models.resource_versions import VersionedResource
 from typing import List, Optional
 from schemas.bp_schedules import BPScheduleCreate, BPScheduleUpdate, BPScheduleResponse
 from sqlalchemy.exc import SQLAlchemyError
-from fastapi import HTTPException
+from fastapi import HTTPException, status
 
 def get_user_bp_schedules(db: Session, user_id: int) -> List[BloodPressureSchedule]:
     return db.query(BloodPressureSchedule).filter_by(user_id=user_id).all()
@@ -26,21 +30,15 @@ def create_bp_schedule(db: Session, user_id: int, payload: BPScheduleCreate) ->
             detail="End date must be after or equal to start date."
         )
 
-    schedules = []
-    for t in payload.times:
-        schedule = BloodPressureSchedule(
-            user_id=user_id,
-            time=t,
-            duration_days=duration_days,
-            start_date=start_date,
-            end_date=end_date
-        )
-        db.add(schedule)
-        db.commit()
-        db.refresh(schedule)
-        schedules.append(schedule)
+    # One load, one multi-row INSERT and one commit for all the times
+    schedules = create_timed_schedules(db, BloodPressureSchedule, user_id, payload.times, start_date, end_date)
 
-    db.flush()  # Use flush to assign IDs before returning
+    refresh_span_adherence(db, user_id, (start_date, end_date))
+    bump_version(db, user_id, VersionedResource.BP_LOGS)
+    # Ids are read before the commit expires the rows, which then reload in one query rather than one per schedule
+    ids = [schedule.id for schedule in schedules]
+    db.commit()
+    db.query(BloodPressureSchedule).filter(BloodPressureSchedule.id.in_(ids)).all()
     return schedules
 
 # def create_bp_schedule(db: Session, user_id: int, payload: BPScheduleCreate ) -> BloodPressureSchedule:
@@ -107,6 +105,8 @@ def update_bp_schedule(db: Session, schedule_id: int, payload: BPScheduleUpdate)
         if payload.is_active is not None:
             schedule.is_active = payload.is_active
 
+        refresh_span_adherence(db, schedule.user_id, (original_start, original_end), (schedule.start_date, schedule.end_date))
+        bump_version(db, schedule.user_id, VersionedResource.BP_LOGS)
         db.commit()
         db.refresh(schedule)
         return schedule
@@ -124,4 +124,6 @@ def delete_bp_schedule(db: Session, schedule_id: int) -> bool:
     if not schedule:
         return False
     db.delete(schedule)
+    refresh_span_adherence(db, schedule.user_id, (schedule.start_date, schedule.end_date))
+    bump_version(db, schedule.user_id, VersionedResource.BP_LOGS)
     return True
@@ -1,5 +1,7 @@
+from typing import Optional
 from sqlalchemy.orm import Session
 from models.chats import Chat
+from utilities.pagination import keyset_page
 from schemas.chats import ChatCreate, ChatUpdate
 
 
@@ -48,10 +50,6 @@ def delete_chat(db: Session, chat_id: int):
     return chat
 
 
-def get_chats_by_user(db: Session, user_id: int):
-    return (
-        db.query(Chat)
-        .filter(Chat.user_id == user_id)
-        .order_by(Chat.created_at.desc())
-        .all()
-    )
+def get_chats_page_by_user(db: Session, user_id: int, cursor: Optional[str], limit: int):
+    """Newest-first page of the user's chats on the (user_id, created_at, id) index."""
+    return keyset_page(db.query(Chat).filter(Chat.user_id == user_id), Chat.created_at, Chat.id, cursor, limit)
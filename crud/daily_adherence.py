@@ -0,0 +1,245 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.daily_adherence import DailyAdherence, AdherenceKind
+from models.medications import Medication
+from models.medication_logs import MedicationLog
+from models.bp_schedules import BloodPressureSchedule
+from models.bp_logs import BloodPressureLog
+from models.sugar_schedules import SugarSchedule
+from models.sugar_logs import SugarLog
+from utilities.occurrences import app_today, expand_occurrences, load_schedule_spans
+
+UPSERT_CHUNK_SIZE = 1000
+
+Slot = Tuple[date, AdherenceKind, int]
+
+
+def _as_date(value) -> Optional[date]:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _expected_slots(db: Session, user_id: int, start_date: date, end_date: date) -> Dict[Slot, dict]:
+    """
+    The single definition of adherence: one slot per active schedule per day it is in range
+    (see utilities.occurrences). A medication slot is completed by a log with taken_at set;
+    a BP or sugar slot by any reading for that schedule on that day.
+    """
+    logs = {}
+    # Medication: a dose counts once it is marked taken
+    logs[AdherenceKind.MEDICATION] = {
+        (row.scheduled_date, row.medication_schedule_id): row.id
+        for row in db.query(MedicationLog.id, MedicationLog.medication_schedule_id, MedicationLog.scheduled_date).filter(
+            MedicationLog.user_id == user_id,
+            MedicationLog.scheduled_date >= start_date,
+            MedicationLog.scheduled_date <= end_date,
+            MedicationLog.taken_at != None
+        )
+    }
+
+    # BP and sugar: the earliest reading of the day satisfies the slot
+    for kind, log_model in (
+        (AdherenceKind.BLOOD_PRESSURE, BloodPressureLog),
+        (AdherenceKind.SUGAR, SugarLog),
+    ):
+        logs[kind] = {}
+        for row in db.query(log_model.id, log_model.schedule_id, log_model.checked_at).filter(
+            log_model.user_id == user_id,
+            log_model.checked_at >= datetime.combine(start_date, time.min),
+            log_model.checked_at <= datetime.combine(end_date, time.max)
+        ).order_by(log_model.checked_at):
+            logs[kind].setdefault((row.checked_at.date(), row.schedule_id), row.id)
+
+    slots: Dict[Slot, dict] = {}
+    spans = load_schedule_spans(db, user_id, start_date, end_date)
+    for occurrence in expand_occurrences(spans, start_date, end_date):
+        log_id = logs[occurrence.kind].get((occurrence.day, occurrence.schedule_id))
+        slots[(occurrence.day, occurrence.kind, occurrence.schedule_id)] = {
+            "user_id": user_id,
+            "day": occurrence.day,
+            "kind": occurrence.kind,
+            "schedule_id": occurrence.schedule_id,
+            "scheduled_time": occurrence.time,
+            "completed": log_id is not None,
+            "log_id": log_id,
+        }
+    return slots
+
+
+def refresh_adherence(db: Session, user_id: int, start_date, end_date) -> None:
+    """
+    Recompute the user's adherence rows for [start_date, end_date] (clamped to today) from
+    schedules and logs, removing rows whose schedule no longer applies.
+    Does not commit; pending log/schedule changes are flushed first.
+    """
+    today = app_today()
+    start_date = _as_date(start_date)
+    end_date = min(_as_date(end_date) or today, today)
+    if start_date is None or start_date > end_date:
+        return
+
+    db.flush()
+    slots = _expected_slots(db, user_id, start_date, end_date)
+
+    stale_ids = [
+        row.id for row in db.query(
+            DailyAdherence.id, DailyAdherence.day, DailyAdherence.kind, DailyAdherence.schedule_id
+        ).filter(
+            DailyAdherence.user_id == user_id,
+            DailyAdherence.day >= start_date,
+            DailyAdherence.day <= end_date
+        )
+        if (row.day, row.kind, row.schedule_id) not in slots
+    ]
+    if stale_ids:
+        db.query(DailyAdherence).filter(DailyAdherence.id.in_(stale_ids)).delete(synchronize_session=False)
+
+    rows = list(slots.values())
+    now = datetime.utcnow()
+    for row in rows:
+        row["finalized"] = row["day"] < today
+        row["updated_at"] = now
+
+    for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        statement = insert(DailyAdherence).values(rows[i:i + UPSERT_CHUNK_SIZE])
+        excluded = statement.excluded
+        db.execute(statement.on_conflict_do_update(
+            constraint="unique_daily_adherence_slot",
+            set_={
+                "scheduled_time": excluded.scheduled_time,
+                "completed": excluded.completed,
+                "log_id": excluded.log_id,
+                "finalized": excluded.finalized,
+                "updated_at": excluded.updated_at,
+            },
+        ))
+
+
+def refresh_adherence_days(db: Session, user_id: int, days, padding: int = 0) -> None:
+    """
+    Refresh the given days (dates or datetimes), each widened by `padding` days on both sides.
+    Nearby days are merged into one span so a batch of logs costs a few refreshes, not one per log.
+    """
+    days = sorted({_as_date(d) for d in days if d is not None})
+    pad = timedelta(days=padding)
+    span_start = span_end = None
+    for day in days:
+        if span_end is not None and day - pad <= span_end + timedelta(days=1):
+            span_end = day + pad
+            continue
+        if span_start is not None:
+            refresh_adherence(db, user_id, span_start, span_end)
+        span_start, span_end = day - pad, day + pad
+    if span_start is not None:
+        refresh_adherence(db, user_id, span_start, span_end)
+
+
+def refresh_reading_adherence(db: Session, user_id: int, checked_ats) -> None:
+    # A reading's calendar day depends on the DB session time zone, so cover the neighbouring days too
+    refresh_adherence_days(db, user_id, checked_ats, padding=1)
+
+
+def refresh_span_adherence(db: Session, user_id: int, *spans) -> None:
+    """Refresh the union of (start, end) spans, e.g. a schedule's date range before and after an edit."""
+    starts = [_as_date(start) for start, _ in spans if start is not None]
+    if not starts:
+        return
+    ends = [_as_date(end) for _, end in spans]
+    end_date = None if None in ends else max(ends)
+    refresh_adherence(db, user_id, min(starts), end_date)
+
+
+def rebuild_user_adherence(db: Session, user_id: int) -> int:
+    """Materialize every adherence row for a user from their earliest schedule to today. Returns the row count."""
+    starts = [
+        db.query(func.min(BloodPressureSchedule.start_date)).filter(BloodPressureSchedule.user_id == user_id).scalar(),
+        db.query(func.min(SugarSchedule.start_date)).filter(SugarSchedule.user_id == user_id).scalar(),
+        _as_date(db.query(func.min(Medication.start_date)).filter(Medication.user_id == user_id).scalar()),
+    ]
+    starts = [s for s in starts if s is not None]
+    if not starts:
+        db.query(DailyAdherence).filter(DailyAdherence.user_id == user_id).delete(synchronize_session=False)
+        return 0
+
+    start_date = min(starts)
+    db.query(DailyAdherence).filter(
+        DailyAdherence.user_id == user_id,
+        DailyAdherence.day < start_date
+    ).delete(synchronize_session=False)
+    refresh_adherence(db, user_id, start_date, app_today())
+    return db.query(DailyAdherence).filter(DailyAdherence.user_id == user_id).count()
+
+
+def last_finalized_days(db: Session, since: date) -> Dict[int, date]:
+    """Each user's latest finalized day on or after `since`; users with none are left out."""
+    return dict(db.query(DailyAdherence.user_id, func.max(DailyAdherence.day)).filter(
+        DailyAdherence.finalized == True,
+        DailyAdherence.day >= since
+    ).group_by(DailyAdherence.user_id).all())
+
+
+def materialize_missing_adherence(db: Session, user_id: int, start_date: date, end_date: date) -> None:
+    """
+    Refresh the days in range that no write or nightly run has covered yet: past days without a
+    finalized row and today if it has no rows. One query when nothing is missing; commits otherwise.
+    """
+    today = app_today()
+    end_date = min(end_date, today)
+    if start_date > end_date:
+        return
+    covered = {
+        row.day for row in db.query(DailyAdherence.day).filter(
+            DailyAdherence.user_id == user_id,
+            DailyAdherence.day >= start_date,
+            DailyAdherence.day <= end_date,
+            (DailyAdherence.finalized == True) | (DailyAdherence.day == today)
+        ).distinct()
+    }
+    missing = [
+        start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)
+        if start_date + timedelta(days=i) not in covered
+    ]
+    if missing:
+        refresh_adherence_days(db, user_id, missing)
+        db.commit()
+
+
+def get_adherence(
+    db: Session,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    kind: Optional[AdherenceKind] = None,
+    materialize: bool = True,
+) -> List[DailyAdherence]:
+    # A missed nightly run must not read as a day with nothing scheduled
+    if materialize:
+        materialize_missing_adherence(db, user_id, start_date, end_date)
+    query = db.query(DailyAdherence).filter(
+        DailyAdherence.user_id == user_id,
+        DailyAdherence.day >= start_date,
+        DailyAdherence.day <= end_date
+    )
+    if kind is not None:
+        query = query.filter(DailyAdherence.kind == kind)
+    return query.order_by(DailyAdherence.day, DailyAdherence.scheduled_time).all()
+
+
+def summarize_adherence(rows: List[DailyAdherence]) -> dict:
+    """Totals overall, per kind and per day for a list of adherence rows."""
+    summary = {
+        "scheduled": 0,
+        "completed": 0,
+        "by_kind": {kind: {"scheduled": 0, "completed": 0} for kind in AdherenceKind},
+        "by_day": {},
+    }
+    for row in rows:
+        day_totals = summary["by_day"].setdefault(row.day, {"scheduled": 0, "completed": 0})
+        for totals in (summary, summary["by_kind"][row.kind], day_totals):
+            totals["scheduled"] += 1
+            totals["completed"] += int(row.completed)
+    return summary
@@ -0,0 +1,165 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.insight_batches import InsightBatch, InsightBatchItem, InsightBatchStatus, InsightBatchItemStatus
+from models.insights import Insight, InsightPeriod
+from models.users import User
+
+MAX_ITEM_ATTEMPTS = 3
+# A claimed item not checkpointed within this long is assumed abandoned by a dead runner
+ITEM_LEASE = timedelta(minutes=15)
+SEED_CHUNK_SIZE = 1000
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def get_or_create_batch(db: Session, period: InsightPeriod, start_date: date) -> InsightBatch:
+    """Return the batch for (period, start_date), creating it if needed. Commits."""
+    db.execute(insert(InsightBatch).values(
+        period=period,
+        start_date=start_date,
+        status=InsightBatchStatus.RUNNING,
+        runs=0,
+        created_at=_now(),
+        updated_at=_now(),
+    ).on_conflict_do_nothing(constraint="unique_insight_batch_period_start"))
+    db.commit()
+    return db.query(InsightBatch).filter_by(period=period, start_date=start_date).one()
+
+
+def seed_batch_items(db: Session, batch: InsightBatch, user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Add an item for every user (or just `user_ids`) not yet in the batch. Users who already have
+    the insight are marked skipped up front, so a run never checks insights one user at a time.
+    Commits and returns the number of items added.
+    """
+    users = db.query(User.id)
+    if user_ids is not None:
+        users = users.filter(User.id.in_(list(user_ids)))
+    seeded = {row.user_id for row in db.query(InsightBatchItem.user_id).filter(InsightBatchItem.batch_id == batch.id)}
+    existing = {
+        row.user_id for row in db.query(Insight.user_id).filter(
+            Insight.period == batch.period,
+            Insight.start_date == batch.start_date
+        )
+    }
+    now = _now()
+    rows = [
+        {
+            "batch_id": batch.id,
+            "user_id": row.id,
+            "status": InsightBatchItemStatus.SKIPPED if row.id in existing else InsightBatchItemStatus.PENDING,
+            "attempts": 0,
+            "updated_at": now,
+        }
+        for row in users.order_by(User.id) if row.id not in seeded
+    ]
+    for i in range(0, len(rows), SEED_CHUNK_SIZE):
+        db.execute(insert(InsightBatchItem).values(rows[i:i + SEED_CHUNK_SIZE]).on_conflict_do_nothing(
+            constraint="unique_insight_batch_item_user"
+        ))
+    db.commit()
+    return len(rows)
+
+
+def requeue_failed_items(db: Session, batch_id: int) -> int:
+    """Put failed items with attempts left back to pending, for a resume. Commits and returns how many."""
+    count = db.query(InsightBatchItem).filter(
+        InsightBatchItem.batch_id == batch_id,
+        InsightBatchItem.status == InsightBatchItemStatus.FAILED,
+        InsightBatchItem.attempts < MAX_ITEM_ATTEMPTS
+    ).update({InsightBatchItem.status: InsightBatchItemStatus.PENDING}, synchronize_session=False)
+    db.commit()
+    return count
+
+
+def claim_batch_items(db: Session, batch_id: int, limit: int = 1) -> List[InsightBatchItem]:
+    """
+    Lease up to `limit` pending items. SKIP LOCKED plus the lease lets a resume run alongside a
+    still-running batch without both generating the same user. Commits the claim.
+    """
+    items = db.query(InsightBatchItem).filter(
+        InsightBatchItem.batch_id == batch_id,
+        InsightBatchItem.status == InsightBatchItemStatus.PENDING,
+        InsightBatchItem.attempts < MAX_ITEM_ATTEMPTS,
+        (InsightBatchItem.claimed_at == None) | (InsightBatchItem.claimed_at < _now() - ITEM_LEASE)
+    ).order_by(InsightBatchItem.id).with_for_update(skip_locked=True).limit(limit).all()
+    if not items:
+        db.rollback()
+        return []
+
+    for item in items:
+        item.attempts += 1
+        item.claimed_at = _now()
+    db.commit()
+    return items
+
+
+def fail_expired_items(db: Session, batch_id: int) -> int:
+    """
+    Fail pending items whose lease ran out with no attempts left: their runner died on them every
+    time (a crash or hang on that user), so they are never claimed again. Commits and returns how many.
+    """
+    count = db.query(InsightBatchItem).filter(
+        InsightBatchItem.batch_id == batch_id,
+        InsightBatchItem.status == InsightBatchItemStatus.PENDING,
+        InsightBatchItem.attempts >= MAX_ITEM_ATTEMPTS,
+        InsightBatchItem.claimed_at < _now() - ITEM_LEASE
+    ).update({
+        InsightBatchItem.status: InsightBatchItemStatus.FAILED,
+        InsightBatchItem.last_error: f"Lease expired on all {MAX_ITEM_ATTEMPTS} attempts; the runner never checkpointed this user.",
+        InsightBatchItem.claimed_at: None,
+    }, synchronize_session=False)
+    db.commit()
+    return count
+
+
+def checkpoint_item(db: Session, item: InsightBatchItem, status: InsightBatchItemStatus, error: Optional[str] = None) -> None:
+    item.status = status
+    item.last_error = error
+    item.claimed_at = None
+    db.commit()
+
+
+def batch_counts(db: Session, batch_id: int) -> Dict[InsightBatchItemStatus, int]:
+    counts = {status: 0 for status in InsightBatchItemStatus}
+    for status, count in db.query(InsightBatchItem.status, func.count()).filter(
+        InsightBatchItem.batch_id == batch_id
+    ).group_by(InsightBatchItem.status):
+        counts[status] = count
+    return counts
+
+
+def finish_batch(db: Session, batch: InsightBatch) -> Dict[InsightBatchItemStatus, int]:
+    """Set the batch status from its items. Commits and returns the counts."""
+    fail_expired_items(db, batch.id)
+    counts = batch_counts(db, batch.id)
+    if counts[InsightBatchItemStatus.PENDING]:
+        batch.status = InsightBatchStatus.RUNNING       # Items still leased by another runner
+    elif counts[InsightBatchItemStatus.FAILED]:
+        batch.status = InsightBatchStatus.PARTIAL
+    else:
+        batch.status = InsightBatchStatus.COMPLETED
+    batch.finished_at = None if batch.status == InsightBatchStatus.RUNNING else _now()
+    db.commit()
+    return counts
+
+
+def get_unfinished_batches(db: Session, include_partial: bool = False) -> List[InsightBatch]:
+    """Batches still running; PARTIAL ones (finished with failed users) only when asked for."""
+    statuses = [InsightBatchStatus.RUNNING]
+    if include_partial:
+        statuses.append(InsightBatchStatus.PARTIAL)
+    return db.query(InsightBatch).filter(
+        InsightBatch.status.in_(statuses)
+    ).order_by(InsightBatch.start_date, InsightBatch.id).all()
+
+
+def get_batches(db: Session, limit: int = 20) -> List[InsightBatch]:
+    return db.query(InsightBatch).order_by(InsightBatch.id.desc()).limit(limit).all()
@@ -0,0 +1,135 @@
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.jobs import Job, JobStatus
+
+RETRY_BACKOFF_SECONDS = 60
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_job(
+    db: Session,
+    name: str,
+    payload: Optional[dict] = None,
+    dedupe_key: Optional[str] = None,
+    run_at: Optional[datetime] = None,
+    max_attempts: int = 3,
+) -> Optional[int]:
+    """
+    Queue a job and return its id, or None when a job with the same dedupe_key already exists
+    (so every scheduler instance can enqueue the same run safely). Does not commit.
+    """
+    now = _now()
+    statement = insert(Job).values(
+        name=name,
+        payload=json.dumps(payload or {}),
+        dedupe_key=dedupe_key,
+        status=JobStatus.QUEUED,
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=run_at or now,
+        created_at=now,
+    )
+    if dedupe_key is not None:
+        statement = statement.on_conflict_do_nothing(constraint="unique_job_dedupe_key")
+    return db.execute(statement.returning(Job.id)).scalar()
+
+
+def claim_job(db: Session, worker_id: str, job_id: Optional[int] = None) -> Optional[Job]:
+    """
+    Take the oldest due job, or just `job_id` if it is still due. SKIP LOCKED lets concurrent
+    workers poll the same table without blocking on or double-claiming each other's rows. Commits the claim.
+    """
+    query = db.query(Job).filter(
+        Job.status == JobStatus.QUEUED,
+        Job.run_at <= _now()
+    )
+    if job_id is not None:
+        query = query.filter(Job.id == job_id)
+    job = query.order_by(Job.run_at, Job.id).with_for_update(skip_locked=True).first()
+    if job is None:
+        db.rollback()
+        return None
+
+    job.status = JobStatus.RUNNING
+    job.attempts += 1
+    job.locked_by = worker_id
+    job.locked_at = _now()
+    db.commit()
+    return job
+
+
+def complete_job(db: Session, job: Job) -> None:
+    job.status = JobStatus.SUCCEEDED
+    job.finished_at = _now()
+    job.last_error = None
+    db.commit()
+
+
+def _retry_or_fail(job: Job, error: str, retry_at: datetime) -> None:
+    job.last_error = error
+    job.locked_by = None
+    if job.attempts < job.max_attempts:
+        job.status = JobStatus.QUEUED
+        job.run_at = retry_at
+    else:
+        job.status = JobStatus.FAILED
+        job.finished_at = _now()
+
+
+def fail_job(db: Session, job: Job, error: str) -> None:
+    """Requeue with exponential backoff, or mark failed once attempts run out."""
+    _retry_or_fail(job, error, _now() + timedelta(seconds=RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)))
+    db.commit()
+
+
+def requeue_stale_jobs(db: Session, lock_timeout: timedelta) -> int:
+    """Release jobs whose worker died mid-run (locked longer than lock_timeout). Returns how many were released."""
+    stale = db.query(Job).filter(
+        Job.status == JobStatus.RUNNING,
+        Job.locked_at < _now() - lock_timeout
+    ).with_for_update(skip_locked=True).all()
+    for job in stale:
+        _retry_or_fail(job, f"Worker {job.locked_by} did not finish within {lock_timeout}", _now())
+    db.commit()
+    return len(stale)
+
+
+def get_job(db: Session, job_id: int) -> Optional[Job]:
+    return db.query(Job).filter(Job.id == job_id).first()
+
+
+def get_job_by_dedupe_key(db: Session, dedupe_key: str) -> Optional[Job]:
+    return db.query(Job).filter(Job.dedupe_key == dedupe_key).first()
+
+
+def requeue_job(db: Session, job: Job) -> None:
+    """Run a finished job again from scratch, e.g. when a user asks again after it failed. Commits."""
+    job.status = JobStatus.QUEUED
+    job.attempts = 0
+    job.run_at = _now()
+    job.locked_by = None
+    job.locked_at = None
+    job.last_error = None
+    job.finished_at = None
+    db.commit()
+
+
+def get_user_job(db: Session, job_id: int, user_id: int) -> Job:
+    """A job whose payload belongs to `user_id`; 404 otherwise, so ids of other users' jobs reveal nothing."""
+    job = get_job(db, job_id)
+    if job is None or json.loads(job.payload or "{}").get("user_id") != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found."
+        )
+    return job
+
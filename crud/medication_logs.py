@@ -1,9 +1,14 @@
 from sqlalchemy.orm import Session, joinedload
 from models import MedicationLog, MedicationSchedule, Medication
-from schemas.medication_logs import MedicationLogCreate, MedicationLogUpdate
+from schemas.medication_logs import MedicationLogCreate, MedicationLogUpdate, MedicationLogBulkItem
+from schemas.bulk_logs import BulkLogItemResult
+from sqlalchemy.dialects.postgresql import insert
 from fastapi import HTTPException
 from datetime import date
-from typing import List
+from typing import List, Optional
+from utilities.pagination import keyset_page
+from crud.daily_adherence import refresh_adherence_days
+from utilities.medicine_catalog import medicine_catalog
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 
@@ -19,9 +24,10 @@ def create_log(db: Session, schedule_id: int, log_data, user_id: int):
         raise HTTPException(status_code=403, detail="Unauthorized to create log for this medication")
     
     # log_data.medication_schedule_id = schedule_id
-    log = MedicationLog(medication_schedule_id=schedule_id, **log_data.model_dump())
+    log = MedicationLog(medication_schedule_id=schedule_id, user_id=user_id, **log_data.model_dump())
     db.add(log)
     try:
+        refresh_adherence_days(db, user_id, [log.scheduled_date])
         db.commit()
         db.refresh(log)
         return log
@@ -40,13 +46,65 @@ def create_log(db: Session, schedule_id: int, log_data, user_id: int):
     # db.refresh(log)
     # return log
 
+def create_logs_bulk(db: Session, items: List[MedicationLogBulkItem], user_id: int) -> List[BulkLogItemResult]:
+    """
+    Validate logs against the user's schedules in one query and insert them in one statement.
+    Existing (schedule, date) pairs are skipped via ON CONFLICT on unique_medication_schedule.
+    """
+    schedule_ids = {item.medication_schedule_id for item in items}
+    owned_ids = {
+        row.id for row in db.query(MedicationSchedule.id)
+        .join(MedicationSchedule.medication)
+        .filter(
+            MedicationSchedule.id.in_(schedule_ids),
+            Medication.user_id == user_id
+        )
+    }
+
+    results: List[Optional[BulkLogItemResult]] = [None] * len(items)
+    rows, row_indexes = [], {}
+    for index, item in enumerate(items):
+        key = (item.medication_schedule_id, item.scheduled_date)
+        if item.medication_schedule_id not in owned_ids:
+            results[index] = BulkLogItemResult(index=index, status="rejected", detail="Unauthorized to create log for this medication")
+        elif key in row_indexes:
+            results[index] = BulkLogItemResult(index=index, status="duplicate", detail="Duplicate schedule and date in this batch.")
+        else:
+            rows.append({"user_id": user_id, **item.model_dump()})
+            row_indexes[key] = index
+
+    if rows:
+        statement = (
+            insert(MedicationLog)
+            .values(rows)
+            .on_conflict_do_nothing(constraint="unique_medication_schedule")
+            .returning(MedicationLog.id, MedicationLog.medication_schedule_id, MedicationLog.scheduled_date)
+        )
+        inserted = {
+            (row.medication_schedule_id, row.scheduled_date): row.id
+            for row in db.execute(statement)
+        }
+        refresh_adherence_days(db, user_id, [scheduled_date for _, scheduled_date in inserted])
+        db.commit()
+        for key, index in row_indexes.items():
+            if key in inserted:
+                results[index] = BulkLogItemResult(index=index, status="created", id=inserted[key])
+            else:
+                results[index] = BulkLogItemResult(index=index, status="duplicate", detail="A log for this schedule and date already exists.")
+
+    return results
+
+def _with_medicines(db: Session, logs: List[MedicationLog]) -> List[MedicationLog]:
+    # Medicines come from the catalog cache instead of a third join (or a lazy load per medication)
+    medicine_catalog.attach(db, {log.medication_schedule.medication for log in logs})
+    return logs
+
 def get_log_if_owned(db: Session, log_id: int, user_id: int):
     log = (
         db.query(MedicationLog)
         .options(
             joinedload(MedicationLog.medication_schedule)
             .joinedload(MedicationSchedule.medication)
-            .joinedload(Medication.medicine)
         )
         .filter(MedicationLog.id == log_id)
         .first()
@@ -55,30 +113,30 @@ def get_log_if_owned(db: Session, log_id: int, user_id: int):
     if not log or log.medication_schedule.medication.user_id != user_id:
         raise HTTPException(status_code=404, detail="Log not found or unauthorized")
 
-    return log
+    return _with_medicines(db, [log])[0]
 
 def get_logs_by_schedule_id(db: Session, schedule_id: int, user_id: int) -> List[MedicationLog]:
-    return (
+    logs = (
         db.query(MedicationLog)
-        .join(MedicationLog.medication_schedule)
-        .join(MedicationSchedule.medication)
         .filter(
-            MedicationSchedule.id == schedule_id,
-            MedicationSchedule.medication.has(user_id=user_id)
+            MedicationLog.medication_schedule_id == schedule_id,
+            MedicationLog.user_id == user_id
         )
         .options(
             joinedload(MedicationLog.medication_schedule)
             .joinedload(MedicationSchedule.medication)
-            .joinedload(Medication.medicine)  # <--- fixed here
         )
         .all()
     )
+    return _with_medicines(db, logs)
 
 def update_log(db: Session, log_id: int, updates: MedicationLogUpdate, user_id: int):
     log = get_log_if_owned(db, log_id, user_id)
+    old_scheduled_date = log.scheduled_date
     for key, value in updates.model_dump(exclude_unset=True).items():
         setattr(log, key, value)
 
+    refresh_adherence_days(db, user_id, [old_scheduled_date, log.scheduled_date])
     db.commit()
     db.refresh(log)
     return log
@@ -86,69 +144,71 @@ def update_log(db: Session, log_id: int, updates: MedicationLogUpdate, user_id:
 def delete_log(db: Session, log_id: int, user_id: int):
     log = get_log_if_owned(db, log_id, user_id)
     db.delete(log)
+    refresh_adherence_days(db, user_id, [log.scheduled_date])
     db.commit()
     return True
 
 def get_logs_by_date(db: Session, user_id: int, target_date: date):
-    return (
+    logs = (
         db.query(MedicationLog)
-        .join(MedicationLog.medication_schedule)
-        .join(MedicationSchedule.medication)
         .filter(
-            MedicationLog.scheduled_date == target_date,
-            MedicationSchedule.medication.has(user_id=user_id)
+            MedicationLog.user_id == user_id,
+            MedicationLog.scheduled_date == target_date
         )
         .options(
             joinedload(MedicationLog.medication_schedule)
             .joinedload(MedicationSchedule.medication)
-            .joinedload(Medication.medicine)
         )
         .all()
     )
+    return _with_medicines(db, logs)
 
 def get_logs_by_date_range(db: Session, user_id: int, start_date: date, end_date: date):
-    return (
+    logs = (
         db.query(MedicationLog)
-        .join(MedicationLog.medication_schedule)
-        .join(MedicationSchedule.medication)
         .filter(
-            MedicationLog.scheduled_date.between(start_date, end_date),
-            MedicationSchedule.medication.has(user_id=user_id)
+            MedicationLog.user_id == user_id,
+            MedicationLog.scheduled_date.between(start_date, end_date)
         )
         .options(
             joinedload(MedicationLog.medication_schedule)
             .joinedload(MedicationSchedule.medication)
-            .joinedload(Medication.medicine)
         )
         .all()
     )
+    return _with_medicines(db, logs)
 
 def get_logs_by_medicine(db: Session, user_id: int, medicine_id: int):
-    return (
+    logs = (
         db.query(MedicationLog)
         .join(MedicationLog.medication_schedule)
         .join(MedicationSchedule.medication)
         .filter(
-            MedicationSchedule.medication.has(user_id=user_id, medicine_id=medicine_id)
+            MedicationLog.user_id == user_id,
+            Medication.medicine_id == medicine_id
         )
         .options(
             joinedload(MedicationLog.medication_schedule)
             .joinedload(MedicationSchedule.medication)
-            .joinedload(Medication.medicine)
         )
         .all()
     )
+    return _with_medicines(db, logs)
 
 def get_logs_by_user(db: Session, user_id: int):
-    return (
+    logs = (
         db.query(MedicationLog)
-        .join(MedicationLog.medication_schedule)
-        .join(MedicationSchedule.medication)
-        .filter(Medication.user_id == user_id)
+        .filter(MedicationLog.user_id == user_id)
         .options(
             joinedload(MedicationLog.medication_schedule)
             .joinedload(MedicationSchedule.medication)
-            .joinedload(Medication.medicine)
         )
         .all()
-    )
\ No newline at end of file
+    )
+    return _with_medicines(db, logs)
+
+def get_logs_page_by_user(db: Session, user_id: int, fields: List[str], cursor: Optional[str], limit: int):
+    """Newest-first page of the user's logs, selecting only `fields` plus the (scheduled_date, id) keyset."""
+    columns = ["id", "scheduled_date"] + [f for f in fields if f not in ("id", "scheduled_date")]
+    query = db.query(*[getattr(MedicationLog, c) for c in columns]).filter(MedicationLog.user_id == user_id)
+    return keyset_page(query, MedicationLog.scheduled_date, MedicationLog.id, cursor, limit, parse=date.fromisoformat)
@@ -2,6 +2,16 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from models.medication_schedules import MedicationSchedule
 from schemas.medication_schedules import MedicationScheduleUpdate
+from crud.daily_adherence import refresh_span_adherence
+from crud.resource_versions import bump_version
+from models.resource_versions import VersionedResource
+
+
+def _medication_schedules_changed(db: Session, schedule: MedicationSchedule) -> None:
+    medication = schedule.medication
+    refresh_span_adherence(db, medication.user_id, (medication.start_date, medication.end_date))
+    bump_version(db, medication.user_id, VersionedResource.MEDICATIONS)
+
 
 def get_schedules_for_medication(db: Session, medication_id: int) -> List[MedicationSchedule]:
     """Get all schedules for a given medication."""
@@ -17,6 +27,7 @@ def create_medication_schedule(db: Session, medication_id: int, time, dosage_ins
     )
     db.add(schedule)
     db.flush()
+    _medication_schedules_changed(db, schedule)
     return schedule
 
 
@@ -29,6 +40,7 @@ def update_medication_schedule(db: Session, schedule_id: int, payload: Medicatio
         schedule.time = payload.time
     if payload.dosage_instruction is not None:
         schedule.dosage_instruction = payload.dosage_instruction
+    _medication_schedules_changed(db, schedule)
     return schedule
 
 
@@ -37,5 +49,8 @@ def delete_medication_schedule(db: Session, schedule_id: int) -> bool:
     schedule = db.query(MedicationSchedule).filter_by(id=schedule_id).first()
     if not schedule:
         return False
+    medication = schedule.medication
     db.delete(schedule)
+    refresh_span_adherence(db, medication.user_id, (medication.start_date, medication.end_date))
+    bump_version(db, medication.user_id, VersionedResource.MEDICATIONS)
     return True
@@ -5,6 +5,11 @@ from models.medications import Medication
 from models.medication_schedules import MedicationSchedule
 from models.medicines import Medicine
 from .medicines import create_medicine
+from .daily_adherence import refresh_span_adherence
+from .resource_versions import bump_version
+from utilities.medicine_catalog import medicine_catalog
+from utilities.schedule_sync import sync_medication_schedules
+from models.resource_versions import VersionedResource
 from sqlalchemy.exc import NoResultFound, IntegrityError
 from schemas.medications import MedicationUpdate
 from fastapi import HTTPException, status
@@ -57,6 +62,8 @@ def create_medication_with_schedules(db: Session, user_id: int, payload) -> Medi
         )
         db.add(schedule)
 
+    refresh_span_adherence(db, user_id, (payload.start_date, payload.end_date))
+    bump_version(db, user_id, VersionedResource.MEDICATIONS)
     return medication
 
 
@@ -68,18 +75,17 @@ def count_medications(db: Session, user_id: int) -> int:
 
 
 def get_user_medicines(db: Session, user_id: int) -> List[Medicine]:
-    return (
-        db.query(Medicine)
-        .join(Medication, Medication.medicine_id == Medicine.id)
-        .filter(Medication.user_id == user_id)
-        .distinct()
-        .all()
-    )
+    medicine_ids = db.query(Medication.medicine_id).filter(Medication.user_id == user_id).distinct()
+    medicines = medicine_catalog.get_many(db, [row.medicine_id for row in medicine_ids])
+    return sorted(medicines.values(), key=lambda medicine: medicine.id)
 
 
 def get_user_medications(db: Session, user_id: int) -> List[Medication]:
     """List all medications for a user."""
-    return db.query(Medication).filter_by(user_id=user_id).all()
+    medications = db.query(Medication).filter_by(user_id=user_id).all()
+    # `medication.medicine` comes from the catalog cache instead of a query per medication
+    medicine_catalog.attach(db, medications)
+    return medications
 
 # def normalize_time(t: time) -> time:
 #     return t.replace(second=0, microsecond=0)
@@ -104,6 +110,7 @@ def update_medication(db: Session, medication_id: int, payload: MedicationUpdate
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="End date must be after or equal to start date."
         )
+    original_span = (medication.start_date, medication.end_date)
 
     # Get or create medicine
     medicine = create_medicine(db, payload.name.strip(), payload.strength.strip())
@@ -129,37 +136,20 @@ def update_medication(db: Session, medication_id: int, payload: MedicationUpdate
             detail="Unexpected DB error during medication update."
         )
 
-    # Process schedules
-    for sched in payload.schedules:
-        norm_time = normalize_time(sched.time)
-        instruction = (
+    # Diff the submitted times against the existing schedules: one load, then bulk INSERT/UPDATE
+    submitted = {
+        normalize_time(sched.time): (
             sched.dosage_instruction.strip()
             if sched.dosage_instruction and sched.dosage_instruction.strip()
             else None
         )
-
-        existing = db.query(MedicationSchedule).filter_by(
-            medication_id=medication.id,
-            time=norm_time
-        ).first()
-
-        if not existing:
-            # ➕ New time — insert
-            db.add(MedicationSchedule(
-                medication_id=medication.id,
-                time=norm_time,
-                dosage_instruction=instruction,
-                is_active=True
-            ))
-        elif not existing.is_active:
-            # ✅ Exists but inactive — reactivate and update instruction
-            existing.is_active = True
-            existing.dosage_instruction = instruction
-        elif instruction is not None:
-            # ✏️ Exists and active — update instruction only if provided
-            existing.dosage_instruction = instruction
+        for sched in payload.schedules
+    }
+    sync_medication_schedules(db, MedicationSchedule, medication.id, submitted)
 
     db.flush()
+    refresh_span_adherence(db, medication.user_id, original_span, (payload.start_date, payload.end_date))
+    bump_version(db, medication.user_id, VersionedResource.MEDICATIONS)
     return medication
 
 # def update_medication(db: Session, medication_id: int, payload: MedicationUpdate) -> Optional[Medication]:
@@ -237,6 +227,8 @@ def delete_medication(db: Session, medication_id: int, user_id: int) -> bool:
     if not medication:
         return False
     db.delete(medication)
+    refresh_span_adherence(db, user_id, (medication.start_date, medication.end_date))
+    bump_version(db, user_id, VersionedResource.MEDICATIONS)
     return True
 
 
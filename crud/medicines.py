@@ -1,16 +1,29 @@
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
 from models.medicines import Medicine
+from utilities.medicine_catalog import medicine_catalog
+from utilities.medicine_index import (
+    PENDING_KEY,
+    clean_medicine_text,
+    medicine_index,
+    normalize_medicine_name,
+    normalize_strength,
+)
+
+# Set when the session's outer transaction commits, read when it ends
+_COMMITTED_KEY = "medicine_index_committed"
 
 
 def get_medicine_by_medicine_id(db: Session, medicine_id: int) -> Optional[Medicine]:
     """Get a specific medicine by ID."""
-    return db.query(Medicine).filter_by(id=medicine_id).first()
+    return medicine_catalog.get(db, medicine_id)
 
 
 def get_medicine_by_name_and_strength(db: Session, name: str, strength: str) -> Optional[Medicine]:
-    """Get a specific medicine by its name and strength."""
-    return db.query(Medicine).filter_by(name=name, strength=strength).first()
+    """Get a specific medicine by its name and strength, ignoring case and spacing."""
+    return medicine_catalog.get_by_name_and_strength(db, name, strength)
 
 
 def get_medicines(db: Session) -> List[Medicine]:
@@ -18,12 +31,51 @@ def get_medicines(db: Session) -> List[Medicine]:
     return db.query(Medicine).all()
 
 
+def search_medicines(db: Session, q: str, limit: int) -> List[Tuple[int, str, str]]:
+    """Typeahead over the in-memory medicine index: (id, name, strength), best match first."""
+    medicine_index.ensure_loaded(
+        lambda: db.query(Medicine.id, Medicine.name, Medicine.strength).all()
+    )
+    return medicine_index.search(q, limit)
+
+
 def create_medicine(db: Session, name: str, strength: str) -> Medicine:
-    """Create a new medicine or return an existing one."""
+    """Create a new medicine or return an existing one ("Metformin " and "metformin" are the same)."""
     existing = get_medicine_by_name_and_strength(db, name, strength)
     if existing:
         return existing
-    medicine = Medicine(name=name, strength=strength)
-    db.add(medicine)
-    db.flush()
-    return medicine
\ No newline at end of file
+    medicine = Medicine(
+        name=clean_medicine_text(name),
+        strength=clean_medicine_text(strength),
+        normalized_name=normalize_medicine_name(name),
+        normalized_strength=normalize_strength(strength),
+    )
+    try:
+        with db.begin_nested():
+            db.add(medicine)
+    except IntegrityError:
+        # Someone else created it between the lookup and the insert
+        return get_medicine_by_name_and_strength(db, name, strength)
+    db.info.setdefault(PENDING_KEY, []).append((medicine.id, medicine.name, medicine.strength))
+    return medicine
+
+
+@event.listens_for(Session, "after_commit")
+def _note_commit(session):
+    # Also fires when a savepoint (create_medicine's begin_nested) commits; only the outer commit counts
+    if not session.in_nested_transaction():
+        session.info[_COMMITTED_KEY] = True
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _settle_new_medicines(session, transaction):
+    """Publish the session's new medicines once its outer transaction commits; drop them if it rolled back."""
+    if transaction.parent is not None:
+        return
+    pending = session.info.pop(PENDING_KEY, None)
+    committed = session.info.pop(_COMMITTED_KEY, False)
+    if pending and committed:
+        medicine_index.add(pending)
+        medicine_catalog.invalidate(
+            (normalize_medicine_name(name), normalize_strength(strength)) for _, name, strength in pending
+        )
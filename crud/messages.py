@@ -1,14 +1,16 @@
 from config import settings
 from dotenv import load_dotenv
 from fastapi import HTTPException
+from sqlalchemy import Float, cast, func, tuple_
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
 import os
 import google.generativeai as genai
-from typing import Tuple
+from typing import Optional, Tuple
 
 from models.messages import Message
-from crud.chats import get_chat_summary
+from models.chats import Chat
+from crud.chats import get_chat
 from crud.bp_logs import get_recent_bp_logs, get_logs_by_user_id, get_logs_by_date_range
 from crud.bp_schedules import get_user_bp_schedules
 from crud.sugar_logs import get_recent_sugar_logs, get_sugar_logs_by_user, get_sugar_logs_by_date_range
@@ -20,12 +22,19 @@ import re
 
 from schemas.messages import MessageCreate, MessagePair
 from constants.systemPrompt import system_prompt
+from utilities.gemini_client import generative_model
+from utilities.gemini_governor import governor, Priority
+from utilities.pagination import keyset_page, decode_cursor, encode_cursor
+from utilities.chat_context import build_chat_context
+from utilities.semantic_cache import SemanticCache
 
 load_dotenv()
 
 genai.configure(api_key=settings.GEMINI_API_KEY)
 
-gemini_model = genai.GenerativeModel("gemini-1.5-flash")  # or "gemini-1.5-pro"
+gemini_model = generative_model("gemini-1.5-flash")  # or "gemini-1.5-pro"
+
+chat_cache = SemanticCache(settings.CHAT_CACHE_SIZE, settings.CHAT_CACHE_THRESHOLD, settings.CHAT_CACHE_TTL_SECONDS)
 
 class LLMResponseError(Exception):
     pass
@@ -33,7 +42,8 @@ class LLMResponseError(Exception):
 def get_llm_response(message: str, system_message: str) -> Tuple[str, int]:
     prompt = system_message + '\n\nUser: ' + message
     try:
-        response = gemini_model.generate_content(prompt)
+        # Chat is interactive: it goes ahead of queued insight batches and never waits long
+        response = governor.call(lambda: gemini_model.generate_content(prompt), prompt, Priority.INTERACTIVE)
         content = response.text
         return content
     except Exception as e:
@@ -164,13 +174,22 @@ def create_message_with_ai(db: Session, user_id: int, message: MessageCreate, me
 
         if message_context:
             system_message += (
-                '\nThe following is a summary of the previous conversation to maintain context:\n' + message_context + "\nPlease avoid repeating questions or greetings. Continue from where we left off."
+                '\n\n' + message_context + "\nPlease avoid repeating questions or greetings. Continue from where we left off."
             )
 
         print(system_message)
 
-        # Get Gemini Response
-        response = get_llm_response(message.request, system_message)
+        # Only general questions are shared: anything with the user's data or chat history goes to Gemini
+        cacheable = settings.CHAT_CACHE and not context_parts and not message_context
+        cached = chat_cache.get(message.request) if cacheable else None
+        if cached:
+            response, similarity = cached
+            print(f"✅ Chat cache hit (similarity {similarity:.2f})")
+        else:
+            # Get Gemini Response
+            response = get_llm_response(message.request, system_message)
+            if cacheable:
+                chat_cache.put(message.request, response)
 
         user_message = Message(
             response=response,
@@ -192,23 +211,24 @@ def create_message_with_ai(db: Session, user_id: int, message: MessageCreate, me
         return {"error": "Internal server error"}, 0
 
 
-def summarize_conversation_incremental(messages: list, previous_summary: str) -> Tuple[str, int]:
-    """Perform an incremental summary using Gemini."""
+def summarize_conversation_incremental(messages: list, previous_summary: str) -> Optional[str]:
+    """Fold `messages` (oldest first) into the previous summary with one Gemini call. None if the call fails."""
     if not messages:
         return previous_summary
 
-    last_message = messages[-1]
+    new_messages = "\n".join(f"User: {m.user}\nAI: {m.ai}" for m in messages)
     new_content = (
         f"Previous Summary:\n{previous_summary}\n\n"
-        f"New Message:\nUser: {last_message.user}\nAI: {last_message.ai}"
+        f"New Messages:\n{new_messages}"
     )
     try:
-        response = gemini_model.generate_content(new_content + '\n\nPlease summarize the conversation succinctly:')
+        summary_prompt = new_content + '\n\nPlease summarize the conversation succinctly:'
+        response = governor.call(lambda: gemini_model.generate_content(summary_prompt), summary_prompt, Priority.INTERACTIVE)
         updated_summary = response.text
         return updated_summary
     except Exception as e:
         print(f"Error summarizing conversation: {e}")
-        return previous_summary, 0
+        return None
 
 
 def get_message(db: Session, message_id: int) -> Message:
@@ -225,9 +245,47 @@ def delete_message(db: Session, message_id: int) -> Message:
     return db_message
 
 
-def get_messages_by_chat(db: Session, chat_id: int) -> list:
-    """Retrieve all messages for a specific chat."""
-    return db.query(Message).filter(Message.chat_id == chat_id).all()
+def get_messages_page_by_chat(db: Session, chat_id: int, cursor: Optional[str], limit: int):
+    """
+    The latest `limit` messages of a chat (older ones via the cursor), read newest first off the
+    (chat_id, created_at, id) index and returned oldest first for display, so any chat length costs the same.
+    """
+    rows, next_cursor = keyset_page(
+        db.query(Message).filter(Message.chat_id == chat_id), Message.created_at, Message.id, cursor, limit
+    )
+    return rows[::-1], next_cursor
+
+
+def search_messages(db: Session, user_id: int, q: str, cursor: Optional[str], limit: int):
+    """
+    Messages in the user's chats matching `q` (web-search syntax: words, "phrases", -exclusions),
+    best match first. Matching uses the GIN index on messages.search_vector; the snippet is only
+    built for the returned page. Returns ([(message, rank, snippet)], next_cursor).
+    """
+    query = func.websearch_to_tsquery("english", q)
+    # ts_rank_cd is a float4; as float8 it round-trips through the cursor exactly
+    rank = cast(func.ts_rank_cd(Message.search_vector, query), Float)
+    snippet = func.ts_headline(
+        "english", Message.request + " — " + Message.response, query,
+        "MaxFragments=2, MinWords=5, MaxWords=20, StartSel=**, StopSel=**",
+    )
+
+    rows = (
+        db.query(Message, rank.label("rank"), snippet.label("snippet"))
+        .join(Chat, Chat.id == Message.chat_id)
+        .filter(Chat.user_id == user_id, Message.search_vector.op("@@")(query))
+    )
+    if cursor:
+        value, row_id = decode_cursor(cursor, float)
+        rows = rows.filter(tuple_(rank, Message.id) < tuple_(value, row_id))
+    # Fetch one extra row to know whether another page exists
+    rows = rows.order_by(rank.desc(), Message.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].rank, rows[-1].Message.id)
+    return [(row.Message, row.rank, row.snippet) for row in rows], next_cursor
 
 
 def get_last_n_message_pairs(
@@ -244,11 +302,44 @@ def get_last_n_message_pairs(
     return [MessagePair(user=row.request, ai=row.response) for row in rows]
 
 
-def get_summary(db: Session, chat_id: int) -> str:
-    messages = get_last_n_message_pairs(db, chat_id, 1)
-    summary = get_chat_summary(db, chat_id)
-    summary = summarize_conversation_incremental(messages, summary)
-    return summary
+def get_chat_context(db: Session, chat_id: int) -> str:
+    """
+    Summary plus recent turns for the next reply, within CHAT_CONTEXT_TOKEN_BUDGET.
+
+    Turns newer than chat.summary_message_id are sent verbatim. Once CHAT_SUMMARY_EVERY turns
+    beyond the CHAT_CONTEXT_TURNS window have piled up, those oldest ones are folded into the
+    summary in a single call, so summarizing costs one call per CHAT_SUMMARY_EVERY messages
+    instead of one per message.
+    """
+    chat = get_chat(db, chat_id)
+    if chat is None:
+        return ""
+    window = settings.CHAT_CONTEXT_TURNS
+    rows = (
+        db.query(Message.id, Message.request, Message.response)
+        .filter(Message.chat_id == chat_id)
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(window + settings.CHAT_SUMMARY_EVERY)
+        .all()
+    )[::-1]
+    # Chats summarized before summary_message_id existed: the summary covers everything older than the rows read here
+    unsummarized = [row for row in rows if chat.summary_message_id is None or row.id > chat.summary_message_id]
+
+    if len(unsummarized) >= window + settings.CHAT_SUMMARY_EVERY:
+        folded, unsummarized = unsummarized[:-window], unsummarized[-window:]
+        summary = summarize_conversation_incremental(
+            [MessagePair(user=row.request, ai=row.response) for row in folded], chat.summary or ""
+        )
+        if summary is not None:
+            chat.summary = summary
+            chat.summary_message_id = folded[-1].id
+            db.commit()
+        else:
+            # Summarizing failed; keep the turns in context and try again next message
+            unsummarized = folded + unsummarized
+
+    turns = [MessagePair(user=row.request, ai=row.response) for row in unsummarized]
+    return build_chat_context(chat.summary, turns, settings.CHAT_CONTEXT_TOKEN_BUDGET)
 
 
 def get_last_user_message_by_chat(db: Session, chat_id: int) -> str:
@@ -0,0 +1,28 @@
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.resource_versions import ResourceVersion, VersionedResource
+
+
+def get_version(db: Session, user_id: int, resource: VersionedResource) -> int:
+    """Current version of a user's resource; 0 if it was never written."""
+    version = db.query(ResourceVersion.version).filter(
+        ResourceVersion.user_id == user_id,
+        ResourceVersion.resource == resource
+    ).scalar()
+    return version or 0
+
+
+def bump_version(db: Session, user_id: int, *resources: VersionedResource) -> None:
+    """
+    Invalidate cached copies of the given resources for a user.
+    Does not commit; call it in the same transaction as the write it describes.
+    """
+    now = datetime.utcnow()
+    for resource in resources:
+        statement = insert(ResourceVersion).values(user_id=user_id, resource=resource, version=1, updated_at=now)
+        db.execute(statement.on_conflict_do_update(
+            constraint="unique_resource_version",
+            set_={"version": ResourceVersion.version + 1, "updated_at": now},
+        ))
@@ -1,11 +1,17 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, insert
 from typing import Optional, List
 from datetime import datetime, date
 
 from models.sugar_logs import SugarLog
 from models.sugar_schedules import SugarSchedule
-from schemas.sugar_logs import SugarLogCreate, SugarLogUpdate
+from schemas.sugar_logs import SugarLogCreate, SugarLogUpdate, SugarLogBulkItem
+from schemas.bulk_logs import BulkLogItemResult
+from utilities.pagination import keyset_page
+from crud.vitals_rollups import record_readings, rebuild_rollups, sugar_readings, reading_day
+from crud.daily_adherence import refresh_reading_adherence
+from crud.resource_versions import bump_version
+from models.resource_versions import VersionedResource
 
 def create_sugar_log(db: Session, user_id: int, schedule_id: int, data: SugarLogCreate) -> SugarLog:
     if schedule_id:
@@ -14,6 +20,7 @@ def create_sugar_log(db: Session, user_id: int, schedule_id: int, data: SugarLog
             raise PermissionError("Invalid schedule ID or not authorized")
 
     log = SugarLog(
+        user_id=user_id,
         value=data.value,
         type=data.type,
         notes=data.notes,
@@ -23,38 +30,91 @@ def create_sugar_log(db: Session, user_id: int, schedule_id: int, data: SugarLog
     # infer user_id from schedule
     log.schedule = db.query(SugarSchedule).filter_by(id=schedule_id).first() if schedule_id else None
     db.add(log)
+    record_readings(db, user_id, sugar_readings(log.value, log.type, log.checked_at))
+    refresh_reading_adherence(db, user_id, [log.checked_at])
+    bump_version(db, user_id, VersionedResource.SUGAR_LOGS)
     db.commit()
     db.refresh(log)
     return log
 
+def create_sugar_logs_bulk(db: Session, user_id: int, items: List[SugarLogBulkItem]) -> List[BulkLogItemResult]:
+    """Validate readings against the user's schedules in one query and insert the valid ones in one statement."""
+    schedule_ids = {item.schedule_id for item in items}
+    owned_ids = {
+        row.id for row in db.query(SugarSchedule.id).filter(
+            SugarSchedule.id.in_(schedule_ids),
+            SugarSchedule.user_id == user_id
+        )
+    }
+
+    results: List[Optional[BulkLogItemResult]] = [None] * len(items)
+    rows, row_indexes = [], []
+    now = datetime.utcnow()
+    for index, item in enumerate(items):
+        if item.schedule_id not in owned_ids:
+            results[index] = BulkLogItemResult(index=index, status="rejected", detail="Invalid schedule ID or not authorized")
+            continue
+        rows.append({
+            "schedule_id": item.schedule_id,
+            "user_id": user_id,
+            "value": item.value,
+            "type": item.type,
+            "notes": item.notes,
+            "checked_at": item.checked_at or now,
+        })
+        row_indexes.append(index)
+
+    if rows:
+        # Multi-row INSERT ... RETURNING with ids in the same order as `rows`
+        ids = db.execute(
+            insert(SugarLog).returning(SugarLog.id, sort_by_parameter_order=True),
+            rows
+        ).scalars().all()
+        record_readings(db, user_id, [
+            reading for row in rows
+            for reading in sugar_readings(row["value"], row["type"], row["checked_at"])
+        ])
+        refresh_reading_adherence(db, user_id, [row["checked_at"] for row in rows])
+        bump_version(db, user_id, VersionedResource.SUGAR_LOGS)
+        db.commit()
+        for index, log_id in zip(row_indexes, ids):
+            results[index] = BulkLogItemResult(index=index, status="created", id=log_id)
+
+    return results
+
 def get_sugar_log_by_id(db: Session, log_id: int, user_id: int) -> Optional[SugarLog]:
-    return db.query(SugarLog).join(SugarSchedule).filter(
+    return db.query(SugarLog).filter(
         SugarLog.id == log_id,
-        SugarSchedule.user_id == user_id
+        SugarLog.user_id == user_id
     ).first()
 
 def get_sugar_logs_by_schedule(db: Session, schedule_id: int, user_id: int) -> List[SugarLog]:
-    return db.query(SugarLog).join(SugarSchedule).filter(
+    return db.query(SugarLog).filter(
         SugarLog.schedule_id == schedule_id,
-        SugarSchedule.user_id == user_id
+        SugarLog.user_id == user_id
     ).all()
 
 def get_sugar_logs_by_user(db: Session, user_id: int) -> List[SugarLog]:
-    return db.query(SugarLog).join(SugarSchedule).filter(SugarSchedule.user_id == user_id).all()
+    return db.query(SugarLog).filter(SugarLog.user_id == user_id).all()
+
+def get_sugar_logs_page_by_user(db: Session, user_id: int, fields: List[str], cursor: Optional[str], limit: int):
+    """Newest-first page of the user's logs, selecting only `fields` plus the (checked_at, id) keyset."""
+    columns = ["id", "checked_at"] + [f for f in fields if f not in ("id", "checked_at")]
+    query = db.query(*[getattr(SugarLog, c) for c in columns]).filter(SugarLog.user_id == user_id)
+    return keyset_page(query, SugarLog.checked_at, SugarLog.id, cursor, limit)
 
 def get_recent_sugar_logs(db: Session, user_id: int, limit: int = 4) -> List[SugarLog]:
     return (
         db.query(SugarLog)
-        .join(SugarSchedule)
-        .filter(SugarSchedule.user_id == user_id)
+        .filter(SugarLog.user_id == user_id)
         .order_by(SugarLog.checked_at.desc())
         .limit(limit)
         .all()
     )
 
 def get_sugar_logs_by_date_range(db: Session, user_id: int, start: date, end: date) -> List[SugarLog]:
-    return db.query(SugarLog).join(SugarSchedule).filter(
-        SugarSchedule.user_id == user_id,
+    return db.query(SugarLog).filter(
+        SugarLog.user_id == user_id,
         SugarLog.checked_at >= datetime.combine(start, datetime.min.time()),
         SugarLog.checked_at <= datetime.combine(end, datetime.max.time())
     ).all()
@@ -63,39 +123,48 @@ def get_sugar_logs_by_date(db: Session, user_id: int, target_date: date) -> List
     start_dt = datetime.combine(target_date, datetime.min.time())
     end_dt = datetime.combine(target_date, datetime.max.time())
 
-    return db.query(SugarLog).join(SugarSchedule).filter(
-        SugarSchedule.user_id == user_id,
+    return db.query(SugarLog).filter(
+        SugarLog.user_id == user_id,
         SugarLog.checked_at >= start_dt,
         SugarLog.checked_at <= end_dt
     ).all()
 
 def update_sugar_log(db: Session, log_id: int, user_id: int, data: SugarLogUpdate) -> Optional[SugarLog]:
-    log = db.query(SugarLog).join(SugarSchedule).filter(
+    log = db.query(SugarLog).filter(
         SugarLog.id == log_id,
-        SugarSchedule.user_id == user_id
+        SugarLog.user_id == user_id
     ).first()
 
     if not log:
         return None
 
+    old_checked_at = log.checked_at
     update_data = data.dict(exclude_unset=True)
 
     for key, value in update_data.items():
         setattr(log, key, value)
 
+    db.flush()
+    rebuild_rollups(db, user_id, {reading_day(old_checked_at), reading_day(log.checked_at)})
+    refresh_reading_adherence(db, user_id, [old_checked_at, log.checked_at])
+    bump_version(db, user_id, VersionedResource.SUGAR_LOGS)
     db.commit()
     db.refresh(log)
     return log
 
 def delete_sugar_log(db: Session, log_id: int, user_id: int) -> bool:
-    log = db.query(SugarLog).join(SugarSchedule).filter(
+    log = db.query(SugarLog).filter(
         SugarLog.id == log_id,
-        SugarSchedule.user_id == user_id
+        SugarLog.user_id == user_id
     ).first()
 
     if not log:
         return False
 
     db.delete(log)
+    db.flush()
+    rebuild_rollups(db, user_id, {reading_day(log.checked_at)})
+    refresh_reading_adherence(db, user_id, [log.checked_at])
+    bump_version(db, user_id, VersionedResource.SUGAR_LOGS)
     db.commit()
     return True
@@ -1,6 +1,10 @@
 from sqlalchemy.orm import Session
 from datetime import timedelta, date
 from models.sugar_schedules import SugarSchedule
+from crud.daily_adherence import refresh_span_adherence
+from crud.resource_versions import bump_version
+from utilities.schedule_sync import create_timed_schedules
+from models.resource_versions import VersionedResource
 from schemas.sugar_schedules import SugarScheduleCreate
 from typing import List, Optional
 from fastapi import HTTPException, status
@@ -41,27 +45,22 @@ def create_sugar_schedule(db: Session, user_id: int, payload: SugarScheduleCreat
             detail="End date must be after or equal to start date."
         )
 
-    schedules = []
-    for t in payload.times:
-        schedule = SugarSchedule(
-            user_id=user_id,
-            time=t,
-            duration_days=duration_days,
-            start_date=start_date,
-            end_date=end_date
-        )
-        db.add(schedule)
-        db.commit()
-        db.refresh(schedule)
-        schedules.append(schedule)
+    # One load, one multi-row INSERT and one commit for all the times
+    schedules = create_timed_schedules(db, SugarSchedule, user_id, payload.times, start_date, end_date)
 
-    db.flush()  # Use flush to assign IDs before returning
+    refresh_span_adherence(db, user_id, (start_date, end_date))
+    bump_version(db, user_id, VersionedResource.SUGAR_LOGS)
+    # Ids are read before the commit expires the rows, which then reload in one query rather than one per schedule
+    ids = [schedule.id for schedule in schedules]
+    db.commit()
+    db.query(SugarSchedule).filter(SugarSchedule.id.in_(ids)).all()
     return schedules
 
 def update_sugar_schedule(db: Session, schedule_id: int, payload) -> Optional[SugarSchedule]:
     schedule = db.query(SugarSchedule).filter_by(id=schedule_id).first()
     if not schedule:
         return None
+    original_span = (schedule.start_date, schedule.end_date)
     if payload.time:
         schedule.time = payload.time
     start_date = schedule.start_date
@@ -83,6 +82,8 @@ def update_sugar_schedule(db: Session, schedule_id: int, payload) -> Optional[Su
     
     if payload.is_active is not None:
         schedule.is_active = payload.is_active
+    refresh_span_adherence(db, schedule.user_id, original_span, (start_date, end_date))
+    bump_version(db, schedule.user_id, VersionedResource.SUGAR_LOGS)
     return schedule
 
 def delete_sugar_schedule(db: Session, schedule_id: int) -> bool:
@@ -90,4 +91,6 @@ def delete_sugar_schedule(db: Session, schedule_id: int) -> bool:
     if not schedule:
         return False
     db.delete(schedule)
+    refresh_span_adherence(db, schedule.user_id, (schedule.start_date, schedule.end_date))
+    bump_version(db, schedule.user_id, VersionedResource.SUGAR_LOGS)
     return True
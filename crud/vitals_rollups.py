@@ -0,0 +1,199 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.bp_logs import BloodPressureLog
+from models.sugar_logs import SugarLog, SugarType
+from models.vitals_rollups import VitalsRollup, RollupGranularity, VitalMetric
+
+SUGAR_METRICS = {
+    SugarType.FASTING: VitalMetric.SUGAR_FASTING,
+    SugarType.RANDOM: VitalMetric.SUGAR_RANDOM,
+}
+
+Reading = Tuple[VitalMetric, float, datetime]
+
+
+def _as_utc(checked_at: datetime) -> datetime:
+    # Readings without tzinfo are stored as UTC (datetime.utcnow defaults)
+    if checked_at.tzinfo is None:
+        return checked_at.replace(tzinfo=timezone.utc)
+    return checked_at.astimezone(timezone.utc)
+
+
+def reading_day(checked_at: datetime) -> date:
+    """Calendar day (UTC) a reading is bucketed under."""
+    return _as_utc(checked_at).date()
+
+
+def bucket_start(day: date, granularity: RollupGranularity) -> date:
+    if granularity == RollupGranularity.WEEKLY:
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def bp_readings(systolic: int, diastolic: int, pulse: Optional[int], checked_at: datetime) -> List[Reading]:
+    readings = [
+        (VitalMetric.SYSTOLIC, systolic, checked_at),
+        (VitalMetric.DIASTOLIC, diastolic, checked_at),
+    ]
+    if pulse is not None:
+        readings.append((VitalMetric.PULSE, pulse, checked_at))
+    return readings
+
+
+def sugar_readings(value: float, sugar_type: SugarType, checked_at: datetime) -> List[Reading]:
+    return [(SUGAR_METRICS[sugar_type], value, checked_at)]
+
+
+def _aggregate(user_id: int, readings: Iterable[Reading]) -> Dict[tuple, dict]:
+    """Fold readings into daily and weekly buckets keyed by (granularity, bucket_start, metric)."""
+    buckets: Dict[tuple, dict] = {}
+    for metric, value, checked_at in readings:
+        checked_at = _as_utc(checked_at)
+        day = checked_at.date()
+        for granularity in RollupGranularity:
+            key = (granularity, bucket_start(day, granularity), metric)
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = {
+                    "user_id": user_id,
+                    "granularity": granularity,
+                    "bucket_start": key[1],
+                    "metric": metric,
+                    "min_value": value,
+                    "max_value": value,
+                    "sum_value": value,
+                    "count": 1,
+                    "last_value": value,
+                    "last_checked_at": checked_at,
+                }
+                continue
+            bucket["min_value"] = min(bucket["min_value"], value)
+            bucket["max_value"] = max(bucket["max_value"], value)
+            bucket["sum_value"] += value
+            bucket["count"] += 1
+            if checked_at >= bucket["last_checked_at"]:
+                bucket["last_value"] = value
+                bucket["last_checked_at"] = checked_at
+    return buckets
+
+
+def record_readings(db: Session, user_id: int, readings: List[Reading]) -> None:
+    """
+    Incrementally fold new readings into the user's rollups with one upsert.
+    Does not commit; call it inside the transaction that inserts the logs.
+    """
+    rows = list(_aggregate(user_id, readings).values())
+    if not rows:
+        return
+
+    statement = insert(VitalsRollup).values(rows)
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        constraint="unique_vitals_rollup_bucket",
+        set_={
+            "min_value": func.least(VitalsRollup.min_value, excluded.min_value),
+            "max_value": func.greatest(VitalsRollup.max_value, excluded.max_value),
+            "sum_value": VitalsRollup.sum_value + excluded.sum_value,
+            "count": VitalsRollup.count + excluded.count,
+            "last_value": case(
+                (excluded.last_checked_at >= VitalsRollup.last_checked_at, excluded.last_value),
+                else_=VitalsRollup.last_value,
+            ),
+            "last_checked_at": func.greatest(VitalsRollup.last_checked_at, excluded.last_checked_at),
+            "updated_at": datetime.utcnow(),
+        },
+    )
+    db.execute(statement)
+
+
+def _load_readings(db: Session, user_id: int, start_day: Optional[date] = None, end_day: Optional[date] = None) -> List[Reading]:
+    bp_query = db.query(
+        BloodPressureLog.systolic, BloodPressureLog.diastolic, BloodPressureLog.pulse, BloodPressureLog.checked_at
+    ).filter(BloodPressureLog.user_id == user_id)
+    sugar_query = db.query(
+        SugarLog.value, SugarLog.type, SugarLog.checked_at
+    ).filter(SugarLog.user_id == user_id)
+
+    if start_day is not None:
+        start_dt = datetime.combine(start_day, time.min, tzinfo=timezone.utc)
+        bp_query = bp_query.filter(BloodPressureLog.checked_at >= start_dt)
+        sugar_query = sugar_query.filter(SugarLog.checked_at >= start_dt)
+    if end_day is not None:
+        end_dt = datetime.combine(end_day, time.max, tzinfo=timezone.utc)
+        bp_query = bp_query.filter(BloodPressureLog.checked_at <= end_dt)
+        sugar_query = sugar_query.filter(SugarLog.checked_at <= end_dt)
+
+    readings: List[Reading] = []
+    for row in bp_query.yield_per(1000):
+        readings.extend(bp_readings(row.systolic, row.diastolic, row.pulse, row.checked_at))
+    for row in sugar_query.yield_per(1000):
+        readings.extend(sugar_readings(row.value, row.type, row.checked_at))
+    return readings
+
+
+def _insert_buckets(db: Session, rows: List[dict]) -> None:
+    if rows:
+        db.execute(insert(VitalsRollup), rows)
+
+
+def rebuild_rollups(db: Session, user_id: int, days: Iterable[date]) -> None:
+    """
+    Recompute the daily and weekly buckets touching `days` from the raw logs.
+    Used after a log is edited or deleted, where min/max cannot be updated incrementally.
+    Does not commit; flush pending log changes before calling.
+    """
+    days = set(days)
+    if not days:
+        return
+    weeks = {bucket_start(day, RollupGranularity.WEEKLY) for day in days}
+
+    db.query(VitalsRollup).filter(
+        VitalsRollup.user_id == user_id,
+        or_(
+            and_(VitalsRollup.granularity == RollupGranularity.DAILY, VitalsRollup.bucket_start.in_(days)),
+            and_(VitalsRollup.granularity == RollupGranularity.WEEKLY, VitalsRollup.bucket_start.in_(weeks)),
+        )
+    ).delete(synchronize_session=False)
+
+    readings: List[Reading] = []
+    for week in weeks:
+        readings.extend(_load_readings(db, user_id, week, week + timedelta(days=6)))
+
+    # The weeks' raw logs also cover untouched days, whose daily buckets were kept
+    _insert_buckets(db, [
+        row for (granularity, start, _), row in _aggregate(user_id, readings).items()
+        if (granularity == RollupGranularity.DAILY and start in days)
+        or (granularity == RollupGranularity.WEEKLY and start in weeks)
+    ])
+
+
+def rebuild_user_rollups(db: Session, user_id: int) -> int:
+    """Drop and rebuild every rollup for a user from the raw logs. Returns the number of buckets written."""
+    db.query(VitalsRollup).filter(VitalsRollup.user_id == user_id).delete(synchronize_session=False)
+    rows = list(_aggregate(user_id, _load_readings(db, user_id)).values())
+    _insert_buckets(db, rows)
+    return len(rows)
+
+
+def get_rollups(
+    db: Session,
+    user_id: int,
+    granularity: RollupGranularity,
+    start_date: date,
+    end_date: date,
+    metrics: Optional[List[VitalMetric]] = None,
+) -> List[VitalsRollup]:
+    query = db.query(VitalsRollup).filter(
+        VitalsRollup.user_id == user_id,
+        VitalsRollup.granularity == granularity,
+        VitalsRollup.bucket_start >= bucket_start(start_date, granularity),
+        VitalsRollup.bucket_start <= end_date,
+    )
+    if metrics:
+        query = query.filter(VitalsRollup.metric.in_(metrics))
+    return query.order_by(VitalsRollup.bucket_start).all()
@@ -7,6 +7,7 @@ from tasks.scheduler import start_scheduler
 import os
 from fastapi.responses import HTMLResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
+from utilities.responses import json_response_class, add_compression
 
 is_production = os.getenv("ENV") == "production"
 
@@ -14,6 +15,7 @@ app = FastAPI(
     docs_url=None if is_production else "/docs",
     redoc_url=None if is_production else "/redoc",
     openapi_url=None if is_production else "/openapi.json",
+    default_response_class=json_response_class(),
 )
 
 # Mount static files
@@ -64,6 +66,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_credentials=True,
 )
+add_compression(app)
 
 Base.metadata.create_all(bind=engine)
 
@@ -0,0 +1,26 @@
+# Adds the composite indexes behind the hot per-user / per-schedule range queries.
+# New databases get these from the models via Base.metadata.create_all; this script
+# brings existing databases in line.
+#
+# Run from the project root:  python -m migrations.001_composite_indexes
+#
+# insights(user_id, period, start_date) is already covered by the
+# unique_user_period_insight constraint, so no extra index is created for it.
+
+from sqlalchemy import text
+from database import engine
+
+indexes = [
+    ("ix_bp_logs_schedule_id_checked_at", "bp_logs", "schedule_id, checked_at"),
+    ("ix_sugar_logs_schedule_id_checked_at", "sugar_logs", "schedule_id, checked_at"),
+    ("ix_messages_chat_id_created_at", "messages", "chat_id, created_at"),
+    ("ix_chats_user_id_created_at", "chats", "user_id, created_at"),
+]
+
+# CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+    for name, table, columns in indexes:
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns});"))
+        print(f"✅ {name}")
+
+print("Indexes created successfully.")
@@ -0,0 +1,64 @@
+# Adds the denormalized user_id column to bp_logs, sugar_logs and medication_logs,
+# backfills it from the owning schedule (and medication for medication logs) and
+# creates the (user_id, date) indexes used by the per-user range queries.
+#
+# Run from the project root:  python -m migrations.002_log_user_id
+#
+# Safe to re-run: only rows with a NULL user_id are backfilled.
+
+from sqlalchemy import text
+from database import engine
+
+BATCH_SIZE = 10000
+
+columns = ["bp_logs", "sugar_logs", "medication_logs"]
+
+backfills = {
+    "bp_logs": """
+        UPDATE bp_logs l SET user_id = s.user_id
+        FROM bp_schedules s
+        WHERE l.schedule_id = s.id
+          AND l.id IN (SELECT id FROM bp_logs WHERE user_id IS NULL AND schedule_id IS NOT NULL LIMIT :batch)
+    """,
+    "sugar_logs": """
+        UPDATE sugar_logs l SET user_id = s.user_id
+        FROM sugar_schedules s
+        WHERE l.schedule_id = s.id
+          AND l.id IN (SELECT id FROM sugar_logs WHERE user_id IS NULL AND schedule_id IS NOT NULL LIMIT :batch)
+    """,
+    "medication_logs": """
+        UPDATE medication_logs l SET user_id = m.user_id
+        FROM medication_schedules s
+        JOIN medications m ON m.id = s.medication_id
+        WHERE l.medication_schedule_id = s.id
+          AND l.id IN (SELECT id FROM medication_logs WHERE user_id IS NULL LIMIT :batch)
+    """,
+}
+
+indexes = [
+    ("ix_bp_logs_user_id_checked_at", "bp_logs", "user_id, checked_at"),
+    ("ix_sugar_logs_user_id_checked_at", "sugar_logs", "user_id, checked_at"),
+    ("ix_medication_logs_user_id_scheduled_date", "medication_logs", "user_id, scheduled_date"),
+]
+
+with engine.begin() as conn:
+    for table in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id);"))
+
+# Backfill in small transactions so the log tables are never locked for long
+for table, statement in backfills.items():
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            updated = conn.execute(text(statement), {"batch": BATCH_SIZE}).rowcount
+        total += updated
+        if updated == 0:
+            break
+    print(f"✅ {table}: backfilled {total} rows")
+
+with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+    for name, table, cols in indexes:
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({cols});"))
+        print(f"✅ {name}")
+
+print("Log user_id migration completed successfully.")
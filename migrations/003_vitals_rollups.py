@@ -0,0 +1,18 @@
+# Creates the vitals_rollups table (daily and weekly min/max/mean/last per metric)
+# and backfills it from the existing bp and sugar logs.
+#
+# Run from the project root after 002_log_user_id:  python -m migrations.003_vitals_rollups
+#
+# Safe to re-run: the table is only created if missing and each user's rollups
+# are rebuilt from scratch.
+
+from database import engine
+from models.vitals_rollups import VitalsRollup
+from tasks.rollups import rebuild_all_rollups
+
+VitalsRollup.__table__.create(engine, checkfirst=True)
+print("✅ vitals_rollups")
+
+rebuild_all_rollups()
+
+print("Vitals rollups migration completed successfully.")
@@ -0,0 +1,17 @@
+# Creates the daily_adherence table (one row per user, day and scheduled slot)
+# and backfills it from the existing schedules and logs.
+#
+# Run from the project root after 003_vitals_rollups:  python -m migrations.004_daily_adherence
+#
+# Safe to re-run: the table is only created if missing and rows are upserted.
+
+from database import engine
+from models.daily_adherence import DailyAdherence
+from tasks.adherence import rebuild_all_adherence
+
+DailyAdherence.__table__.create(engine, checkfirst=True)
+print("✅ daily_adherence")
+
+rebuild_all_adherence()
+
+print("Daily adherence migration completed successfully.")
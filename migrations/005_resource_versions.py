@@ -0,0 +1,13 @@
+# Creates the resource_versions table backing the ETags on polled read endpoints.
+#
+# Run from the project root:  python -m migrations.005_resource_versions
+#
+# No backfill needed: a missing row means version 0. Safe to re-run.
+
+from database import engine
+from models.resource_versions import ResourceVersion
+
+ResourceVersion.__table__.create(engine, checkfirst=True)
+print("✅ resource_versions")
+
+print("Resource versions migration completed successfully.")
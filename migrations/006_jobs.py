@@ -0,0 +1,13 @@
+# Creates the jobs table for the database-backed job queue (JOB_BACKEND=database).
+#
+# Run from the project root:  python -m migrations.006_jobs
+#
+# Safe to re-run.
+
+from database import engine
+from models.jobs import Job
+
+Job.__table__.create(engine, checkfirst=True)
+print("✅ jobs")
+
+print("Jobs migration completed successfully.")
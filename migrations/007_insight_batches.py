@@ -0,0 +1,16 @@
+# Creates the insight_batches / insight_batch_items tables for checkpointed insight runs.
+#
+# Run from the project root:  python -m migrations.007_insight_batches
+#
+# No backfill: batches are created by the next scheduled run or by
+# python -m tasks.insight_batches backfill ... Safe to re-run.
+
+from database import engine
+from models.insight_batches import InsightBatch, InsightBatchItem
+
+InsightBatch.__table__.create(engine, checkfirst=True)
+print("✅ insight_batches")
+InsightBatchItem.__table__.create(engine, checkfirst=True)
+print("✅ insight_batch_items")
+
+print("Insight batches migration completed successfully.")
@@ -0,0 +1,22 @@
+# Widens the chat/message indexes to (…, created_at, id) so the cursor-paginated
+# GET /messages/chat/{chat_id} and GET /chats read one page straight off the index,
+# ties on created_at included, then drops the narrower indexes they replace.
+#
+# Run from the project root:  python -m migrations.008_chat_keyset_indexes
+
+from sqlalchemy import text
+from database import engine
+
+indexes = [
+    ("ix_messages_chat_id_created_at_id", "messages", "chat_id, created_at, id", "ix_messages_chat_id_created_at"),
+    ("ix_chats_user_id_created_at_id", "chats", "user_id, created_at, id", "ix_chats_user_id_created_at"),
+]
+
+# CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block
+with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+    for name, table, columns, replaced in indexes:
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns});"))
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {replaced};"))
+        print(f"✅ {name} (replaces {replaced})")
+
+print("Indexes created successfully.")
@@ -0,0 +1,16 @@
+# Adds chats.summary_message_id, the last message folded into chats.summary. Messages
+# after it are sent to the model verbatim; see crud.messages.get_chat_context.
+#
+# Run from the project root:  python -m migrations.009_chat_summary_message_id
+#
+# No backfill needed: NULL means the summary covers everything before the recent
+# turns (the old per-message summarizer kept it that way). Safe to re-run.
+
+from sqlalchemy import text
+from database import engine
+
+with engine.begin() as conn:
+    conn.execute(text("ALTER TABLE chats ADD COLUMN IF NOT EXISTS summary_message_id INTEGER;"))
+print("✅ chats.summary_message_id")
+
+print("Chat summary migration completed successfully.")
@@ -0,0 +1,30 @@
+# Full-text search over chat history: adds messages.search_vector, a stored generated
+# tsvector of request (weight A) and response (weight B) that Postgres keeps current on
+# every insert/update, plus the GIN index GET /messages/search runs on.
+#
+# Run from the project root:  python -m migrations.010_message_search
+#
+# Adding the generated column rewrites the messages table once (it is locked meanwhile),
+# so run it off-peak on large databases. Safe to re-run.
+
+from sqlalchemy import text
+from database import engine
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(request, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(response, '')), 'B')"
+)
+
+with engine.begin() as conn:
+    conn.execute(text(
+        f"ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED;"
+    ))
+print("✅ messages.search_vector")
+
+# CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+    conn.execute(text("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_search_vector ON messages USING gin (search_vector);"))
+print("✅ ix_messages_search_vector")
+
+print("Message search migration completed successfully.")
@@ -0,0 +1,92 @@
+# Adds medicines.normalized_name / normalized_strength (see utilities.medicine_index),
+# merges medicines that only differ in case or spacing ("Metformin" / "metformin ",
+# "500 mg" / "500MG") into the oldest row, and swaps the (name, strength) unique
+# constraint for one on the normalized pair.
+#
+# Run from the project root:  python -m migrations.011_medicine_normalized_names
+#
+# A duplicate is only merged when no user has medications on both rows (their
+# schedules and logs would collide); those are listed and the script stops before
+# adding the constraint. Merge the listed medications by hand, then re-run. Safe to re-run.
+
+import sys
+from collections import defaultdict
+
+from sqlalchemy import text
+from database import SessionLocal
+from crud.resource_versions import bump_version
+from models.resource_versions import VersionedResource
+from utilities.medicine_index import clean_medicine_text, normalize_medicine_name, normalize_strength
+
+db = SessionLocal()
+try:
+    db.execute(text("ALTER TABLE medicines ADD COLUMN IF NOT EXISTS normalized_name VARCHAR(200);"))
+    db.execute(text("ALTER TABLE medicines ADD COLUMN IF NOT EXISTS normalized_strength VARCHAR(50);"))
+
+    groups = defaultdict(list)
+    for medicine_id, name, strength in db.execute(text("SELECT id, name, strength FROM medicines ORDER BY id")):
+        key = (normalize_medicine_name(name), normalize_strength(strength))
+        groups[key].append(medicine_id)
+        db.execute(
+            text("UPDATE medicines SET normalized_name = :n, normalized_strength = :s WHERE id = :id"),
+            {"n": key[0], "s": key[1], "id": medicine_id},
+        )
+    print("✅ normalized medicine names")
+
+    touched_users = set()
+    conflicts = []
+    for key, ids in groups.items():
+        keep, duplicates = ids[0], ids[1:]
+        for duplicate in duplicates:
+            # Users already on the kept row keep their medication on the duplicate; it cannot be moved
+            moved = db.execute(text("""
+                UPDATE medications SET medicine_id = :keep
+                WHERE medicine_id = :dup
+                  AND user_id NOT IN (SELECT user_id FROM medications WHERE medicine_id = :keep)
+                RETURNING user_id
+            """), {"keep": keep, "dup": duplicate}).scalars().all()
+            touched_users.update(moved)
+            left = db.execute(text("SELECT count(*) FROM medications WHERE medicine_id = :dup"), {"dup": duplicate}).scalar()
+            if left:
+                conflicts.append((key, keep, duplicate, left))
+            else:
+                db.execute(text("DELETE FROM medicines WHERE id = :dup"), {"dup": duplicate})
+                print(f"✅ merged medicine {duplicate} into {keep} ({key[0]} {key[1]})")
+
+    # Names only lose stray whitespace, so nothing else changes for existing clients.
+    # Rows of an unmerged group are left alone: unique_medicine_strength is still in place and
+    # cleaning one of them ("Metformin " -> "Metformin") would collide with the other.
+    unmerged = {medicine_id for key, keep, duplicate, _ in conflicts for medicine_id in groups[key]}
+    for medicine_id, name, strength in db.execute(text("SELECT id, name, strength FROM medicines")).all():
+        if medicine_id in unmerged:
+            continue
+        if (clean_medicine_text(name), clean_medicine_text(strength)) != (name, strength):
+            db.execute(
+                text("UPDATE medicines SET name = :n, strength = :s WHERE id = :id"),
+                {"n": clean_medicine_text(name), "s": clean_medicine_text(strength), "id": medicine_id},
+            )
+
+    for user_id in touched_users:
+        bump_version(db, user_id, VersionedResource.MEDICATIONS)
+    db.commit()
+
+    if conflicts:
+        for (name, strength), keep, duplicate, left in conflicts:
+            print(f"⚠️ medicine {duplicate} duplicates {keep} ({name} {strength}) but {left} medication(s) still use it")
+        print("❌ Merge those users' medications, then re-run.")
+        sys.exit(1)
+
+    db.execute(text("ALTER TABLE medicines ALTER COLUMN normalized_name SET NOT NULL;"))
+    db.execute(text("ALTER TABLE medicines ALTER COLUMN normalized_strength SET NOT NULL;"))
+    db.execute(text("ALTER TABLE medicines DROP CONSTRAINT IF EXISTS unique_medicine_strength;"))
+    exists = db.execute(text("SELECT 1 FROM pg_constraint WHERE conname = 'unique_medicine_normalized'")).scalar()
+    if not exists:
+        db.execute(text(
+            "ALTER TABLE medicines ADD CONSTRAINT unique_medicine_normalized UNIQUE (normalized_name, normalized_strength);"
+        ))
+    db.commit()
+    print("✅ unique_medicine_normalized")
+finally:
+    db.close()
+
+print("Medicine normalization migration completed successfully.")
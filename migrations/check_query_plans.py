@@ -0,0 +1,131 @@
+# EXPLAIN-based regression check for the hot read queries.
+#
+# Each hot crud call is executed once while the emitted SQL is captured, then the
+# same statement is re-run under EXPLAIN with sequential scans discouraged. The
+# script exits non-zero if the planner still picks a Seq Scan, or if none of the
+# call's plans scans the index that access pattern was given. With seqscan off
+# any index passes the first test, including the pkey, so the second one is what
+# shows the composite indexes are used.
+#
+# On near-empty tables the planner picks between indexes almost at random, so run
+# it from the project root against a migrated database with realistic volumes:
+#     python -m migrations.check_query_plans
+
+import json
+import sys
+from datetime import date
+
+from sqlalchemy import event
+
+from database import engine, SessionLocal
+from models.insights import InsightPeriod
+from crud.bp_logs import get_logs_by_date_range as get_bp_logs_by_date_range
+from crud.sugar_logs import get_sugar_logs_by_date_range
+from crud.medication_logs import get_logs_by_date_range as get_med_logs_by_date_range
+from crud.messages import get_messages_page_by_chat, search_messages
+from crud.chats import get_chats_page_by_user
+from crud.insights import get_insight_by_period_and_date
+from crud.daily_adherence import get_adherence
+from crud.vitals_rollups import get_rollups
+from models.vitals_rollups import RollupGranularity
+
+USER_ID = 1
+CHAT_ID = 1
+DAY = date.today()
+
+
+# name -> (crud call, index its plan has to scan)
+HOT_QUERIES = {
+    "bp_logs by user and date range": (
+        lambda db: get_bp_logs_by_date_range(db, USER_ID, DAY, DAY), "ix_bp_logs_user_id_checked_at"),
+    "sugar_logs by user and date range": (
+        lambda db: get_sugar_logs_by_date_range(db, USER_ID, DAY, DAY), "ix_sugar_logs_user_id_checked_at"),
+    "medication_logs by user and date range": (
+        lambda db: get_med_logs_by_date_range(db, USER_ID, DAY, DAY), "ix_medication_logs_user_id_scheduled_date"),
+    "latest messages by chat": (
+        lambda db: get_messages_page_by_chat(db, CHAT_ID, None, 50), "ix_messages_chat_id_created_at_id"),
+    "message search by user": (
+        lambda db: search_messages(db, USER_ID, "blood pressure", None, 20), "ix_messages_search_vector"),
+    "latest chats by user": (
+        lambda db: get_chats_page_by_user(db, USER_ID, None, 50), "ix_chats_user_id_created_at_id"),
+    "insight by user, period and start date": (
+        lambda db: get_insight_by_period_and_date(db, USER_ID, InsightPeriod.DAILY, DAY), "unique_user_period_insight"),
+    "vitals rollups by user and range": (
+        lambda db: get_rollups(db, USER_ID, RollupGranularity.DAILY, DAY, DAY), "unique_vitals_rollup_bucket"),
+    "daily adherence by user and day range": (
+        lambda db: get_adherence(db, USER_ID, DAY, DAY, materialize=False), "unique_daily_adherence_slot"),
+}
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+def capture_statements(fn):
+    """Run fn against a fresh session and return every (statement, parameters) it emitted."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    db = SessionLocal()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        db.close()
+    return captured
+
+
+def find_seq_scans(plan_node):
+    found = []
+    if plan_node.get("Node Type") == "Seq Scan":
+        found.append(plan_node.get("Relation Name"))
+    for child in plan_node.get("Plans", []):
+        found.extend(find_seq_scans(child))
+    return found
+
+
+def find_index_scans(plan_node):
+    found = []
+    if plan_node.get("Node Type") in INDEX_SCANS:
+        found.append(plan_node.get("Index Name"))
+    for child in plan_node.get("Plans", []):
+        found.extend(find_index_scans(child))
+    return found
+
+
+def explain(statement, parameters):
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        row = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        conn.rollback()
+    plan = row if isinstance(row, list) else json.loads(row)
+    return plan[0]["Plan"]
+
+
+def main() -> int:
+    failures = []
+    for name, (fn, expected_index) in HOT_QUERIES.items():
+        seq_scans, index_scans = [], []
+        for statement, parameters in capture_statements(fn):
+            plan = explain(statement, parameters)
+            seq_scans.extend(find_seq_scans(plan))
+            index_scans.extend(find_index_scans(plan))
+        if seq_scans:
+            failures.append(name)
+            print(f"❌ {name}: sequential scan on {', '.join(seq_scans)}")
+        elif expected_index not in index_scans:
+            failures.append(name)
+            print(f"❌ {name}: {expected_index} not used (scans {', '.join(index_scans) or 'no index'})")
+        else:
+            print(f"✅ {name}: {expected_index}")
+
+    if failures:
+        print(f"{len(failures)} hot queries do not use their index.")
+        return 1
+    print("All hot queries use their index.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
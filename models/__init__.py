@@ -16,6 +16,11 @@ from .bp_logs import BloodPressureLog
 from .sugar_schedules import SugarSchedule
 from .sugar_logs import SugarLog, SugarType
 from .insights import Insight, InsightPeriod
+from .vitals_rollups import VitalsRollup, RollupGranularity, VitalMetric
+from .daily_adherence import DailyAdherence, AdherenceKind
+from .resource_versions import ResourceVersion, VersionedResource
+from .jobs import Job, JobStatus
+from .insight_batches import InsightBatch, InsightBatchItem, InsightBatchStatus, InsightBatchItemStatus
 
 # You can also define a __all__ variable to control what `from models import *` does, which is good practice.
 __all__ = [
@@ -33,4 +38,17 @@ __all__ = [
     "SugarType",
     "Insight",
     "InsightPeriod",
+    "VitalsRollup",
+    "RollupGranularity",
+    "VitalMetric",
+    "DailyAdherence",
+    "AdherenceKind",
+    "ResourceVersion",
+    "VersionedResource",
+    "Job",
+    "JobStatus",
+    "InsightBatch",
+    "InsightBatchItem",
+    "InsightBatchStatus",
+    "InsightBatchItemStatus",
 ]
\ No newline at end of file
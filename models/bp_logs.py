@@ -2,7 +2,7 @@ import enum
 from datetime import datetime, date
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, Date, Time, ForeignKey, 
-    Enum, Text, Float, CheckConstraint, UniqueConstraint
+    Enum, Text, Float, CheckConstraint, UniqueConstraint, Index
 )
 from sqlalchemy.orm import relationship
 from database import Base
@@ -12,6 +12,8 @@ class BloodPressureLog(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     schedule_id = Column(Integer, ForeignKey("bp_schedules.id"), nullable=False, index=True)
+    # Denormalized from the schedule so per-user reads don't need to join
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     systolic = Column(Integer, nullable=False)
     diastolic = Column(Integer, nullable=False)
@@ -29,6 +31,10 @@ class BloodPressureLog(Base):
         CheckConstraint("diastolic > 0 AND diastolic < 200", name="check_diastolic_range"),
         CheckConstraint("pulse IS NULL OR (pulse > 0 AND pulse < 250)", name="check_pulse_range"),
         CheckConstraint("systolic > diastolic", name="check_systolic_greater_than_diastolic"),
+        # Per-schedule range scans (alerts, reports, date queries joined through schedules)
+        Index("ix_bp_logs_schedule_id_checked_at", "schedule_id", "checked_at"),
+        # Per-user range scans without joining bp_schedules
+        Index("ix_bp_logs_user_id_checked_at", "user_id", "checked_at"),
     )
 
 # class BloodPressureLog(Base):
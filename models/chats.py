@@ -2,7 +2,7 @@ import enum
 from datetime import datetime, date
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, Date, Time, ForeignKey, 
-    Enum, Text, Float, CheckConstraint, UniqueConstraint
+    Enum, Text, Float, CheckConstraint, UniqueConstraint, Index
 )
 from sqlalchemy.orm import relationship
 from database import Base
@@ -14,6 +14,7 @@ class Chat(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     topic = Column(String, nullable=False)
     summary = Column(String, nullable=False, default="")
+    summary_message_id = Column(Integer, nullable=True)   # Last message folded into summary; newer ones go to the prompt verbatim
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -22,3 +23,7 @@ class Chat(Base):
     messages = relationship(
         "Message", back_populates="chat", cascade="all, delete-orphan"
     )
+
+    __table_args__ = (
+        Index("ix_chats_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
@@ -0,0 +1,37 @@
+import enum
+from datetime import datetime, date
+from sqlalchemy import (
+    Column, Integer, String, Boolean, DateTime, Date, Time, ForeignKey,
+    Enum, Text, Float, CheckConstraint, UniqueConstraint
+)
+from sqlalchemy.orm import relationship
+from database import Base
+
+class AdherenceKind(enum.Enum):
+    MEDICATION = "medication"           # schedule_id -> medication_schedules.id
+    BLOOD_PRESSURE = "blood_pressure"   # schedule_id -> bp_schedules.id
+    SUGAR = "sugar"                     # schedule_id -> sugar_schedules.id
+
+class DailyAdherence(Base):
+    __tablename__ = "daily_adherence"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    kind = Column(Enum(AdherenceKind), nullable=False)
+    schedule_id = Column(Integer, nullable=False)  # No FK: points at a different table per kind
+
+    scheduled_time = Column(Time, nullable=False)
+    completed = Column(Boolean, default=False, nullable=False)
+    log_id = Column(Integer, nullable=True)  # Log that satisfied the slot, if any
+    finalized = Column(Boolean, default=False, nullable=False)  # Day is over, a missing log is a miss
+
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    # Relationships
+    user = relationship("User", back_populates="daily_adherence")
+
+    __table_args__ = (
+        # Also the index for per-user reads over a day range
+        UniqueConstraint('user_id', 'day', 'kind', 'schedule_id', name='unique_daily_adherence_slot'),
+    )
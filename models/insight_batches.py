@@ -0,0 +1,65 @@
+import enum
+from datetime import datetime, date
+from sqlalchemy import (
+    Column, Integer, String, Boolean, DateTime, Date, Time, ForeignKey,
+    Enum, Text, Float, CheckConstraint, UniqueConstraint, Index
+)
+from sqlalchemy.orm import relationship
+from database import Base
+from models.insights import InsightPeriod
+
+class InsightBatchStatus(enum.Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    PARTIAL = "partial"         # Finished, but some users failed every attempt
+
+class InsightBatchItemStatus(enum.Enum):
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"           # Retried by the next run until max attempts
+    SKIPPED = "skipped"         # The insight already existed
+
+# One scheduled or backfilled insight run: a period and start date across users
+class InsightBatch(Base):
+    __tablename__ = "insight_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    period = Column(Enum(InsightPeriod), nullable=False)
+    start_date = Column(Date, nullable=False)
+    status = Column(Enum(InsightBatchStatus), default=InsightBatchStatus.RUNNING, nullable=False)
+    runs = Column(Integer, default=0, nullable=False)    # Incremented by every run/resume
+
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    items = relationship("InsightBatchItem", back_populates="batch", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        UniqueConstraint('period', 'start_date', name='unique_insight_batch_period_start'),
+    )
+
+# Per-user checkpoint inside a batch, committed as soon as that user is processed
+class InsightBatchItem(Base):
+    __tablename__ = "insight_batch_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    batch_id = Column(Integer, ForeignKey("insight_batches.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    status = Column(Enum(InsightBatchItemStatus), default=InsightBatchItemStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)   # Lease so concurrent runners don't double-generate
+    last_error = Column(Text, nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    # Relationships
+    batch = relationship("InsightBatch", back_populates="items")
+    user = relationship("User", back_populates="insight_batch_items")
+
+    __table_args__ = (
+        UniqueConstraint('batch_id', 'user_id', name='unique_insight_batch_item_user'),
+        Index("ix_insight_batch_items_batch_id_status", "batch_id", "status"),
+    )
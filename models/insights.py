@@ -36,5 +36,6 @@ class Insight(Base):
 
     __table_args__ = (
         CheckConstraint("end_date >= start_date", name="check_insight_date_order"),
+        # Also serves as the (user_id, period, start_date) lookup index for GET /insights
         UniqueConstraint('user_id', 'period', 'start_date', name='unique_user_period_insight'),
     )
\ No newline at end of file
@@ -0,0 +1,41 @@
+import enum
+from datetime import datetime, date
+from sqlalchemy import (
+    Column, Integer, String, Boolean, DateTime, Date, Time, ForeignKey,
+    Enum, Text, Float, CheckConstraint, UniqueConstraint, Index
+)
+from sqlalchemy.orm import relationship
+from database import Base
+
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"       # Out of attempts
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)                 # Key into tasks.jobs.JOB_HANDLERS
+    payload = Column(Text, nullable=True)                 # JSON string of handler kwargs
+    dedupe_key = Column(String, nullable=True)            # e.g. "generate_insights:daily:2025-01-01", enqueued at most once
+
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    run_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    locked_by = Column(String, nullable=True)             # host:pid of the worker running it
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        CheckConstraint("max_attempts > 0", name="check_job_positive_max_attempts"),
+        UniqueConstraint('dedupe_key', name='unique_job_dedupe_key'),
+        # Workers claim the oldest due job
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
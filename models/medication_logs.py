@@ -2,7 +2,7 @@ import enum
 from datetime import datetime, date
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, Date, Time, ForeignKey, 
-    Enum, Text, Float, CheckConstraint, UniqueConstraint
+    Enum, Text, Float, CheckConstraint, UniqueConstraint, Index
 )
 from sqlalchemy.orm import relationship
 from database import Base
@@ -12,6 +12,8 @@ class MedicationLog(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     medication_schedule_id = Column(Integer, ForeignKey("medication_schedules.id"), nullable=False, index=True)
+    # Denormalized from medication_schedules -> medications so per-user reads don't need to join
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     
     scheduled_date = Column(Date, nullable=False, index=True)  # Date (e.g., 2025-06-18)
 
@@ -30,4 +32,6 @@ class MedicationLog(Base):
     __table_args__ = (
         UniqueConstraint('medication_schedule_id', 'scheduled_date', 
                         name='unique_medication_schedule'),
+        # Per-user range scans without joining schedules and medications
+        Index("ix_medication_logs_user_id_scheduled_date", "user_id", "scheduled_date"),
     )
\ No newline at end of file
@@ -13,6 +13,9 @@ class Medicine(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False, index=True)
     strength = Column(String(50), nullable=False)  # e.g., "500mg", "2.5ml", "0.25mg"
+    # Dedup/search keys, see utilities.medicine_index: "Metformin " / "500 MG" -> "metformin" / "500mg"
+    normalized_name = Column(String(200), nullable=False)
+    normalized_strength = Column(String(50), nullable=False)
     
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -21,7 +24,7 @@ class Medicine(Base):
     medication_list = relationship("Medication", back_populates="medicine")
 
     __table_args__ = (
-        UniqueConstraint('name', 'strength', name='unique_medicine_strength'),
+        UniqueConstraint('normalized_name', 'normalized_strength', name='unique_medicine_normalized'),
         CheckConstraint("LENGTH(name) > 0", name="check_medicine_name_not_empty"),
         CheckConstraint("LENGTH(strength) > 0", name="check_strength_not_empty"),
     )
\ No newline at end of file
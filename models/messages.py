@@ -2,9 +2,10 @@ import enum
 from datetime import datetime, date
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, Date, Time, ForeignKey, 
-    Enum, Text, Float, CheckConstraint, UniqueConstraint
+    Enum, Text, Float, CheckConstraint, UniqueConstraint, Index, Computed
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from database import Base
 
 class Message(Base):
@@ -16,5 +17,21 @@ class Message(Base):
     response = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), default=datetime.now)
     updated_at = Column(DateTime(timezone=True), default=datetime.now, onupdate=datetime.now)
+    # Maintained by Postgres on every insert/update; deferred so normal message reads never load it
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(request, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(response, '')), 'B')",
+            persisted=True,
+        ),
+    ))
 
     chat = relationship("Chat", back_populates="messages")
+
+    __table_args__ = (
+        # Keyset pages of a chat read (created_at, id) straight off this index
+        Index("ix_messages_chat_id_created_at_id", "chat_id", "created_at", "id"),
+        # GET /messages/search matches against this
+        Index("ix_messages_search_vector", "search_vector", postgresql_using="gin"),
+    )
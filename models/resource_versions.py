@@ -0,0 +1,31 @@
+import enum
+from datetime import datetime, date
+from sqlalchemy import (
+    Column, Integer, String, Boolean, DateTime, Date, Time, ForeignKey,
+    Enum, Text, Float, CheckConstraint, UniqueConstraint
+)
+from sqlalchemy.orm import relationship
+from database import Base
+
+class VersionedResource(enum.Enum):
+    MEDICATIONS = "medications"     # Medications and their schedules
+    BP_LOGS = "bp_logs"             # BP logs and schedules (schedules are embedded in log responses)
+    SUGAR_LOGS = "sugar_logs"       # Sugar logs and schedules
+    INSIGHTS = "insights"
+
+class ResourceVersion(Base):
+    __tablename__ = "resource_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    resource = Column(Enum(VersionedResource), nullable=False)
+    version = Column(Integer, default=1, nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    # Relationships
+    user = relationship("User", back_populates="resource_versions")
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'resource', name='unique_resource_version'),
+    )
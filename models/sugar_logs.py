@@ -2,7 +2,7 @@ import enum
 from datetime import datetime, date
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, Date, Time, ForeignKey, 
-    Enum, Text, Float, CheckConstraint, UniqueConstraint
+    Enum, Text, Float, CheckConstraint, UniqueConstraint, Index
 )
 from sqlalchemy.orm import relationship
 from database import Base
@@ -19,6 +19,8 @@ class SugarLog(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     schedule_id = Column(Integer, ForeignKey("sugar_schedules.id"), nullable=True, index=True)
+    # Denormalized from the schedule so per-user reads don't need to join
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     value = Column(Float, nullable=False)
     type = Column(Enum(SugarType), nullable=False)
@@ -32,4 +34,8 @@ class SugarLog(Base):
 
     __table_args__ = (
         CheckConstraint("value > 0 AND value < 1000", name="check_sugar_value_range"),
+        # Per-schedule range scans (alerts, reports, date queries joined through schedules)
+        Index("ix_sugar_logs_schedule_id_checked_at", "schedule_id", "checked_at"),
+        # Per-user range scans without joining sugar_schedules
+        Index("ix_sugar_logs_user_id_checked_at", "user_id", "checked_at"),
     )
\ No newline at end of file
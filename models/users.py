@@ -52,6 +52,10 @@ class User(Base):
     # sugar_logs = relationship("SugarLog", back_populates="user", cascade="all, delete-orphan")
     insights = relationship("Insight", back_populates="user", cascade="all, delete-orphan")
     chats = relationship("Chat", back_populates="user", cascade="all, delete-orphan")
+    vitals_rollups = relationship("VitalsRollup", back_populates="user", cascade="all, delete-orphan")
+    daily_adherence = relationship("DailyAdherence", back_populates="user", cascade="all, delete-orphan")
+    resource_versions = relationship("ResourceVersion", back_populates="user", cascade="all, delete-orphan")
+    insight_batch_items = relationship("InsightBatchItem", back_populates="user", cascade="all, delete-orphan")
 
     __table_args__ = (
         CheckConstraint("LENGTH(name) > 0", name="check_name_not_empty"),
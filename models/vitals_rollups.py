@@ -0,0 +1,51 @@
+import enum
+from datetime import datetime, date
+from sqlalchemy import (
+    Column, Integer, String, Boolean, DateTime, Date, Time, ForeignKey,
+    Enum, Text, Float, CheckConstraint, UniqueConstraint
+)
+from sqlalchemy.orm import relationship
+from database import Base
+
+class RollupGranularity(enum.Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"     # Buckets start on Monday
+
+class VitalMetric(enum.Enum):
+    SYSTOLIC = "systolic"
+    DIASTOLIC = "diastolic"
+    PULSE = "pulse"
+    SUGAR_FASTING = "sugar_fasting"
+    SUGAR_RANDOM = "sugar_random"
+
+class VitalsRollup(Base):
+    __tablename__ = "vitals_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    granularity = Column(Enum(RollupGranularity), nullable=False)
+    bucket_start = Column(Date, nullable=False)
+    metric = Column(Enum(VitalMetric), nullable=False)
+
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    sum_value = Column(Float, nullable=False)
+    count = Column(Integer, nullable=False)
+    last_value = Column(Float, nullable=False)
+    last_checked_at = Column(DateTime(timezone=True), nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    # Relationships
+    user = relationship("User", back_populates="vitals_rollups")
+
+    @property
+    def mean_value(self) -> float:
+        return self.sum_value / self.count if self.count else 0.0
+
+    __table_args__ = (
+        CheckConstraint("count > 0", name="check_rollup_positive_count"),
+        # Also the index for per-user trend reads over a bucket_start range
+        UniqueConstraint('user_id', 'granularity', 'bucket_start', 'metric', name='unique_vitals_rollup_bucket'),
+    )
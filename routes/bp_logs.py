@@ -9,22 +9,41 @@ from schemas.bp_logs import (
     BloodPressureLogCreate,
     BloodPressureLogUpdate,
     BloodPressureLogOut,
+    BloodPressureLogLean,
+    BloodPressureLogPage,
+    BloodPressureLogBulkItem,
 )
+from schemas.bulk_logs import BulkLogResponse, MAX_BULK_LOGS
 from crud.bp_logs import (
     get_active_schedule,
     create_bp_log,
+    create_bp_logs_bulk,
     update_bp_log,
     delete_bp_log,
     get_log_by_id,
     get_logs_by_schedule_id,
-    get_logs_by_user_id,
+    get_logs_page_by_user_id,
     get_logs_by_date_range,
     get_logs_by_date
 )
 from models.users import User
+from models.resource_versions import VersionedResource
+from utilities.etag import etag_guard
+from utilities.pagination import parse_fields
 
 router = APIRouter()
 
+LEAN_FIELDS = list(BloodPressureLogLean.model_fields)
+
+
+@router.post("/bulk", response_model=BulkLogResponse)
+def create_logs_bulk(items: List[BloodPressureLogBulkItem], db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """Ingest an array of readings (offline sync, device memory dumps) with per-item results."""
+    if not items or len(items) > MAX_BULK_LOGS:
+        raise HTTPException(status_code=400, detail=f"Provide between 1 and {MAX_BULK_LOGS} readings.")
+    results = create_bp_logs_bulk(db, current_user.id, items)
+    return BulkLogResponse(created=sum(r.status == "created" for r in results), results=results)
+
 
 @router.post("/{schedule_id}", response_model=BloodPressureLogOut, status_code=status.HTTP_201_CREATED)
 def create_log(schedule_id: int, data: BloodPressureLogCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -62,12 +81,23 @@ def get_logs_by_schedule(schedule_id: int, db: Session = Depends(get_db), curren
     return get_logs_by_schedule_id(db, schedule_id)
 
 
-@router.get("/user", response_model=List[BloodPressureLogOut])
-def get_logs_by_user(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return get_logs_by_user_id(db, current_user.id)
+@router.get("/user", response_model=BloodPressureLogPage, response_model_exclude_unset=True)
+def get_logs_by_user(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. systolic,diastolic,checked_at"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    selected = parse_fields(fields, LEAN_FIELDS)
+    rows, next_cursor = get_logs_page_by_user_id(db, current_user.id, selected, cursor, limit)
+    return BloodPressureLogPage(
+        items=[BloodPressureLogLean(**{f: getattr(row, f) for f in ["id", *selected]}) for row in rows],
+        next_cursor=next_cursor,
+    )
 
 
-@router.get("/date", response_model=List[BloodPressureLogOut])
+@router.get("/date", response_model=List[BloodPressureLogOut], dependencies=[Depends(etag_guard(VersionedResource.BP_LOGS))])
 def get_logs_by_date_or_range(
     date_from: Optional[date] = Query(None),
     date_to: Optional[date] = Query(None),
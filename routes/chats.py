@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from database import get_db
 from crud.chats import (
@@ -6,9 +7,9 @@ from crud.chats import (
     get_chat,
     update_chat,
     delete_chat,
-    get_chats_by_user,
+    get_chats_page_by_user,
 )
-from schemas.chats import ChatCreate, ChatUpdate, ChatResponse
+from schemas.chats import ChatCreate, ChatUpdate, ChatResponse, ChatPage
 from middlewares.auth import get_current_user
 from models.users import User
 
@@ -79,12 +80,14 @@ def delete_existing_chat(
     return {"message": "Chat deleted successfully"}
 
 
-@router.get("", response_model=list[ChatResponse])
+@router.get("", response_model=ChatPage)
 def fetch_chats(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
 ):
-    """Get all chats corresponding to a user ID."""
-    chats = get_chats_by_user(db, current_user.id)
-    if not chats:
+    """Get the user's chats, newest first, one page at a time."""
+    chats, next_cursor = get_chats_page_by_user(db, current_user.id, cursor, limit)
+    if not chats and cursor is None:
         raise HTTPException(status_code=404, detail="No chats found for this user")
-    return chats
+    return ChatPage(items=chats, next_cursor=next_cursor)
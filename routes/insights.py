@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Response, status
 from sqlalchemy.orm import Session
 from database import get_db
 from utilities.insight_generator import generate_insight
@@ -7,8 +7,17 @@ from middlewares.auth import get_current_user
 from models.users import User
 from crud.insights import get_insight_by_period_and_date
 from models.insights import InsightPeriod
+from models.resource_versions import VersionedResource
+from utilities.etag import etag_guard
 from tasks.scheduler import generate_insights
-from utilities.insight_generator import generate_and_save_insight
+from utilities.insight_generator import get_or_generate_insight, InsightInProgress
+from config import settings
+from crud.jobs import get_user_job
+from models.jobs import JobStatus
+from tasks.on_demand_insights import request_insight, run_insight_job, insight_job_status
+
+# Suggested delay between status polls while an insight is generated in the background
+INSIGHT_POLL_SECONDS = 3
 
 router = APIRouter()
 
@@ -18,20 +27,56 @@ def generate_insight_route(
 ):
     generate_insights(period)
 
-@router.get("")
+@router.get("", dependencies=[Depends(etag_guard(VersionedResource.INSIGHTS, daily=True))])
 def get_insight_route(
+    response: Response,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     period: InsightPeriod = Query(InsightPeriod.DAILY, description="Insight period: daily, weekly, or monthly"),
     start_date: date = Query((date.today() - timedelta(days=1)), description="Start date for the insight period (defaults to yesterday)")
 ):
-    insight_data = get_insight_by_period_and_date(db, current_user.id, period, start_date)
-    if not insight_data:
-        insight_data = generate_and_save_insight(db, current_user.id, period, start_date)
+    if settings.INSIGHT_ON_DEMAND == "async":
+        insight_data = get_insight_by_period_and_date(db, current_user.id, period, start_date)
+        if not insight_data:
+            # Never wait on Gemini here: queue the generation and let the client poll for it
+            job = request_insight(db, current_user.id, period, start_date)
+            if job.status == JobStatus.QUEUED and settings.JOB_BACKEND != "database":
+                background_tasks.add_task(run_insight_job, job.id)
+            del response.headers["ETag"]
+            response.status_code = status.HTTP_202_ACCEPTED
+            response.headers["Location"] = f"/insights/jobs/{job.id}"
+            response.headers["Retry-After"] = str(INSIGHT_POLL_SECONDS)
+            return {"success": True, "pending": True, **insight_job_status(db, job)}
+        return {"success": True, "insight": insight_data}
+
+    # Parallel requests for a missing insight wait on a single generation
+    try:
+        insight_data = get_or_generate_insight(db, current_user.id, period, start_date)
+    except InsightInProgress:
+        # Another worker is on it; come back for the saved insight instead of holding this request open
+        del response.headers["ETag"]
+        response.status_code = status.HTTP_202_ACCEPTED
+        response.headers["Retry-After"] = str(INSIGHT_POLL_SECONDS)
+        return {"success": True, "pending": True}
     if not insight_data:
+        # Don't let clients cache a failure; a later request may succeed
+        del response.headers["ETag"]
         return {"success": False, "error": "Could not generate insight (no data)."}
     return {"success": True, "insight": insight_data}
 
+@router.get("/jobs/{job_id}")
+def get_insight_job_route(
+    job_id: int,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    job = get_user_job(db, job_id, current_user.id)
+    if job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+        response.headers["Retry-After"] = str(INSIGHT_POLL_SECONDS)
+    return insight_job_status(db, job)
+
 # @router.post("")
 # def generate_insight_route(
 #     db: Session = Depends(get_db),
@@ -4,10 +4,15 @@ from database import get_db
 from schemas.medication_logs import (
     MedicationLogCreate,
     MedicationLogUpdate,
-    MedicationLogResponse
+    MedicationLogResponse,
+    MedicationLogLean,
+    MedicationLogPage,
+    MedicationLogBulkItem,
 )
+from schemas.bulk_logs import BulkLogResponse, MAX_BULK_LOGS
 from crud.medication_logs import (
     create_log,
+    create_logs_bulk,
     get_log_if_owned,
     get_logs_by_schedule_id,
     update_log,
@@ -15,22 +20,45 @@ from crud.medication_logs import (
     get_logs_by_date,
     get_logs_by_date_range,
     get_logs_by_medicine,
-    get_logs_by_user
+    get_logs_page_by_user,
 )
 from typing import List, Optional
 from models import User
 from middlewares.auth import get_current_user
 from datetime import date
+from utilities.pagination import parse_fields
 
 router = APIRouter()
 
-@router.get("/logs/user", response_model=List[MedicationLogResponse])
+LEAN_FIELDS = list(MedicationLogLean.model_fields)
+
+@router.get("/logs/user", response_model=MedicationLogPage, response_model_exclude_unset=True)
 def list_user_logs(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. scheduled_date,taken_at"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return get_logs_by_user(db, current_user.id)
+    selected = parse_fields(fields, LEAN_FIELDS)
+    rows, next_cursor = get_logs_page_by_user(db, current_user.id, selected, cursor, limit)
+    return MedicationLogPage(
+        items=[MedicationLogLean(**{f: getattr(row, f) for f in ["id", *selected]}) for row in rows],
+        next_cursor=next_cursor,
+    )
+
 
+@router.post("/bulk", response_model=BulkLogResponse)
+def create_medication_logs_bulk(
+    items: List[MedicationLogBulkItem],
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Ingest an array of logs (offline sync) with per-item results; existing schedule/date pairs are reported as duplicates."""
+    if not items or len(items) > MAX_BULK_LOGS:
+        raise HTTPException(status_code=400, detail=f"Provide between 1 and {MAX_BULK_LOGS} logs.")
+    results = create_logs_bulk(db, items, current_user.id)
+    return BulkLogResponse(created=sum(r.status == "created" for r in results), results=results)
 
 @router.post("/{schedule_id}", response_model=MedicationLogResponse, status_code=status.HTTP_201_CREATED)
 def create_medication_log(
@@ -6,6 +6,8 @@ from middlewares.auth import get_current_user
 from models.medication_schedules import MedicationSchedule
 from models.medications import Medication
 from models.users import User
+from models.resource_versions import VersionedResource
+from utilities.etag import etag_guard
 from crud.medication_schedules import (
     get_schedules_for_medication,
     create_medication_schedule,
@@ -33,7 +35,7 @@ def list_schedules_for_medication(
         raise HTTPException(status_code=404, detail="Medication not found.")
     return get_schedules_for_medication(db, medication_id)
 
-@router.get("", response_model=List[MedicationScheduleResponse])
+@router.get("", response_model=List[MedicationScheduleResponse], dependencies=[Depends(etag_guard(VersionedResource.MEDICATIONS))])
 def list_schedules_for_user(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
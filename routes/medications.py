@@ -16,6 +16,8 @@ from schemas.medications import (
     MedicationUpdate
 )
 from models.users import User
+from models.resource_versions import VersionedResource
+from utilities.etag import etag_guard
 
 router = APIRouter()
 
@@ -48,7 +50,7 @@ def count_user_medications(db: Session = Depends(get_db), current_user=Depends(g
     return {"active_count": active_count}
 
 
-@router.get("", response_model=List[MedicationResponse])
+@router.get("", response_model=List[MedicationResponse], dependencies=[Depends(etag_guard(VersionedResource.MEDICATIONS))])
 def list_user_medications(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
     """List all medications for the current user."""
     medications = get_user_medications(db, current_user.id)
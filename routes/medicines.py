@@ -1,5 +1,5 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from database import get_db
 
@@ -8,6 +8,7 @@ from models.medicines import Medicine
 from crud.medicines import (
     get_medicine_by_medicine_id,
     get_medicines,
+    search_medicines,
     create_medicine
 )
 from schemas.medicines import (
@@ -28,6 +29,21 @@ def list_medicines(db: Session = Depends(get_db), _: User = Depends(get_current_
     return result
 
 
+# Declared before /{medicine_id} so "search" is not taken for a medicine id
+@router.get("/search", response_model=List[MedicineResponse])
+def search_medicine_catalog(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    """Typeahead: medicines whose name (or any word in it) starts with `q`."""
+    return [
+        MedicineResponse(id=medicine_id, name=name, strength=strength)
+        for medicine_id, name, strength in search_medicines(db, q, limit)
+    ]
+
+
 @router.get("/{medicine_id}", response_model=MedicineResponse)
 def get_medicine_by_id(medicine_id: int, db: Session = Depends(get_db), _: User = Depends(get_current_user)):
     """Get a specific medicine by its ID."""
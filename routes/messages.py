@@ -3,13 +3,12 @@ from database import get_db
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
 
 from models.chats import Chat
 from crud.chats import (
     get_chat,
-    get_chat_summary,
-    set_chat_summary,
 )
 
 from models.users import User
@@ -18,14 +17,18 @@ from middlewares.auth import get_current_user
 from schemas.messages import (
     MessageCreate,
     MessageResponse,
+    MessagePage,
+    MessageSearchPage,
+    MessageSearchResult,
     Regenerate_Message,
 )
 from crud.messages import (
     get_message,
-    get_summary,
+    get_chat_context,
     delete_message,
     delete_last_message,
-    get_messages_by_chat,
+    get_messages_page_by_chat,
+    search_messages,
     create_message_with_ai,
     get_last_user_message_by_chat,
 )
@@ -87,11 +90,11 @@ def send_message_regenerate(
         )
 
     request_text = get_last_user_message_by_chat(db, chat.id)
-    message_context = get_chat_summary(db, chat.id)
 
     _validate_request(current_user, request_text)
 
     delete_last_message(db, chat.id)
+    message_context = get_chat_context(db, chat.id)
 
     return _generate_response(
         db,
@@ -114,8 +117,7 @@ def send_message(
     chat_id = message_data.chat_id
 
     if chat_id:
-        message_context = get_summary(db, chat_id)
-        set_chat_summary(db, chat_id, message_context)
+        message_context = get_chat_context(db, chat_id)
 
     if not chat_id:
         new_chat = Chat(
@@ -149,6 +151,23 @@ def send_message(
     return response
 
 
+# Declared before /{message_id} so "search" is not taken for a message id
+@router.get("/search", response_model=MessageSearchPage)
+def search_chat_history(
+    q: str = Query(..., min_length=1, max_length=200, description='Words, "quoted phrases" and -excluded words'),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    results, next_cursor = search_messages(db, current_user.id, q, cursor, limit)
+    items = [
+        MessageSearchResult(**MessageResponse.model_validate(message).model_dump(), rank=rank, snippet=snippet)
+        for message, rank, snippet in results
+    ]
+    return MessageSearchPage(items=items, next_cursor=next_cursor)
+
+
 @router.get("/{message_id}", response_model=MessageResponse)
 def read_message(
     message_id: int,
@@ -194,9 +213,11 @@ def delete_existing_message(
     return {"message": "Message deleted successfully"}
 
 
-@router.get("/chat/{chat_id}", response_model=list[MessageResponse])
+@router.get("/chat/{chat_id}", response_model=MessagePage)
 def fetch_messages(
     chat_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (older messages)"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -207,7 +228,7 @@ def fetch_messages(
         raise HTTPException(
             status_code=403, detail="Not authorized to access this chat"
         )
-    messages = get_messages_by_chat(db, chat_id)
-    if not messages:
+    messages, next_cursor = get_messages_page_by_chat(db, chat_id, cursor, limit)
+    if not messages and cursor is None:
         raise HTTPException(status_code=404, detail="No messages found for this chat")
-    return messages
+    return MessagePage(items=messages, next_cursor=next_cursor)
@@ -4,14 +4,13 @@ from database import get_db
 from datetime import date, datetime, timedelta, time
 from middlewares.auth import get_current_user
 from models.users import User
-from models.medications import Medication
-from models.medication_schedules import MedicationSchedule
-from models.medication_logs import MedicationLog
-from models.bp_schedules import BloodPressureSchedule
 from models.bp_logs import BloodPressureLog
-from models.sugar_schedules import SugarSchedule
 from models.sugar_logs import SugarLog
 from models.insights import InsightPeriod
+from models.vitals_rollups import RollupGranularity, VitalMetric
+from crud.vitals_rollups import get_rollups
+from models.daily_adherence import AdherenceKind
+from crud.daily_adherence import get_adherence, summarize_adherence
 from typing import List, Dict, Any
 import io
 import matplotlib
@@ -29,64 +28,6 @@ def daterange(start_date, end_date):
     for n in range(int((end_date - start_date).days) + 1):
         yield start_date + timedelta(n)
 
-def calculate_medication_adherence(schedules, logs, start_date, end_date, log_date_field, schedule_id_field):
-    """Calculate adherence based on schedules and logs"""
-    total = 0
-    adhered = 0
-    
-    # Create a lookup for logs by (day, schedule_id)
-    logs_by_day_sched = {}
-    for log in logs:
-        log_date = getattr(log, log_date_field)
-        if isinstance(log_date, datetime):
-            log_day = log_date.date()
-        else:
-            log_day = log_date
-        schedule_id = getattr(log, schedule_id_field)
-        logs_by_day_sched[(log_day, schedule_id)] = log
-    
-    # Check each schedule for each day in the period
-    for sched in schedules:
-        day = start_date
-        while day <= end_date:
-            # Check if schedule is active on this day
-            if sched.medication.start_date.date() <= day and (not sched.medication.end_date or sched.medication.end_date.date() >= day):
-                total += 1
-                if (day, sched.id) in logs_by_day_sched:
-                    adhered += 1
-            day += timedelta(days=1)
-    
-    return adhered, total
-
-def calculate_adherence(schedules, logs, start_date, end_date, log_date_field, schedule_id_field):
-    """Calculate adherence based on schedules and logs"""
-    total = 0
-    adhered = 0
-    
-    # Create a lookup for logs by (day, schedule_id)
-    logs_by_day_sched = {}
-    for log in logs:
-        log_date = getattr(log, log_date_field)
-        if isinstance(log_date, datetime):
-            log_day = log_date.date()
-        else:
-            log_day = log_date
-        schedule_id = getattr(log, schedule_id_field)
-        logs_by_day_sched[(log_day, schedule_id)] = log
-    
-    # Check each schedule for each day in the period
-    for sched in schedules:
-        day = start_date
-        while day <= end_date:
-            # Check if schedule is active on this day
-            if sched.start_date <= day and (not sched.end_date or sched.end_date >= day):
-                total += 1
-                if (day, sched.id) in logs_by_day_sched:
-                    adhered += 1
-            day += timedelta(days=1)
-    
-    return adhered, total
-
 def plot_bp_chart(bp_logs):
     """Create a blood pressure chart with both systolic and diastolic, avoiding vertical lines from duplicate timestamps."""
     import matplotlib.pyplot as plt
@@ -174,6 +115,67 @@ def plot_sugar_chart(sugar_logs):
     buf.seek(0)
     return buf
 
+BP_METRICS = [VitalMetric.SYSTOLIC, VitalMetric.DIASTOLIC]
+SUGAR_METRICS = [VitalMetric.SUGAR_FASTING, VitalMetric.SUGAR_RANDOM]
+
+def plot_bp_trend_chart(rollups):
+    """Blood pressure trend from daily rollups: one averaged point per day."""
+    import matplotlib.dates as mdates
+
+    plt.figure(figsize=(10, 4))
+
+    if rollups:
+        series = {metric: [r for r in rollups if r.metric == metric] for metric in BP_METRICS}
+        systolic, diastolic = series[VitalMetric.SYSTOLIC], series[VitalMetric.DIASTOLIC]
+        plt.plot([r.bucket_start for r in systolic], [r.mean_value for r in systolic], marker='o', label='Systolic', linewidth=2, markersize=4, color='#ff7f0e')  # Orange
+        plt.plot([r.bucket_start for r in diastolic], [r.mean_value for r in diastolic], marker='s', label='Diastolic', linewidth=2, markersize=4, color='#2ca02c')  # Green
+        plt.legend()
+
+        plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+        plt.gca().xaxis.set_major_locator(mdates.DayLocator(interval=1))
+
+    plt.xlabel('Date')
+    plt.ylabel('Blood Pressure (mmHg)')
+    plt.title('Blood Pressure Trend')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+
+    buf = io.BytesIO()
+    plt.savefig(buf, format='png', dpi=150)
+    plt.close()
+    buf.seek(0)
+    return buf
+
+def plot_sugar_trend_chart(rollups):
+    """Sugar trend from daily rollups, one line per sugar type."""
+    import matplotlib.dates as mdates
+
+    plt.figure(figsize=(10, 4))
+
+    sugar_colors = ['#1f77b4', '#ff7f0e']
+    for idx, metric in enumerate(SUGAR_METRICS):
+        points = [r for r in rollups if r.metric == metric]
+        if not points:
+            continue
+        label = metric.name.replace("SUGAR_", "")
+        plt.plot([r.bucket_start for r in points], [r.mean_value for r in points], marker='o', linewidth=2, markersize=4, label=label, color=sugar_colors[idx])
+
+    plt.xlabel("Date")
+    plt.ylabel("Sugar Level (mg/dL)")
+    plt.title("Blood Sugar Trend")
+    if rollups:
+        plt.legend()
+    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+    plt.gca().xaxis.set_major_locator(mdates.DayLocator(interval=1))
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+
+    buf = io.BytesIO()
+    plt.savefig(buf, format='png', dpi=150)
+    plt.close()
+    buf.seek(0)
+    return buf
+
 
 def plot_adherence_chart(dates, adherence_percents):
     """Create an adherence bar chart with vertical bars"""
@@ -388,112 +390,45 @@ def generate_report(
         if end_date > today:
             end_date = today
 
-    # 2. Query schedules and logs - Fixed to match alerts.py schema
-    
-    # Medication data
-    medications = db.query(Medication).filter(
-        Medication.user_id == current_user.id, 
-        Medication.is_active == True
-    ).all()
-    
-    med_schedules = []
-    med_logs = []
-    for med in medications:
-        for sched in med.schedules:
-            med_schedules.append(sched)
-            # Get logs for this schedule in the date range
-            sched_logs = db.query(MedicationLog).filter(
-                MedicationLog.medication_schedule_id == sched.id,
-                MedicationLog.scheduled_date >= start_date,
-                MedicationLog.scheduled_date <= end_date
-            ).all()
-            med_logs.extend(sched_logs)
-
-    # Blood Pressure data
-    bp_schedules = db.query(BloodPressureSchedule).filter(
-        BloodPressureSchedule.user_id == current_user.id, 
-        BloodPressureSchedule.is_active == True
-    ).all()
-    
-    bp_logs = db.query(BloodPressureLog).join(BloodPressureSchedule).filter(
-    BloodPressureSchedule.user_id == current_user.id,
-    BloodPressureLog.checked_at >= datetime.combine(start_date, time.min),
-    BloodPressureLog.checked_at <= datetime.combine(end_date, time.max)
+    # 2. Query logs for the PDF tables and single-day charts
+    bp_logs = db.query(BloodPressureLog).filter(
+        BloodPressureLog.user_id == current_user.id,
+        BloodPressureLog.checked_at >= datetime.combine(start_date, time.min),
+        BloodPressureLog.checked_at <= datetime.combine(end_date, time.max)
     ).all()
 
-    # Sugar data
-    sugar_schedules = db.query(SugarSchedule).filter(
-        SugarSchedule.user_id == current_user.id, 
-        SugarSchedule.is_active == True
-    ).all()
-    
-    sugar_logs = db.query(SugarLog).join(SugarSchedule).filter(
-    SugarSchedule.user_id == current_user.id,
-    SugarLog.checked_at >= datetime.combine(start_date, time.min),
-    SugarLog.checked_at <= datetime.combine(end_date, time.max)
+    sugar_logs = db.query(SugarLog).filter(
+        SugarLog.user_id == current_user.id,
+        SugarLog.checked_at >= datetime.combine(start_date, time.min),
+        SugarLog.checked_at <= datetime.combine(end_date, time.max)
     ).all()
 
-    # 3. Calculate adherence
-    med_adhered, med_total = calculate_medication_adherence(
-        med_schedules, med_logs, start_date, end_date, "scheduled_date", "medication_schedule_id"
-    )
-    bp_adhered, bp_total = calculate_adherence(
-        bp_schedules, bp_logs, start_date, end_date, "checked_at", "schedule_id"
-    )
-    sugar_adhered, sugar_total = calculate_adherence(
-        sugar_schedules, sugar_logs, start_date, end_date, "checked_at", "schedule_id"
-    )
-    
-    total = med_total + bp_total + sugar_total
-    adhered = med_adhered + bp_adhered + sugar_adhered
+    # 3. Read the materialized adherence rows for the range
+    summary = summarize_adherence(get_adherence(db, current_user.id, start_date, end_date))
+    total, adhered = summary["scheduled"], summary["completed"]
     adherence_percent = (adhered / total * 100) if total > 0 else 0
 
     # 4. Prepare data for daily adherence chart
-    days = list(daterange(start_date, end_date))
     adherence_per_day = []
-    
-    for day in days:
-        day_total = 0
-        day_adhered = 0
-        
-        # Check medication adherence for this day
-        for med in medications:
-            for sched in med.schedules:
-                if med.start_date.date() <= day and (not med.end_date or med.end_date.date() >= day):
-                    day_total += 1
-                    log = next((log for log in med_logs 
-                              if log.scheduled_date == day and log.medication_schedule_id == sched.id), None)
-                    if log and log.taken_at:
-                        day_adhered += 1
-        
-        # Check BP adherence for this day
-        for sched in bp_schedules:
-            if sched.start_date <= day and (not sched.end_date or sched.end_date >= day):
-                day_total += 1
-                log = next((log for log in bp_logs 
-                          if log.checked_at.date() == day and log.schedule_id == sched.id), None)
-                if log:
-                    day_adhered += 1
-        
-        # Check sugar adherence for this day
-        for sched in sugar_schedules:
-            if sched.start_date <= day and (not sched.end_date or sched.end_date >= day):
-                day_total += 1
-                log = next((log for log in sugar_logs 
-                          if log.checked_at.date() == day and log.schedule_id == sched.id), None)
-                if log:
-                    day_adhered += 1
-        
-        day_adherence = (day_adhered / day_total * 100) if day_total > 0 else 0
+    for day in daterange(start_date, end_date):
+        day_totals = summary["by_day"].get(day, {"scheduled": 0, "completed": 0})
+        day_adherence = (day_totals["completed"] / day_totals["scheduled"] * 100) if day_totals["scheduled"] > 0 else 0
         adherence_per_day.append((day, day_adherence))
 
     # 5. Generate charts
     try:
-        # BP chart
-        bp_chart = plot_bp_chart(bp_logs)
-        
-        # Sugar chart
-        sugar_chart = plot_sugar_chart(sugar_logs)
+        if period == InsightPeriod.DAILY:
+            # Single day: plot the individual readings
+            bp_chart = plot_bp_chart(bp_logs)
+            sugar_chart = plot_sugar_chart(sugar_logs)
+        else:
+            # Multi-day: plot the daily rollups instead of re-aggregating raw logs
+            bp_chart = plot_bp_trend_chart(
+                get_rollups(db, current_user.id, RollupGranularity.DAILY, start_date, end_date, BP_METRICS)
+            )
+            sugar_chart = plot_sugar_trend_chart(
+                get_rollups(db, current_user.id, RollupGranularity.DAILY, start_date, end_date, SUGAR_METRICS)
+            )
         
         # Adherence chart
         adherence_chart = plot_adherence_chart(
@@ -531,6 +466,40 @@ def generate_report(
     except Exception as e:
         return {"success": False, "error": f"Error generating report: {str(e)}"}
 
+@router.get("/trends")
+def get_vitals_trends(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    granularity: RollupGranularity = Query(RollupGranularity.DAILY, description="Bucket size: daily or weekly"),
+    start_date: date = Query(None, description="Defaults to 29 days before end_date"),
+    end_date: date = Query(None, description="Defaults to today")
+):
+    """Return min/max/mean/count/last per vital metric for each bucket, read from the rollup table."""
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=29)
+    if start_date > end_date:
+        return {"success": False, "error": "start_date must be on or before end_date."}
+
+    trends: Dict[str, List[Dict[str, Any]]] = {metric.value: [] for metric in VitalMetric}
+    for rollup in get_rollups(db, current_user.id, granularity, start_date, end_date):
+        trends[rollup.metric.value].append({
+            "bucket_start": rollup.bucket_start,
+            "min": rollup.min_value,
+            "max": rollup.max_value,
+            "mean": round(rollup.mean_value, 2),
+            "count": rollup.count,
+            "last": rollup.last_value,
+            "last_checked_at": rollup.last_checked_at,
+        })
+
+    return {
+        "success": True,
+        "granularity": granularity.value,
+        "start_date": start_date,
+        "end_date": end_date,
+        "trends": trends
+    }
+
 @router.get("/adherence")
 def get_adherence_summary(
     db: Session = Depends(get_db),
@@ -574,103 +543,22 @@ def get_adherence_summary(
         if end_date > today:
             end_date = today
 
-    # 2. Query schedules and logs
-    medications = db.query(Medication).filter(
-        Medication.user_id == current_user.id,
-        Medication.is_active == True
-    ).all()
-
-    med_schedules = []
-    med_logs = []
-    for med in medications:
-        for sched in med.schedules:
-            med_schedules.append(sched)
-            sched_logs = db.query(MedicationLog).filter(
-                MedicationLog.medication_schedule_id == sched.id,
-                MedicationLog.scheduled_date >= start_date,
-                MedicationLog.scheduled_date <= end_date
-            ).all()
-            med_logs.extend(sched_logs)
-
-    bp_schedules = db.query(BloodPressureSchedule).filter(
-        BloodPressureSchedule.user_id == current_user.id,
-        BloodPressureSchedule.is_active == True
-    ).all()
-
-    bp_logs = db.query(BloodPressureLog).join(BloodPressureSchedule).filter(
-        BloodPressureSchedule.user_id == current_user.id,
-        BloodPressureLog.checked_at >= datetime.combine(start_date, time.min),
-        BloodPressureLog.checked_at <= datetime.combine(end_date, time.max)
-    ).all()
-
-    sugar_schedules = db.query(SugarSchedule).filter(
-        SugarSchedule.user_id == current_user.id,
-        SugarSchedule.is_active == True
-    ).all()
-
-    sugar_logs = db.query(SugarLog).join(SugarSchedule).filter(
-        SugarSchedule.user_id == current_user.id,
-        SugarLog.checked_at >= datetime.combine(start_date, time.min),
-        SugarLog.checked_at <= datetime.combine(end_date, time.max)
-    ).all()
-
-    # 3. Calculate overall adherence
-    med_adhered, med_total = calculate_medication_adherence(
-        med_schedules, med_logs, start_date, end_date, "scheduled_date", "medication_schedule_id"
-    )
-    bp_adhered, bp_total = calculate_adherence(
-        bp_schedules, bp_logs, start_date, end_date, "checked_at", "schedule_id"
-    )
-    sugar_adhered, sugar_total = calculate_adherence(
-        sugar_schedules, sugar_logs, start_date, end_date, "checked_at", "schedule_id"
-    )
-
-    total = med_total + bp_total + sugar_total
-    adhered = med_adhered + bp_adhered + sugar_adhered
+    # 2. Read the materialized adherence rows for the range
+    summary = summarize_adherence(get_adherence(db, current_user.id, start_date, end_date))
+    total, adhered = summary["scheduled"], summary["completed"]
     adherence_percent = (adhered / total * 100) if total > 0 else 0
+    by_kind = summary["by_kind"]
 
-    # 4. Calculate daily adherence array for the graph
-    days = list(daterange(start_date, end_date))
+    # 3. Daily adherence array for the graph
     daily_adherence = []
-    
-    for day in days:
-        day_total = 0
-        day_adhered = 0
-
-        # Medication adherence per day
-        for med in medications:
-            for sched in med.schedules:
-                if med.start_date.date() <= day and (not med.end_date or med.end_date.date() >= day):
-                    day_total += 1
-                    log = next((log for log in med_logs
-                                if log.scheduled_date == day and log.medication_schedule_id == sched.id), None)
-                    if log and log.taken_at:
-                        day_adhered += 1
-
-        # Blood Pressure adherence per day
-        for sched in bp_schedules:
-            if sched.start_date <= day and (not sched.end_date or sched.end_date >= day):
-                day_total += 1
-                log = next((log for log in bp_logs
-                            if log.checked_at.date() == day and log.schedule_id == sched.id), None)
-                if log:
-                    day_adhered += 1
-
-        # Sugar adherence per day
-        for sched in sugar_schedules:
-            if sched.start_date <= day and (not sched.end_date or sched.end_date >= day):
-                day_total += 1
-                log = next((log for log in sugar_logs
-                            if log.checked_at.date() == day and log.schedule_id == sched.id), None)
-                if log:
-                    day_adhered += 1
-
-        daily_percent = (day_adhered / day_total * 100) if day_total > 0 else 0
+    for day in daterange(start_date, end_date):
+        day_totals = summary["by_day"].get(day, {"scheduled": 0, "completed": 0})
+        daily_percent = (day_totals["completed"] / day_totals["scheduled"] * 100) if day_totals["scheduled"] > 0 else 0
         daily_adherence.append({
             "date": day.strftime("%Y-%m-%d"),
             "adherence_percent": round(daily_percent, 2),
-            "completed": day_adhered,
-            "scheduled": day_total
+            "completed": day_totals["completed"],
+            "scheduled": day_totals["scheduled"]
         })
 
     return {
@@ -681,9 +569,9 @@ def get_adherence_summary(
         "total_completed": adhered,
         "adherence_percent": round(adherence_percent, 2),
         "breakdown": {
-            "medication": {"scheduled": med_total, "completed": med_adhered},
-            "blood_pressure": {"scheduled": bp_total, "completed": bp_adhered},
-            "sugar": {"scheduled": sugar_total, "completed": sugar_adhered},
+            "medication": by_kind[AdherenceKind.MEDICATION],
+            "blood_pressure": by_kind[AdherenceKind.BLOOD_PRESSURE],
+            "sugar": by_kind[AdherenceKind.SUGAR],
         },
         "daily_adherence": daily_adherence  # Array for graphing
     }
@@ -5,21 +5,36 @@ from datetime import date
 
 from database import get_db
 from models.users import User
+from models.resource_versions import VersionedResource
+from utilities.etag import etag_guard
 from crud.sugar_logs import (
     create_sugar_log,
+    create_sugar_logs_bulk,
     get_sugar_log_by_id,
     get_sugar_logs_by_schedule,
-    get_sugar_logs_by_user,
+    get_sugar_logs_page_by_user,
     get_sugar_logs_by_date_range,
     get_sugar_logs_by_date,
     update_sugar_log,
     delete_sugar_log
 )
-from schemas.sugar_logs import SugarLogCreate, SugarLogUpdate, SugarLogOut
+from schemas.sugar_logs import SugarLogCreate, SugarLogUpdate, SugarLogOut, SugarLogLean, SugarLogPage, SugarLogBulkItem
+from schemas.bulk_logs import BulkLogResponse, MAX_BULK_LOGS
 from middlewares.auth import get_current_user
+from utilities.pagination import parse_fields
 
 router = APIRouter()
 
+LEAN_FIELDS = list(SugarLogLean.model_fields)
+
+@router.post("/bulk", response_model=BulkLogResponse)
+def create_logs_bulk(items: List[SugarLogBulkItem], db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    """Ingest an array of readings (offline sync, device memory dumps) with per-item results."""
+    if not items or len(items) > MAX_BULK_LOGS:
+        raise HTTPException(status_code=400, detail=f"Provide between 1 and {MAX_BULK_LOGS} readings.")
+    results = create_sugar_logs_bulk(db, user.id, items)
+    return BulkLogResponse(created=sum(r.status == "created" for r in results), results=results)
+
 @router.post("/{schedule_id}", response_model=SugarLogOut, status_code=201)
 def create_log(schedule_id: int, data: SugarLogCreate, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
     try:
@@ -38,12 +53,23 @@ def get_log_by_id(log_id: int, db: Session = Depends(get_db), user: User = Depen
 def get_logs_by_schedule(schedule_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
     return get_sugar_logs_by_schedule(db, schedule_id, user.id)
 
-@router.get("/user", response_model=List[SugarLogOut])
-def get_logs_by_user(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    return get_sugar_logs_by_user(db, user.id)
+@router.get("/user", response_model=SugarLogPage, response_model_exclude_unset=True)
+def get_logs_by_user(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. value,type,checked_at"),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    selected = parse_fields(fields, LEAN_FIELDS)
+    rows, next_cursor = get_sugar_logs_page_by_user(db, user.id, selected, cursor, limit)
+    return SugarLogPage(
+        items=[SugarLogLean(**{f: getattr(row, f) for f in ["id", *selected]}) for row in rows],
+        next_cursor=next_cursor,
+    )
 
 
-@router.get("/date", response_model=List[SugarLogOut])
+@router.get("/date", response_model=List[SugarLogOut], dependencies=[Depends(etag_guard(VersionedResource.SUGAR_LOGS))])
 def get_logs_by_date_or_range(
     date_from: Optional[date] = Query(None),
     date_to: Optional[date] = Query(None),
@@ -1,6 +1,6 @@
 from datetime import datetime, date,  time
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List
 
 class BloodPressureLogBase(BaseModel):
     systolic: int = Field(..., gt=0, lt=300)
@@ -33,3 +33,22 @@ class BloodPressureLogOut(BloodPressureLogBase):
 
     class Config:
         from_attributes = True
+
+
+class BloodPressureLogLean(BaseModel):
+    """Flat log row without the embedded schedule; only `id` is always present."""
+    id: int
+    schedule_id: Optional[int] = None
+    systolic: Optional[int] = None
+    diastolic: Optional[int] = None
+    pulse: Optional[int] = None
+    notes: Optional[str] = None
+    checked_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+
+class BloodPressureLogPage(BaseModel):
+    items: List[BloodPressureLogLean]
+    next_cursor: Optional[str] = None
+
+class BloodPressureLogBulkItem(BloodPressureLogCreate):
+    schedule_id: int
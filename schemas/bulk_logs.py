@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Optional, List
+
+MAX_BULK_LOGS = 500
+
+
+class BulkLogItemResult(BaseModel):
+    index: int                      # Position of the reading in the submitted array
+    status: str                     # "created", "duplicate" or "rejected"
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BulkLogResponse(BaseModel):
+    created: int
+    results: List[BulkLogItemResult]
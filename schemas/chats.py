@@ -1,6 +1,6 @@
 from datetime import datetime
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class ChatBase(BaseModel):
@@ -22,3 +22,8 @@ class ChatResponse(ChatBase):
 
     class Config:
         from_attributes = True
+
+
+class ChatPage(BaseModel):
+    items: List[ChatResponse]
+    next_cursor: Optional[str] = None
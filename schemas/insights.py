@@ -0,0 +1,37 @@
+from pydantic import BaseModel, field_validator
+from typing import List, Optional
+
+
+class InsightOutput(BaseModel):
+    """
+    An insight as returned by Gemini in structured-output mode. The list fields are repaired
+    in place (a bare string becomes a one-item list, anything unusable an empty list) and a
+    bad title is dropped, so only a missing/empty summary fails validation.
+    """
+    title: Optional[str] = None
+    summary: str
+    smart_recommendations: List[str] = []
+    adherence: List[str] = []
+    vital_sign_patterns: List[str] = []
+    unusual_spikes: List[str] = []
+
+    @field_validator("title", mode="before")
+    @classmethod
+    def clean_title(cls, value):
+        return value.strip() or None if isinstance(value, str) else None
+
+    @field_validator("summary", mode="before")
+    @classmethod
+    def clean_summary(cls, value):
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError("summary must be a non-empty string")
+        return value.strip()
+
+    @field_validator("smart_recommendations", "adherence", "vital_sign_patterns", "unusual_spikes", mode="before")
+    @classmethod
+    def coerce_list(cls, value):
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            return []
+        return [str(item).strip() for item in value if isinstance(item, (str, int, float)) and str(item).strip()]
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime, date, time
-from typing import Optional
+from typing import Optional, List
 
 # Nested schemas
 
@@ -49,3 +49,21 @@ class MedicationLogResponse(MedicationLogBase):
 
     class Config:
         from_attributes = True
+
+
+class MedicationLogLean(BaseModel):
+    """Flat log row without the embedded schedule/medication; only `id` is always present."""
+    id: int
+    medication_schedule_id: Optional[int] = None
+    scheduled_date: Optional[date] = None
+    taken_at: Optional[datetime] = None
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class MedicationLogPage(BaseModel):
+    items: List[MedicationLogLean]
+    next_cursor: Optional[str] = None
+
+class MedicationLogBulkItem(MedicationLogCreate):
+    medication_schedule_id: int
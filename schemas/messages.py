@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 
 class MessagePair(BaseModel):
@@ -27,3 +27,18 @@ class MessageResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class MessagePage(BaseModel):
+    items: List[MessageResponse]        # Oldest first; next_cursor loads the messages before them
+    next_cursor: Optional[str] = None
+
+
+class MessageSearchResult(MessageResponse):
+    rank: float
+    snippet: str                        # Matched fragments, terms wrapped in **
+
+
+class MessageSearchPage(BaseModel):
+    items: List[MessageSearchResult]    # Best match first; next_cursor loads the next matches
+    next_cursor: Optional[str] = None
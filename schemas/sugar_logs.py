@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime, date, time
-from typing import Optional
+from typing import Optional, List
 from enum import Enum
 from models.sugar_logs import SugarType
 
@@ -37,3 +37,21 @@ class SugarLogOut(SugarLogBase):
 
     class Config:
         from_attributes = True
+
+
+class SugarLogLean(BaseModel):
+    """Flat log row without the embedded schedule; only `id` is always present."""
+    id: int
+    schedule_id: Optional[int] = None
+    value: Optional[float] = None
+    type: Optional[SugarType] = None
+    notes: Optional[str] = None
+    checked_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+
+class SugarLogPage(BaseModel):
+    items: List[SugarLogLean]
+    next_cursor: Optional[str] = None
+
+class SugarLogBulkItem(SugarLogCreate):
+    schedule_id: int
@@ -0,0 +1,72 @@
+# Maintains the daily_adherence table outside the request path.
+#
+# The nightly job finalizes yesterday's rows (a missing log is now a miss) and
+# materializes today's slots, in the app time zone. It starts from each user's last
+# finalized day, so a run skipped over a restart is caught up by the next one.
+# Run as a module to rebuild from scratch:
+#
+#     python -m tasks.adherence              # every user
+#     python -m tasks.adherence 12 15        # only these user ids
+
+import sys
+from datetime import date, timedelta
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.users import User
+from crud.daily_adherence import last_finalized_days, refresh_adherence, rebuild_user_adherence
+from utilities.occurrences import app_today
+
+
+def _all_user_ids(db: Session) -> List[int]:
+    return [row.id for row in db.query(User.id).order_by(User.id)]
+
+
+def finalize_daily_adherence(day: Optional[date] = None):
+    """
+    Finalize every day since each user's last finalized one (up to ADHERENCE_CATCH_UP_DAYS back,
+    always including the day before `day`) and materialize `day` itself. `day` defaults to today.
+    """
+    db: Session = SessionLocal()
+    try:
+        today = day or app_today()
+        yesterday = today - timedelta(days=1)
+        earliest = today - timedelta(days=settings.ADHERENCE_CATCH_UP_DAYS)
+        last_finalized = last_finalized_days(db, earliest)
+        user_ids = _all_user_ids(db)
+        for user_id in user_ids:
+            start = min(last_finalized.get(user_id, earliest - timedelta(days=1)) + timedelta(days=1), yesterday)
+            try:
+                refresh_adherence(db, user_id, start, today)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"❌ Error finalizing adherence for user {user_id}: {e}")
+        print(f"✅ Adherence finalized through {yesterday} for {len(user_ids)} users.")
+    finally:
+        db.close()
+
+
+def rebuild_all_adherence(user_ids: Optional[List[int]] = None):
+    db: Session = SessionLocal()
+    try:
+        if user_ids is None:
+            user_ids = _all_user_ids(db)
+        rows = 0
+        for user_id in user_ids:
+            try:
+                rows += rebuild_user_adherence(db, user_id)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"❌ Error rebuilding adherence for user {user_id}: {e}")
+        print(f"✅ Rebuilt {rows} adherence rows for {len(user_ids)} users.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild_all_adherence([int(arg) for arg in sys.argv[1:]] or None)
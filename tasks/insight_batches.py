@@ -0,0 +1,179 @@
+# Checkpointed insight runs.
+#
+# Every scheduled or backfilled run is an insight batch (period + start date) with one
+# item per user. Items are committed as done/failed/skipped the moment each user is
+# processed, so a crashed run loses at most the user in flight, and running the same
+# batch again only touches users that are still pending or failed with attempts left.
+#
+#     python -m tasks.insight_batches resume                                # rerun batches still running
+#     python -m tasks.insight_batches resume --retry-partial                # ...and retry failed users with attempts left
+#     python -m tasks.insight_batches backfill daily 2025-01-01 2025-01-31  # every period start in the range
+#     python -m tasks.insight_batches backfill weekly 2025-01-01 2025-03-31 --users 12 15
+#     python -m tasks.insight_batches status                                # recent batches and their counts
+#
+# With INSIGHT_PACK_SIZE > 1, that many users share one Gemini call; a user whose part of the
+# packed response fails the guardrails is retried on their own right away.
+
+import argparse
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.insights import InsightPeriod
+from models.insight_batches import InsightBatch, InsightBatchItem, InsightBatchItemStatus
+from crud.insights import get_insight_by_period_and_date
+from crud.insight_batches import (
+    get_or_create_batch,
+    seed_batch_items,
+    requeue_failed_items,
+    claim_batch_items,
+    checkpoint_item,
+    finish_batch,
+    batch_counts,
+    get_unfinished_batches,
+    get_batches,
+)
+from utilities.gemini_governor import Priority
+from utilities.insight_generator import generate_insight, save_insight_to_db, insight_period_end
+from utilities.insight_packing import generate_packed_insights
+
+
+def _process_item(db: Session, batch: InsightBatch, item: InsightBatchItem, insight_data: Optional[dict] = None) -> None:
+    """Generate (unless a packed call already did) and save one user's insight, then checkpoint the item."""
+    user_id = item.user_id
+    try:
+        if insight_data is None:
+            insight_data = generate_insight(db, user_id, batch.period, batch.start_date, Priority.BATCH)
+        if insight_data and save_insight_to_db(db, **insight_data):
+            checkpoint_item(db, item, InsightBatchItemStatus.DONE)
+        elif get_insight_by_period_and_date(db, user_id, batch.period, batch.start_date):
+            # Generated meanwhile, e.g. the user opened their insights
+            checkpoint_item(db, item, InsightBatchItemStatus.SKIPPED)
+        else:
+            checkpoint_item(db, item, InsightBatchItemStatus.FAILED, "Insight generation failed, see logs.")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error generating {batch.period.value} insight for user {user_id} for {batch.start_date}: {e}")
+        checkpoint_item(db, item, InsightBatchItemStatus.FAILED, str(e))
+
+
+def _process_packed_items(db: Session, batch: InsightBatch, items: List[InsightBatchItem]) -> None:
+    """One Gemini call for the whole group; users whose section failed are generated singly."""
+    try:
+        packed = generate_packed_insights(db, [item.user_id for item in items], batch.period, batch.start_date)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Packed {batch.period.value} insights for {batch.start_date} failed, generating one by one: {e}")
+        packed = {}
+    for item in items:
+        _process_item(db, batch, item, packed.get(item.user_id))
+
+
+def _format_counts(counts: Dict[InsightBatchItemStatus, int]) -> str:
+    return ", ".join(f"{status.value} {count}" for status, count in counts.items())
+
+
+def run_insight_batch(
+    period: InsightPeriod,
+    start_date: date,
+    user_ids: Optional[Iterable[int]] = None,
+) -> Dict[InsightBatchItemStatus, int]:
+    """Create or resume the batch for (period, start_date) and work through its pending users."""
+    db: Session = SessionLocal()
+    try:
+        batch = get_or_create_batch(db, period, start_date)
+        batch.runs += 1
+        db.commit()
+        seed_batch_items(db, batch, user_ids)
+        requeue_failed_items(db, batch.id)
+
+        pack_size = max(1, settings.INSIGHT_PACK_SIZE)
+        while True:
+            items = claim_batch_items(db, batch.id, pack_size)
+            if not items:
+                break
+            if len(items) == 1:
+                _process_item(db, batch, items[0])
+            else:
+                _process_packed_items(db, batch, items)
+
+        counts = finish_batch(db, batch)
+        print(f"✅ {period.value.title()} insights for {start_date} (batch {batch.id}, {batch.status.value}): {_format_counts(counts)}")
+        return counts
+    finally:
+        db.close()
+
+
+def period_starts(period: InsightPeriod, first_day: date, last_day: date) -> List[date]:
+    """Start dates of every period overlapping [first_day, last_day] that has fully ended."""
+    if period == InsightPeriod.WEEKLY:
+        start = first_day - timedelta(days=first_day.weekday())
+    elif period == InsightPeriod.MONTHLY:
+        start = first_day.replace(day=1)
+    else:
+        start = first_day
+
+    starts = []
+    today = date.today()
+    while start <= last_day:
+        end = insight_period_end(period, start)
+        if end >= today:
+            break
+        starts.append(start)
+        start = end + timedelta(days=1)
+    return starts
+
+
+def backfill_insights(period: InsightPeriod, first_day: date, last_day: date, user_ids: Optional[List[int]] = None):
+    starts = period_starts(period, first_day, last_day)
+    for start_date in starts:
+        run_insight_batch(period, start_date, user_ids)
+    print(f"✅ Backfilled {len(starts)} {period.value} periods from {first_day} to {last_day}.")
+
+
+def resume_insight_batches(retry_partial: bool = False):
+    db: Session = SessionLocal()
+    try:
+        batches = [(batch.period, batch.start_date) for batch in get_unfinished_batches(db, retry_partial)]
+    finally:
+        db.close()
+    for period, start_date in batches:
+        run_insight_batch(period, start_date)
+    print(f"✅ Resumed {len(batches)} unfinished insight batches.")
+
+
+def print_batch_status(limit: int = 20):
+    db: Session = SessionLocal()
+    try:
+        for batch in get_batches(db, limit):
+            print(
+                f"#{batch.id} {batch.period.value} {batch.start_date} {batch.status.value} "
+                f"(runs {batch.runs}): {_format_counts(batch_counts(db, batch.id))}"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checkpointed insight batch runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    resume = commands.add_parser("resume", help="Rerun every batch that is still running")
+    resume.add_argument("--retry-partial", action="store_true", help="Also retry partial batches' failed users")
+    backfill = commands.add_parser("backfill", help="Run every period starting in a date range")
+    backfill.add_argument("period", choices=[p.value for p in InsightPeriod])
+    backfill.add_argument("first_day", type=date.fromisoformat)
+    backfill.add_argument("last_day", type=date.fromisoformat)
+    backfill.add_argument("--users", type=int, nargs="+", help="Only these user ids")
+    status = commands.add_parser("status", help="Show recent batches")
+    status.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "resume":
+        resume_insight_batches(args.retry_partial)
+    elif args.command == "backfill":
+        backfill_insights(InsightPeriod(args.period), args.first_day, args.last_day, args.users)
+    else:
+        print_batch_status(args.limit)
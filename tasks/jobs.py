@@ -0,0 +1,49 @@
+# Job handler registry and dispatch.
+#
+# Scheduled work is registered here by name so it can be stored in the jobs table
+# and run by `python -m tasks.worker`. JOB_BACKEND decides where a submitted job runs:
+#   inline   - straight away in the submitting process (single-instance deployments)
+#   database - enqueued into the jobs table for the worker processes
+
+import json
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from crud.jobs import enqueue_job
+
+JOB_HANDLERS: Dict[str, Callable[..., None]] = {}
+
+
+def job_handler(name: str):
+    """Register a function as the handler for jobs called `name`. Payload keys become its kwargs."""
+    def register(func):
+        JOB_HANDLERS[name] = func
+        return func
+    return register
+
+
+def run_job(name: str, payload: Optional[dict] = None) -> None:
+    handler = JOB_HANDLERS.get(name)
+    if handler is None:
+        raise ValueError(f"No handler registered for job '{name}'")
+    handler(**(payload or {}))
+
+
+def submit_job(name: str, payload: Optional[dict] = None, dedupe_key: Optional[str] = None) -> None:
+    if settings.JOB_BACKEND != "database":
+        run_job(name, payload)
+        return
+
+    db: Session = SessionLocal()
+    try:
+        job_id = enqueue_job(db, name, payload, dedupe_key)
+        db.commit()
+        if job_id is None:
+            print(f"⏭️ Job {dedupe_key} is already queued, skipping.")
+        else:
+            print(f"✅ Queued job {job_id}: {name} {json.dumps(payload or {})}")
+    finally:
+        db.close()
@@ -0,0 +1,87 @@
+# On-demand insight generation in the background (INSIGHT_ON_DEMAND=async).
+#
+# A GET /insights miss queues one job per (user, period, start date) and answers 202 right
+# away; the client polls GET /insights/jobs/{id}. The job runs in a worker process with
+# JOB_BACKEND=database, otherwise as a background task of the process that queued it.
+
+import json
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.insights import InsightPeriod
+from models.jobs import Job, JobStatus
+from crud.insights import get_insight_by_period_and_date
+from crud.jobs import enqueue_job, get_job, get_job_by_dedupe_key, requeue_job
+from tasks.jobs import job_handler
+from utilities.gemini_governor import Priority
+from utilities.insight_generator import get_or_generate_insight
+
+INSIGHT_JOB = "generate_user_insight"
+
+
+@job_handler(INSIGHT_JOB)
+def generate_user_insight_job(user_id: int, period: str, start_date: str):
+    db: Session = SessionLocal()
+    try:
+        # Same single-flight/advisory lock as the synchronous path, so the two never both call Gemini
+        insight = get_or_generate_insight(db, user_id, InsightPeriod(period), date.fromisoformat(start_date), Priority.INTERACTIVE)
+        if insight is None:
+            raise RuntimeError("Could not generate insight (no data or the model failed).")
+    finally:
+        db.close()
+
+
+def request_insight(db: Session, user_id: int, period: InsightPeriod, start_date: date) -> Job:
+    """
+    The generation job for this insight, queued if there is none yet. A finished job (the insight
+    is missing, so it failed or its result was deleted) or one stuck running is queued again.
+    Repeated requests share the same job.
+    """
+    dedupe_key = f"insight:{user_id}:{period.value}:{start_date}"
+    job_id = enqueue_job(
+        db,
+        INSIGHT_JOB,
+        {"user_id": user_id, "period": period.value, "start_date": start_date.isoformat()},
+        dedupe_key,
+        max_attempts=1,     # The user asking again requeues it; no backoff retries behind their back
+    )
+    db.commit()
+    if job_id is not None:
+        return get_job(db, job_id)
+
+    job = get_job_by_dedupe_key(db, dedupe_key)
+    stale_before = datetime.now(timezone.utc) - timedelta(minutes=settings.JOB_LOCK_TIMEOUT_MINUTES)
+    if job.status in (JobStatus.FAILED, JobStatus.SUCCEEDED) or (
+        job.status == JobStatus.RUNNING and job.locked_at < stale_before
+    ):
+        requeue_job(db, job)
+    return job
+
+
+def run_insight_job(job_id: int):
+    """Background task for the inline backend: run the job if it is still queued (claiming it makes repeats no-ops)."""
+    from tasks.worker import run_next_job, current_worker_id  # tasks.worker imports this module
+    db: Session = SessionLocal()
+    try:
+        run_next_job(db, current_worker_id(), job_id)
+    finally:
+        db.close()
+
+
+def insight_job_status(db: Session, job: Job) -> dict:
+    body = {
+        "job_id": job.id,
+        "status": job.status.value,
+        "attempts": job.attempts,
+        "error": job.last_error if job.status == JobStatus.FAILED else None,
+        "insight": None,
+    }
+    if job.status == JobStatus.SUCCEEDED:
+        payload = json.loads(job.payload)
+        body["insight"] = get_insight_by_period_and_date(
+            db, payload["user_id"], InsightPeriod(payload["period"]), date.fromisoformat(payload["start_date"])
+        )
+    return body
@@ -0,0 +1,39 @@
+# Rebuilds the vitals rollups from the raw bp/sugar logs.
+#
+# Rollups are kept up to date by the log write paths; this is for the initial
+# backfill and for repairing drift (e.g. after logs were edited directly in SQL).
+#
+#     python -m tasks.rollups              # every user
+#     python -m tasks.rollups 12 15        # only these user ids
+
+import sys
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.users import User
+from crud.vitals_rollups import rebuild_user_rollups
+
+
+def rebuild_all_rollups(user_ids: Optional[List[int]] = None):
+    db: Session = SessionLocal()
+    try:
+        if user_ids is None:
+            user_ids = [row.id for row in db.query(User.id).order_by(User.id)]
+        buckets = 0
+        # One transaction per user so a failure only loses that user's rebuild
+        for user_id in user_ids:
+            try:
+                buckets += rebuild_user_rollups(db, user_id)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"❌ Error rebuilding rollups for user {user_id}: {e}")
+        print(f"✅ Rebuilt {buckets} rollup buckets for {len(user_ids)} users.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild_all_rollups([int(arg) for arg in sys.argv[1:]] or None)
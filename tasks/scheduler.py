@@ -1,69 +1,155 @@
+import threading
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import date, timedelta
-from sqlalchemy.orm import Session
-from database import SessionLocal
-from models.users import User
-from pytz import timezone
-from utilities.insight_generator import generate_and_save_insight
+from typing import Optional
+from sqlalchemy import text
+from database import engine
 from models.insights import InsightPeriod
+from tasks.adherence import finalize_daily_adherence
+from tasks.insight_batches import run_insight_batch
+from tasks.jobs import job_handler, submit_job
+from utilities.occurrences import APP_TIMEZONE, app_today
 
-def generate_insights(period: InsightPeriod):
-    db: Session = SessionLocal()
+# Arbitrary app-wide key for the scheduler's Postgres advisory lock
+SCHEDULER_LOCK_ID = 7_340_001
+
+
+class SchedulerLeader:
+    """
+    Every uvicorn worker runs a scheduler, but only the one holding a session-level advisory
+    lock fires jobs. The lock lives on a dedicated connection, so if that process dies the
+    lock is released and the next scheduler to check takes over.
+    """
+
+    def __init__(self):
+        self.connection = None
+        self._lock = threading.Lock()
+
+    def _drop(self):
+        # Invalidate rather than return it to the pool, so the server session (and lock) really ends
+        try:
+            self.connection.invalidate()
+        except Exception:
+            pass
+        self.connection = None
+
+    def is_leader(self) -> bool:
+        with self._lock:
+            if self.connection is not None:
+                try:
+                    self.connection.execute(text("SELECT 1"))
+                    return True
+                except Exception as e:
+                    print(f"❌ Lost the scheduler lock connection: {e}")
+                    self._drop()
+
+            connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+            try:
+                acquired = connection.execute(
+                    text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": SCHEDULER_LOCK_ID}
+                ).scalar()
+            except Exception as e:
+                print(f"❌ Could not check the scheduler lock: {e}")
+                acquired = False
+            if not acquired:
+                connection.close()
+                return False
+            self.connection = connection
+            print("👑 This process now runs the scheduled jobs.")
+            return True
+
+
+leader = SchedulerLeader()
+
+
+def insight_period_start(period: InsightPeriod, today: date) -> date:
+    if period == InsightPeriod.DAILY:
+        return today - timedelta(days=1)  # Previous day
+    if period == InsightPeriod.WEEKLY:
+        # Previous week: Monday to Sunday
+        return today - timedelta(days=today.weekday() + 7)
+    # Previous month: 1st to last day
+    first_of_this_month = today.replace(day=1)
+    last_month_end = first_of_this_month - timedelta(days=1)
+    return last_month_end.replace(day=1)
+
+
+def generate_insights(period: InsightPeriod, start_date: Optional[date] = None):
+    if start_date is None:
+        start_date = insight_period_start(period, app_today())
     try:
-        today = date.today()
-        if period == InsightPeriod.DAILY:
-            start_date = today - timedelta(days=1)  # Previous day
-        elif period == InsightPeriod.WEEKLY:
-            # Previous week: Monday to Sunday
-            last_monday = today - timedelta(days=today.weekday() + 7)
-            start_date = last_monday
-        elif period == InsightPeriod.MONTHLY:
-            # Previous month: 1st to last day
-            first_of_this_month = today.replace(day=1)
-            last_month_end = first_of_this_month - timedelta(days=1)
-            last_month_start = last_month_end.replace(day=1)
-            start_date= last_month_start
-        else:
-            print(f"❌ Unknown period: {period}")
-            db.close()
-            return
-        users = db.query(User).all()
-        for user in users:
-            generate_and_save_insight(db, user_id=user.id, period=period, start_date=start_date)
-        print(f"✅ {period.value.title()} insights generated for {len(users)} users for {start_date}.")
+        # Checkpointed per user; rerunning the same period only retries what is left
+        run_insight_batch(period, start_date)
     except Exception as e:
         print(f"❌ Error generating {period.value.title()} insights: {e}")
-    finally:
-        db.close()
+        raise
+
+
+@job_handler("generate_insights")
+def generate_insights_job(period: str, start_date: str):
+    generate_insights(InsightPeriod(period), date.fromisoformat(start_date))
+
+
+@job_handler("finalize_daily_adherence")
+def finalize_daily_adherence_job(day: str):
+    # Finalize relative to the day it was queued for, so a retry that lands after midnight still covers it
+    finalize_daily_adherence(date.fromisoformat(day))
+
+
+def schedule_insights(period: InsightPeriod):
+    if not leader.is_leader():
+        return
+    # Pin the period start now so a retried or late job still covers the right period
+    start_date = insight_period_start(period, app_today())
+    submit_job(
+        "generate_insights",
+        {"period": period.value, "start_date": start_date.isoformat()},
+        dedupe_key=f"generate_insights:{period.value}:{start_date}",
+    )
+
+
+def schedule_adherence_finalization():
+    if not leader.is_leader():
+        return
+    today = app_today().isoformat()
+    submit_job("finalize_daily_adherence", {"day": today}, dedupe_key=f"finalize_daily_adherence:{today}")
 
 
 def start_scheduler():
     scheduler = BackgroundScheduler()
+    # Adherence: finalize yesterday and materialize today just after midnight
+    scheduler.add_job(
+        schedule_adherence_finalization,
+        "cron",
+        hour=0,
+        minute=0,
+        timezone=APP_TIMEZONE,
+    )
     # Daily: every day at midnight
     scheduler.add_job(
-        lambda: generate_insights(InsightPeriod.DAILY),
+        lambda: schedule_insights(InsightPeriod.DAILY),
         "cron",
         hour=0,
         minute=0,
-        timezone=timezone("Asia/Karachi"),
+        timezone=APP_TIMEZONE,
     )
     # Weekly: every Monday at 1:00 AM (for previous week)
     scheduler.add_job(
-        lambda: generate_insights(InsightPeriod.WEEKLY),
+        lambda: schedule_insights(InsightPeriod.WEEKLY),
         "cron",
         day_of_week="mon",
         hour=1,
         minute=0,
-        timezone=timezone("Asia/Karachi"),
+        timezone=APP_TIMEZONE,
     )
     # Monthly: 1st of each month at 2:00 AM (for previous month)
     scheduler.add_job(
-        lambda: generate_insights(InsightPeriod.MONTHLY),
+        lambda: schedule_insights(InsightPeriod.MONTHLY),
         "cron",
         day=1,
         hour=2,
         minute=0,
-        timezone=timezone("Asia/Karachi"),
+        timezone=APP_TIMEZONE,
     )
     scheduler.start()
     print("🕓 Scheduler started for generating daily, weekly, and monthly insights.")
@@ -0,0 +1,77 @@
+# Job worker for JOB_BACKEND=database.
+#
+# Claims due jobs from the jobs table one at a time (FOR UPDATE SKIP LOCKED, so any
+# number of workers can run side by side), runs the registered handler and records
+# the outcome. Failed jobs are retried with backoff up to max_attempts; jobs left
+# RUNNING by a crashed worker are released after JOB_LOCK_TIMEOUT_MINUTES.
+#
+#     python -m tasks.worker            # poll until stopped
+#     python -m tasks.worker --once     # drain the due jobs and exit
+
+import json
+import os
+import socket
+import sys
+import time
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from crud.jobs import claim_job, complete_job, fail_job, requeue_stale_jobs
+from tasks.jobs import run_job
+import tasks.scheduler  # noqa: F401  registers the scheduled job handlers
+import tasks.on_demand_insights  # noqa: F401  registers the on-demand insight handler
+
+
+def run_next_job(db: Session, worker_id: str, job_id: Optional[int] = None) -> bool:
+    """Claim and run one due job (or only `job_id`). Returns False when there is nothing due."""
+    job = claim_job(db, worker_id, job_id)
+    if job is None:
+        return False
+
+    print(f"🛠️ Running job {job.id}: {job.name} (attempt {job.attempts}/{job.max_attempts})")
+    try:
+        run_job(job.name, json.loads(job.payload or "{}"))
+    except Exception as e:
+        db.rollback()
+        fail_job(db, job, str(e))
+        print(f"❌ Job {job.id} failed: {e}")
+        return True
+    complete_job(db, job)
+    print(f"✅ Job {job.id} done.")
+    return True
+
+
+def current_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_worker(once: bool = False):
+    worker = current_worker_id()
+    lock_timeout = timedelta(minutes=settings.JOB_LOCK_TIMEOUT_MINUTES)
+    print(f"🕓 Worker {worker} started.")
+    while True:
+        db: Session = SessionLocal()
+        try:
+            released = requeue_stale_jobs(db, lock_timeout)
+            if released:
+                print(f"⏭️ Released {released} stale jobs.")
+            ran = run_next_job(db, worker)
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Worker error: {e}")
+            ran = False
+        finally:
+            db.close()
+
+        if not ran:
+            if once:
+                return
+            time.sleep(settings.JOB_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    run_worker(once="--once" in sys.argv[1:])
@@ -0,0 +1,42 @@
+from typing import List
+
+from schemas.messages import MessagePair
+from utilities.token_budget import estimate_tokens, truncate_to_tokens
+
+# Share of the budget kept for the rolling summary when there is one, however long the recent turns are
+SUMMARY_MIN_SHARE = 0.25
+
+
+def _format_turn(turn: MessagePair) -> str:
+    return f"User: {turn.user}\nAssistant: {turn.ai}"
+
+
+def build_chat_context(summary: str, turns: List[MessagePair], budget: int) -> str:
+    """
+    Conversation context for the next reply: the rolling summary of older messages plus the
+    most recent turns verbatim (oldest first), within `budget` estimated tokens. Turns are kept
+    newest first until the budget runs out; the newest one always gets in, truncated if needed.
+    """
+    summary = (summary or "").strip()
+    summary_reserve = min(estimate_tokens(summary), int(budget * SUMMARY_MIN_SHARE))
+    turns_budget = budget - summary_reserve
+
+    kept = []
+    used = 0
+    for turn in reversed(turns):
+        text = _format_turn(turn)
+        cost = estimate_tokens(text)
+        if used + cost > turns_budget:
+            if not kept:
+                kept.append(truncate_to_tokens(text, turns_budget))
+                used = turns_budget
+            break
+        kept.append(text)
+        used += cost
+
+    parts = []
+    if summary:
+        parts.append("Summary of the earlier conversation:\n" + truncate_to_tokens(summary, budget - used))
+    if kept:
+        parts.append("Most recent messages (oldest first):\n" + "\n\n".join(reversed(kept)))
+    return "\n\n".join(parts)
@@ -0,0 +1,57 @@
+import zlib
+from datetime import date
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+
+from database import get_db
+from middlewares.auth import get_current_user
+from models.users import User
+from models.resource_versions import VersionedResource
+from crud.resource_versions import get_version
+
+
+def make_etag(user_id: int, resource: VersionedResource, version: int, query: str = "", day: date = None) -> str:
+    # The checksum keys the tag to the user, resource and query so tags never collide across them
+    key = f"{user_id}|{resource.value}|{query}|{day or ''}"
+    return f'W/"{version}-{zlib.crc32(key.encode()):08x}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes are ignored on both sides
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+def etag_guard(resource: VersionedResource, daily: bool = False):
+    """
+    Dependency for conditional GETs on a per-user resource.
+    Raises 304 when If-None-Match carries the current tag, so the endpoint never runs its queries;
+    otherwise sets the ETag header on the response. Use daily=True when the response depends on today's date.
+    """
+    def dependency(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ) -> str:
+        query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+        etag = make_etag(
+            current_user.id, resource, get_version(db, current_user.id, resource),
+            query, date.today() if daily else None
+        )
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+            )
+
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+        return etag
+
+    return dependency
@@ -0,0 +1,95 @@
+# Offline stand-in for genai.GenerativeModel, enabled with GEMINI_FAKE=true.
+#
+# Returns canned insight/chat replies with usage metadata so the insight pipeline, chat
+# and the governor can be exercised locally without a key or quota:
+#
+#     GEMINI_FAKE=true GEMINI_FAKE_LATENCY=0.5 uvicorn main:app
+#
+# Failures can be injected per instance, e.g. FakeGenerativeModel(fail_with=ResourceExhausted("quota")).
+
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from utilities.token_budget import estimate_tokens
+
+INSIGHT_MARKER = "Instructions for Response Format"
+PACKED_MARKER = "Packed Response Format"
+
+
+@dataclass
+class FakeUsage:
+    prompt_token_count: int
+    candidates_token_count: int
+    total_token_count: int
+
+
+@dataclass
+class FakePart:
+    text: str
+
+
+class FakeResponse:
+    def __init__(self, prompt: str, text: str):
+        self.text = text
+        self.parts: List[FakePart] = [FakePart(text)]
+        prompt_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(text)
+        self.usage_metadata = FakeUsage(prompt_tokens, output_tokens, prompt_tokens + output_tokens)
+
+
+def _insight_data() -> dict:
+    return {
+        "smart_recommendations": ["Keep logging readings at your scheduled times."],
+        "adherence": ["Most scheduled doses and checks were logged."],
+        "vital_sign_patterns": ["Readings stayed in a similar range across the period."],
+        "unusual_spikes": [],
+    }
+
+
+def _insight_reply() -> str:
+    data = _insight_data()
+    return (
+        "Title: Health Summary (offline)\n"
+        "Summary: This is a generated placeholder insight from the fake Gemini client.\n"
+        f"```json\n{json.dumps(data, indent=2)}\n```"
+    )
+
+
+def _structured_reply() -> str:
+    return json.dumps({"title": "Health Summary (offline)", "summary": "Generated placeholder insight.", **_insight_data()})
+
+
+def _packed_reply(prompt: str, structured: bool) -> str:
+    refs = re.findall(r"^### User (\S+)$", prompt, re.MULTILINE)
+    data = {
+        ref: {"title": f"Health Summary (offline, {ref})", "summary": "Generated placeholder insight.", **_insight_data()}
+        for ref in refs
+    }
+    return json.dumps(data) if structured else f"```json\n{json.dumps(data, indent=2)}\n```"
+
+
+class FakeGenerativeModel:
+    def __init__(self, model_name: str = "fake", latency: float = 0.0, fail_with: Optional[Exception] = None, **kwargs):
+        self.model_name = model_name
+        self.latency = latency
+        self.fail_with = fail_with
+        self.calls = 0
+
+    def generate_content(self, prompt: str, generation_config: Optional[dict] = None, **kwargs) -> FakeResponse:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_with is not None:
+            raise self.fail_with
+        structured = (generation_config or {}).get("response_mime_type") == "application/json"
+        if PACKED_MARKER in prompt:
+            return FakeResponse(prompt, _packed_reply(prompt, structured))
+        if INSIGHT_MARKER in prompt:
+            return FakeResponse(prompt, _structured_reply() if structured else _insight_reply())
+        if structured:
+            return FakeResponse(prompt, json.dumps({"summary": "Generated placeholder summary."}))
+        last_line = prompt.strip().splitlines()[-1] if prompt.strip() else ""
+        return FakeResponse(prompt, f"(offline reply) You said: {last_line[:200]}")
@@ -4,12 +4,17 @@ import google.generativeai as genai
 from google.api_core import exceptions as google_exceptions
 import tenacity
 import logging
+from typing import Optional
+
+from config import settings
+from utilities.fake_gemini import FakeGenerativeModel
+from utilities.gemini_governor import governor, Priority, GeminiUnavailable
 
 # Load .env file
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
+if not GEMINI_API_KEY and not settings.GEMINI_FAKE:
     raise ValueError("GEMINI_API_KEY not found in environment variables.")
 
 # Configure the Gemini client
@@ -20,19 +25,36 @@ RETRY_EXCEPTIONS = (
     google_exceptions.GoogleAPIError,
     ValueError,
 )
+# ...but not on quota errors or an open circuit: retrying those only adds load while the quota is gone
+NO_RETRY_EXCEPTIONS = (
+    google_exceptions.ResourceExhausted,
+    GeminiUnavailable,
+)
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+
+def generative_model(model_name: str, **kwargs):
+    """genai.GenerativeModel, or the offline fake when GEMINI_FAKE is set."""
+    if settings.GEMINI_FAKE:
+        return FakeGenerativeModel(model_name, latency=settings.GEMINI_FAKE_LATENCY, **kwargs)
+    return genai.GenerativeModel(model_name, **kwargs)
+
+
+def _should_retry(e: BaseException) -> bool:
+    return isinstance(e, RETRY_EXCEPTIONS) and not isinstance(e, NO_RETRY_EXCEPTIONS)
+
+
 @tenacity.retry(
     stop=tenacity.stop_after_attempt(5),
     wait=tenacity.wait_exponential(multiplier=1, min=4, max=10),
-    retry=tenacity.retry_if_exception_type(RETRY_EXCEPTIONS),
+    retry=tenacity.retry_if_exception(_should_retry),
     before_sleep=tenacity.before_sleep_log(logger, logging.INFO),
     reraise=True
 )
-def generate_gemini_response(prompt: str) -> str:
-    model = genai.GenerativeModel(
+def generate_gemini_response(prompt: str, priority: Priority = Priority.BATCH, generation_config: Optional[dict] = None) -> str:
+    model = generative_model(
         "models/gemini-1.5-flash",
         safety_settings={
             genai.types.HarmCategory.HARM_CATEGORY_HARASSMENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
@@ -47,7 +69,8 @@ def generate_gemini_response(prompt: str) -> str:
 
     logger.info("Attempting to generate Gemini response...")
 
-    response = model.generate_content(prompt)
+    # Every attempt, retries included, goes through the shared rate limiter
+    response = governor.call(lambda: model.generate_content(prompt, generation_config=generation_config), prompt, priority)
 
     if not response.parts:
         logger.warning("⚠️ Gemini response was blocked due to safety concerns.")
@@ -55,7 +78,6 @@ def generate_gemini_response(prompt: str) -> str:
 
     return response.text
 
-
 # import os
 # import google.generativeai as genai
 # from dotenv import load_dotenv
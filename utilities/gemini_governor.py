@@ -0,0 +1,184 @@
+import enum
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from google.api_core import exceptions as google_exceptions
+
+from config import settings
+from utilities.token_budget import estimate_tokens
+
+# Output tokens reserved per call before the real usage is known
+EXPECTED_OUTPUT_TOKENS = 800
+# How long a caller may wait for capacity before giving up, by priority
+MAX_WAIT_SECONDS = {"interactive": 10, "batch": 300}
+USAGE_HISTORY_MINUTES = 60
+
+
+class Priority(enum.Enum):
+    INTERACTIVE = "interactive"     # Chat: waits briefly, may use the whole quota
+    BATCH = "batch"                 # Insights: yields to chat and leaves a reserve for it
+
+
+class GeminiUnavailable(Exception):
+    """The circuit is open or no capacity freed up within the caller's wait limit."""
+    pass
+
+
+class TokenBucket:
+    """Refills continuously up to `per_minute`; may go negative when real usage exceeds the estimate."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def seconds_until(self, amount: float) -> float:
+        return max(0.0, (amount - self.level) / self.rate)
+
+
+class GeminiGovernor:
+    """
+    Process-wide gate in front of every Gemini call: request and token buckets sized to
+    the per-minute quota, priority between chat and batch work, per-minute usage
+    accounting and a circuit breaker that fails fast while the API is rejecting us.
+    """
+
+    def __init__(self, rpm: int, tpm: int, batch_reserve: float, failure_threshold: int, cooldown_seconds: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.batch_reserve = batch_reserve
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown_seconds
+
+        self._cond = threading.Condition()
+        self._interactive_waiting = 0
+        self._failures = 0
+        self._cooldown = cooldown_seconds
+        self._open_until: Optional[float] = None
+        self._trial_in_flight = False
+        self._usage: "OrderedDict[int, dict]" = OrderedDict()
+
+    # --- circuit breaker ---
+
+    def _check_circuit(self, now: float) -> bool:
+        """Raise while open; after the cooldown let exactly one trial call through. Returns True for the trial."""
+        if self._open_until is None:
+            return False
+        if now < self._open_until or self._trial_in_flight:
+            raise GeminiUnavailable(f"Gemini circuit open for another {max(0, self._open_until - now):.0f}s")
+        self._trial_in_flight = True
+        return True
+
+    def _open_circuit(self, now: float, reason: str) -> None:
+        self._open_until = now + self._cooldown
+        print(f"❌ Gemini circuit opened for {self._cooldown:.0f}s: {reason}")
+        self._cooldown = min(self._cooldown * 2, 600)
+
+    # --- accounting ---
+
+    def _account(self, key: str, amount: int = 1) -> None:
+        minute = int(time.time() // 60)
+        usage = self._usage.setdefault(minute, {"requests": 0, "tokens": 0, "rejected": 0, "failed": 0})
+        usage[key] += amount
+        while len(self._usage) > USAGE_HISTORY_MINUTES:
+            self._usage.popitem(last=False)
+
+    def usage(self) -> dict:
+        """Per-minute request/token/rejection counts for the last hour, keyed by minute start (epoch seconds)."""
+        with self._cond:
+            return {minute * 60: dict(counts) for minute, counts in self._usage.items()}
+
+    # --- gate ---
+
+    def _acquire(self, estimated_tokens: int, priority: Priority) -> bool:
+        # A single prompt bigger than the whole bucket would otherwise wait forever
+        estimated_tokens = min(estimated_tokens, self.tokens.capacity)
+        deadline = time.monotonic() + MAX_WAIT_SECONDS[priority.value]
+        is_batch = priority == Priority.BATCH
+
+        with self._cond:
+            if not is_batch:
+                self._interactive_waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    trial = self._check_circuit(now)
+                    self.requests.refill(now)
+                    self.tokens.refill(now)
+
+                    request_floor = 1 + (self.batch_reserve * self.requests.capacity if is_batch else 0)
+                    token_floor = estimated_tokens + (self.batch_reserve * self.tokens.capacity if is_batch else 0)
+                    blocked_by_chat = is_batch and self._interactive_waiting > 0
+                    if not blocked_by_chat and self.requests.level >= request_floor and self.tokens.level >= token_floor:
+                        self.requests.level -= 1
+                        self.tokens.level -= estimated_tokens
+                        self._account("requests")
+                        return trial
+
+                    if trial:
+                        self._trial_in_flight = False
+                    wait = max(self.requests.seconds_until(request_floor), self.tokens.seconds_until(token_floor), 0.05)
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._account("rejected")
+                        raise GeminiUnavailable(f"Gemini rate limit: no capacity for {priority.value} call")
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                if not is_batch:
+                    self._interactive_waiting -= 1
+                    self._cond.notify_all()
+
+    def _release(self, trial: bool, estimated_tokens: int, used_tokens: Optional[int], error: Optional[Exception]) -> None:
+        with self._cond:
+            now = time.monotonic()
+            if trial:
+                self._trial_in_flight = False
+            if error is None:
+                if used_tokens is not None:
+                    # Settle the estimate against what the call really cost
+                    self.tokens.level -= used_tokens - min(estimated_tokens, self.tokens.capacity)
+                self._account("tokens", used_tokens if used_tokens is not None else estimated_tokens)
+                self._failures = 0
+                self._open_until = None
+                self._cooldown = self.base_cooldown
+            else:
+                self._account("failed")
+                self._failures += 1
+                if isinstance(error, google_exceptions.ResourceExhausted):
+                    # Quota exhausted: drain the buckets so nobody retries straight into it
+                    self.requests.level = min(self.requests.level, 0)
+                    self.tokens.level = min(self.tokens.level, 0)
+                    self._open_circuit(now, "quota exhausted")
+                elif trial or self._failures >= self.failure_threshold:
+                    self._open_circuit(now, f"{self._failures} consecutive failures: {error}")
+            self._cond.notify_all()
+
+    def call(self, fn: Callable, prompt: str, priority: Priority = Priority.BATCH):
+        """Run `fn()` (one Gemini request for `prompt`) once capacity allows. Raises GeminiUnavailable instead of calling."""
+        estimated = estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS
+        trial = self._acquire(estimated, priority)
+        try:
+            response = fn()
+        except Exception as e:
+            self._release(trial, estimated, None, e)
+            raise
+        usage = getattr(response, "usage_metadata", None)
+        used = getattr(usage, "total_token_count", None) if usage is not None else None
+        self._release(trial, estimated, used, None)
+        return response
+
+
+governor = GeminiGovernor(
+    rpm=settings.GEMINI_RPM,
+    tpm=settings.GEMINI_TPM,
+    batch_reserve=settings.GEMINI_BATCH_RESERVE,
+    failure_threshold=settings.GEMINI_FAILURE_THRESHOLD,
+    cooldown_seconds=settings.GEMINI_COOLDOWN_SECONDS,
+)
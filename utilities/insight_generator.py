@@ -1,15 +1,31 @@
 from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+from sqlalchemy import text
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 import json
 import re
 from models.insights import Insight, InsightPeriod
+from schemas.insights import InsightOutput
 from crud.bp_logs import get_logs_by_date as get_bp_logs
 from crud.sugar_logs import get_sugar_logs_by_date
 from crud.medication_logs import get_logs_by_date as get_med_logs
 from crud.bp_schedules import get_user_bp_schedules
 from crud.sugar_schedules import get_user_sugar_schedules
 from crud.medications import get_user_medications
+from crud.daily_adherence import get_adherence, summarize_adherence
+from models.daily_adherence import AdherenceKind
+from models.resource_versions import VersionedResource
+from crud.resource_versions import bump_version
 from utilities.gemini_client import generate_gemini_response
+from utilities.gemini_governor import GeminiUnavailable, Priority
+from utilities.insight_hierarchy import build_hierarchical_context
+from utilities.prompt_encoder import encode_log_sections
+from utilities.occurrences import overlaps
+from utilities.single_flight import SingleFlight, advisory_lock_key
+from crud.insights import get_insight_by_period_and_date
+from config import settings
+from database import engine
 from sqlalchemy.exc import IntegrityError
 import tenacity
 import google.generativeai as genai
@@ -27,9 +43,62 @@ DANGEROUS_RECOMMENDATION_KEYWORDS = [
     "cure diabetes", "cure hypertension", "replace insulin", "ignore doctor"
 ]
 
+SAFETY_GUIDELINES = """**Important Safety Guidelines:**
+* **DO NOT** make medical diagnoses or claim to cure diseases.
+* **DO NOT** prescribe specific medications or advise on medication dosages.
+* **DO NOT** tell the user to stop or change their prescribed medications without consulting a doctor.
+* Focus on observations from the data, general healthy lifestyle recommendations (e.g., "stay hydrated", "monitor readings"), and adherence tracking.
+* Remind the user to consult a healthcare professional for personalized medical advice.
+"""
+
 # --- Main generate_daily_insight function with all guardrails and updated error handling ---
 
-def build_gemini_prompt(period, start_date, end_date, bp_schedules_str, sugar_schedules_str, med_schedules_str, bp_logs_str, sugar_logs_str, med_logs_str):
+# Gemini response_schema for structured-output mode (mirrors schemas.insights.InsightOutput)
+INSIGHT_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "summary": {"type": "string"},
+        **{key: {"type": "array", "items": {"type": "string"}} for key in EXPECTED_INSIGHT_JSON_KEYS},
+    },
+    "required": ["title", "summary", *EXPECTED_INSIGHT_JSON_KEYS],
+}
+
+
+def insight_generation_config(schema: dict = INSIGHT_RESPONSE_SCHEMA):
+    """JSON-only, schema-constrained output in structured mode; None (free text) otherwise."""
+    if settings.INSIGHT_OUTPUT != "structured":
+        return None
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+
+def response_instructions(period_label, date_range_str):
+    """Output format and safety rules shared by every insight prompt."""
+    if settings.INSIGHT_OUTPUT == "structured":
+        return f"""**Instructions for Response Format (Strictly Adhere):**
+Respond with a single JSON object and nothing else, with these keys:
+    -   "title": a concise, informative title (e.g., "{period_label} Health Summary for {date_range_str}").
+    -   "summary": a brief overall summary of the {period_label.lower()} health, highlighting key observations from the logs.
+    -   "smart_recommendations": list of actionable general health advice based on the provided logs.
+    -   "adherence": list of observations on medication and schedule adherence for the {period_label.lower()}.
+    -   "vital_sign_patterns": list of analyses of blood pressure and/or sugar trends or significant readings.
+    -   "unusual_spikes": list of any abnormal or concerning readings that stand out.
+
+{SAFETY_GUIDELINES}"""
+    return f"""**Instructions for Response Format (Strictly Adhere):**
+1.  **Title:** Start your response with "Title:" followed by a concise, informative title (e.g., "{period_label} Health Summary for {date_range_str}").
+2.  **Summary:** On a new line, start with "Summary:" followed by a brief overall summary of the {period_label.lower()} health, highlighting key observations from the logs.
+3.  **JSON Block:** Provide a valid JSON object enclosed in triple backticks (```json...```). This JSON must contain the following top-level keys, each with a list of relevant observations or recommendations:
+    -   "smart_recommendations": actionable general health advice based on the provided logs.
+    -   "adherence": observations on medication and schedule adherence for the {period_label.lower()}.
+    -   "vital_sign_patterns": analysis of blood pressure and/or sugar trends or significant readings.
+    -   "unusual_spikes": identification of any abnormal or concerning readings that stand out.
+    Ensure all JSON values are valid strings, numbers, or boolean types. Do NOT include any non-JSON content inside the ```json...``` block.
+
+{SAFETY_GUIDELINES}"""
+
+
+def build_gemini_prompt(period, start_date, end_date, bp_schedules_str, sugar_schedules_str, med_schedules_str, bp_logs_str, sugar_logs_str, med_logs_str, adherence_str="No adherence data."):
     """
     Build the Gemini prompt for insight generation, including schedules and logs, and period-awareness.
     """
@@ -45,55 +114,77 @@ Sugar Schedules:\n{sugar_schedules_str}
 
 Medication Schedules:\n{med_schedules_str}
 
-**Instructions for Response Format (Strictly Adhere):**
-1.  **Title:** Start your response with "Title:" followed by a concise, informative title (e.g., "{period_label} Health Summary for {date_range_str}").
-2.  **Summary:** On a new line, start with "Summary:" followed by a brief overall summary of the {period_label.lower()} health, highlighting key observations from the logs.
-3.  **JSON Block:** Provide a valid JSON object enclosed in triple backticks (```json...```). This JSON must contain the following top-level keys, each with a list of relevant observations or recommendations:
-    -   "smart_recommendations": actionable general health advice based on the provided logs.
-    -   "adherence": observations on medication and schedule adherence for the {period_label.lower()}.
-    -   "vital_sign_patterns": analysis of blood pressure and/or sugar trends or significant readings.
-    -   "unusual_spikes": identification of any abnormal or concerning readings that stand out.
-    Ensure all JSON values are valid strings, numbers, or boolean types. Do NOT include any non-JSON content inside the ```json...``` block.
-
-**Important Safety Guidelines:**
-* **DO NOT** make medical diagnoses or claim to cure diseases.
-* **DO NOT** prescribe specific medications or advise on medication dosages.
-* **DO NOT** tell the user to stop or change their prescribed medications without consulting a doctor.
-* Focus on observations from the data, general healthy lifestyle recommendations (e.g., "stay hydrated", "monitor readings"), and adherence tracking.
-* Remind the user to consult a healthcare professional for personalized medical advice.
-
+{response_instructions(period_label, date_range_str)}
 Blood Pressure Logs:\n{bp_logs_str}
 
 Sugar Logs:\n{sugar_logs_str}
 
 Medication Logs:\n{med_logs_str}
 
+Adherence Summary:\n{adherence_str}
+
 Remember to provide insights relevant to managing chronic conditions.
 """
 
 
-def generate_insight(db: Session, user_id: int, period: InsightPeriod, start_date: date):
+def build_hierarchical_prompt(period, start_date, end_date, bp_schedules_str, sugar_schedules_str, med_schedules_str, child_insights_str, vitals_str, adherence_str):
     """
-    Generates a health insight for a user for the given period (daily, weekly, monthly), returns the parsed data (does NOT save to DB).
-    The end_date is calculated based on the period.
+    Weekly/monthly prompt built from the stored child insights and rolled-up stats instead of raw logs,
+    so its size depends on the period length, not on how many readings were logged.
     """
-    # Calculate end_date based on period
+    period_label = period.value.title()
+    child_label = "daily" if period == InsightPeriod.WEEKLY else "weekly"
+    date_range_str = f"{start_date} to {end_date}"
+    return f"""
+You are an AI health assistant for HealthMate, focused on managing chronic conditions like diabetes and hypertension.
+Based on the following {child_label} health insights, vital sign statistics and schedules for {date_range_str}, generate a concise {period_label.lower()} health insight.
+Look for patterns across the {child_label} insights rather than repeating them.
+
+Blood Pressure Schedules:\n{bp_schedules_str}
+
+Sugar Schedules:\n{sugar_schedules_str}
+
+Medication Schedules:\n{med_schedules_str}
+
+{response_instructions(period_label, date_range_str)}
+{child_label.title()} Insights:\n{child_insights_str}
+
+Vital Sign Statistics:\n{vitals_str}
+
+Adherence Summary:\n{adherence_str}
+
+Remember to provide insights relevant to managing chronic conditions.
+"""
+
+
+def insight_period_end(period: InsightPeriod, start_date: date) -> date:
+    """Last day covered by an insight starting on start_date."""
     if period == InsightPeriod.DAILY:
-        end_date = start_date
-    elif period == InsightPeriod.WEEKLY:
-        end_date = start_date + timedelta(days=6)
-    elif period == InsightPeriod.MONTHLY:
+        return start_date
+    if period == InsightPeriod.WEEKLY:
+        return start_date + timedelta(days=6)
+    if period == InsightPeriod.MONTHLY:
         # Get last day of the month
         if start_date.month == 12:
-            end_date = start_date.replace(year=start_date.year + 1, month=1, day=1) - timedelta(days=1)
-        else:
-            end_date = start_date.replace(month=start_date.month + 1, day=1) - timedelta(days=1)
-    else:
-        raise ValueError(f"Unknown period: {period}")
+            return start_date.replace(year=start_date.year + 1, month=1, day=1) - timedelta(days=1)
+        return start_date.replace(month=start_date.month + 1, day=1) - timedelta(days=1)
+    raise ValueError(f"Unknown period: {period}")
 
 
+def collect_insight_sections(db: Session, user_id: int, period: InsightPeriod, start_date: date, end_date: date) -> Tuple[Dict[str, str], bool]:
+    """
+    The labelled data sections of a user's insight prompt (schedules, logs or child insights, adherence),
+    in prompt order, and whether they are the hierarchical (child insight) kind.
+    """
+    # Weekly/monthly insights are summarized from their stored child insights when available
+    hierarchy = None
+    if period != InsightPeriod.DAILY and settings.INSIGHT_MODE == "hierarchical":
+        hierarchy = build_hierarchical_context(db, user_id, period, start_date, end_date, EXPECTED_INSIGHT_JSON_KEYS)
+
     # Fetch logs for the period
-    if period == InsightPeriod.DAILY:
+    if hierarchy is not None:
+        bp_logs = sugar_logs = med_logs = None
+    elif period == InsightPeriod.DAILY:
         bp_logs = get_bp_logs(db, user_id, start_date)
         sugar_logs = get_sugar_logs_by_date(db, user_id, start_date)
         med_logs = get_med_logs(db, user_id, start_date)
@@ -117,8 +208,8 @@ def generate_insight(db: Session, user_id: int, period: InsightPeriod, start_dat
         if not bp_schedules:
             return "No BP schedules."
         return "\n".join(
-            f"- {s.time.strftime('%I:%M %p')} ({s.start_date.strftime('%Y-%m-%d')} to {s.end_date.strftime('%Y-%m-%d')})"
-            for s in bp_schedules if s.is_active and s.start_date <= end_date and (s.end_date or end_date) >= start_date
+            f"- {s.time.strftime('%I:%M %p')} ({s.start_date.strftime('%Y-%m-%d')} to {s.end_date.strftime('%Y-%m-%d') if s.end_date else 'ongoing'})"
+            for s in bp_schedules if s.is_active and overlaps(s.start_date, s.end_date, start_date, end_date)
         ) or "No BP schedules."
 
     # Format sugar schedules concisely
@@ -126,8 +217,8 @@ def generate_insight(db: Session, user_id: int, period: InsightPeriod, start_dat
         if not sugar_schedules:
             return "No sugar schedules."
         return "\n".join(
-            f"- {s.time.strftime('%I:%M %p')} ({s.start_date.strftime('%Y-%m-%d')} to {s.end_date.strftime('%Y-%m-%d')})"
-            for s in sugar_schedules if s.is_active and s.start_date <= end_date and (s.end_date or end_date) >= start_date
+            f"- {s.time.strftime('%I:%M %p')} ({s.start_date.strftime('%Y-%m-%d')} to {s.end_date.strftime('%Y-%m-%d') if s.end_date else 'ongoing'})"
+            for s in sugar_schedules if s.is_active and overlaps(s.start_date, s.end_date, start_date, end_date)
         ) or "No sugar schedules."
 
     # Format medication schedules concisely
@@ -145,51 +236,95 @@ def generate_insight(db: Session, user_id: int, period: InsightPeriod, start_dat
                 lines.append(f"- {med_name}: {', '.join(scheds)}")
         return "\n".join(lines) or "No medication schedules."
 
-    # Format logs into string
-    def format_bp():
-        if not bp_logs:
-            return "No blood pressure readings."
-        return "\n".join(
-            f"- {log.checked_at.strftime('%Y-%m-%d %I:%M %p')}: {log.systolic}/{log.diastolic} (Pulse: {log.pulse})"
-            for log in bp_logs
+    # Readings are aggregated per day and schedule, then degraded to fit the token budget
+    def format_logs():
+        return encode_log_sections(
+            bp_logs,
+            sugar_logs,
+            med_logs,
+            {s.id: s.time for s in bp_schedules},
+            {s.id: s.time for s in sugar_schedules},
+            settings.INSIGHT_LOG_TOKEN_BUDGET,
         )
 
-    def format_sugar():
-        if not sugar_logs:
-            return "No sugar readings."
-        return "\n".join(
-            f"- {log.checked_at.strftime('%Y-%m-%d %I:%M %p')} ({log.type.value}): {log.value} mg/dL"
-            for log in sugar_logs
-        )
-
-    def format_meds():
-        if not med_logs:
-            return "No medication logs."
-        return "\n".join(
-            f"- {log.medication_schedule.medication.medicine.name} ({'Taken' if log.taken_at else 'Missed'})"
-            for log in med_logs
+    ADHERENCE_LABELS = {
+        AdherenceKind.MEDICATION: "Medication doses taken",
+        AdherenceKind.BLOOD_PRESSURE: "BP checks done",
+        AdherenceKind.SUGAR: "Sugar checks done",
+    }
+
+    def format_adherence():
+        summary = summarize_adherence(get_adherence(db, user_id, start_date, end_date))
+        if not summary["scheduled"]:
+            return "Nothing was scheduled."
+        lines = [
+            f"- {label}: {summary['by_kind'][kind]['completed']}/{summary['by_kind'][kind]['scheduled']}"
+            for kind, label in ADHERENCE_LABELS.items() if summary["by_kind"][kind]["scheduled"]
+        ]
+        lines.append(f"- Overall: {summary['completed'] / summary['scheduled'] * 100:.0f}%")
+        return "\n".join(lines)
+
+    sections = {
+        "Blood Pressure Schedules": format_bp_schedules(),
+        "Sugar Schedules": format_sugar_schedules(),
+        "Medication Schedules": format_medication_schedules(),
+    }
+    if hierarchy is not None:
+        child_label = "daily" if period == InsightPeriod.WEEKLY else "weekly"
+        sections[f"{child_label.title()} Insights"] = hierarchy["child_insights"]
+        sections["Vital Sign Statistics"] = hierarchy["vitals"]
+    else:
+        log_sections = format_logs()
+        sections["Blood Pressure Logs"] = log_sections["bp"]
+        sections["Sugar Logs"] = log_sections["sugar"]
+        sections["Medication Logs"] = log_sections["meds"]
+    sections["Adherence Summary"] = format_adherence()
+    return sections, hierarchy is not None
+
+
+def build_insight_prompt(period: InsightPeriod, start_date: date, end_date: date, sections: Dict[str, str], hierarchical: bool) -> str:
+    schedules = (sections["Blood Pressure Schedules"], sections["Sugar Schedules"], sections["Medication Schedules"])
+    if hierarchical:
+        child_label = "daily" if period == InsightPeriod.WEEKLY else "weekly"
+        return build_hierarchical_prompt(
+            period,
+            start_date,
+            end_date,
+            *schedules,
+            sections[f"{child_label.title()} Insights"],
+            sections["Vital Sign Statistics"],
+            sections["Adherence Summary"]
         )
-
-    # Compose Gemini prompt with schedules and period
-    prompt = build_gemini_prompt(
+    return build_gemini_prompt(
         period,
         start_date,
         end_date,
-        format_bp_schedules(),
-        format_sugar_schedules(),
-        format_medication_schedules(),
-        format_bp(),
-        format_sugar(),
-        format_meds()
+        *schedules,
+        sections["Blood Pressure Logs"],
+        sections["Sugar Logs"],
+        sections["Medication Logs"],
+        sections["Adherence Summary"]
     )
 
+
+def generate_insight(db: Session, user_id: int, period: InsightPeriod, start_date: date, priority: Priority = Priority.BATCH):
+    """
+    Generates a health insight for a user for the given period (daily, weekly, monthly), returns the parsed data (does NOT save to DB).
+    The end_date is calculated based on the period. Pass Priority.INTERACTIVE when a user is waiting on the result.
+    """
+    end_date = insight_period_end(period, start_date)
+    sections, hierarchical = collect_insight_sections(db, user_id, period, start_date, end_date)
+    prompt = build_insight_prompt(period, start_date, end_date, sections, hierarchical)
+    # Everything is read; end the read transaction so its connection goes back to the pool for the Gemini call
+    db.rollback()
+
     print(prompt)
 
     # Call Gemini with retry logic (unchanged)
     gemini_output = ""
     try:
-        gemini_output = generate_gemini_response(prompt)
-    except (GoogleAPIError, tenacity.RetryError, ValueError) as e:
+        gemini_output = generate_gemini_response(prompt, priority, generation_config=insight_generation_config())
+    except (GoogleAPIError, tenacity.RetryError, ValueError, GeminiUnavailable) as e:
         print(f"❌ Failed to get a valid Gemini response after retries for user {user_id} for {period.value} period {start_date} to {end_date}: {e}")
         import traceback
         traceback.print_exc()
@@ -200,6 +335,95 @@ def generate_insight(db: Session, user_id: int, period: InsightPeriod, start_dat
         print(f"❌ Gemini output was unexpectedly empty for user {user_id} for {period.value} period {start_date} to {end_date} after retries. Cannot generate insight.")
         return None
 
+    if settings.INSIGHT_OUTPUT == "structured":
+        return parse_structured_output(gemini_output, user_id, period, start_date, end_date, priority)
+    return parse_insight_output(gemini_output, user_id, period, start_date, end_date)
+
+
+def validate_insight_json(json_data: dict, user_id: int, period: InsightPeriod, start_date: date, end_date: date) -> dict:
+    """Guardrails shared by single and packed responses: every expected key is a list, dangerous recommendations are dropped."""
+    for key in EXPECTED_INSIGHT_JSON_KEYS:
+        if key not in json_data or not isinstance(json_data[key], list):
+            # Ensure the key exists and its value is a list
+            print(f"⚠️ JSON missing expected key '{key}' or its value is not a list. Initializing as empty list.")
+            json_data[key] = [] # Set to empty list to prevent downstream errors
+        else:
+            # --- Contextual Guardrail: Check for Dangerous Recommendations (for smart_recommendations key) ---
+            if key == "smart_recommendations":
+                filtered_recommendations = []
+                for rec in json_data[key]:
+                    is_dangerous = False
+                    rec_lower = str(rec).lower()
+                    for keyword in DANGEROUS_RECOMMENDATION_KEYWORDS:
+                        if keyword in rec_lower:
+                            print(f"❌ Dangerous keyword '{keyword}' found in recommendation: '{rec}'. Filtering out.")
+                            is_dangerous = True
+                            break
+                    if not is_dangerous:
+                        filtered_recommendations.append(rec)
+                json_data[key] = filtered_recommendations
+                if not json_data[key]:
+                    print(f"⚠️ 'smart_recommendations' list became empty after filtering for user {user_id} for {period.value} period {start_date} to {end_date}. Adding generic advice.")
+                    json_data[key].append("Continue to monitor your health logs and consult your healthcare provider for personalized advice.")
+    return json_data
+
+
+def repair_insight_summary(insight: dict, period: InsightPeriod, priority: Priority = Priority.BATCH) -> Optional[str]:
+    """One small follow-up call for just the summary, written from the findings Gemini already returned."""
+    prompt = (
+        f"The following {period.value} health insight JSON lacks a valid \"summary\". Write a brief overall summary of the "
+        f"{period.value} health from its findings only. Respond with a JSON object with the single key \"summary\".\n\n"
+        f"{json.dumps(insight)}"
+    )
+    schema = {"type": "object", "properties": {"summary": {"type": "string"}}, "required": ["summary"]}
+    try:
+        repaired = json.loads(generate_gemini_response(prompt, priority, generation_config=insight_generation_config(schema)))
+    except (GoogleAPIError, tenacity.RetryError, ValueError, GeminiUnavailable) as e:
+        print(f"❌ Could not repair the insight summary: {e}")
+        return None
+    summary = repaired.get("summary") if isinstance(repaired, dict) else None
+    return summary.strip() if isinstance(summary, str) and summary.strip() else None
+
+
+def parse_structured_output(
+    gemini_output: str, user_id: int, period: InsightPeriod, start_date: date, end_date: date, priority: Priority = Priority.BATCH
+):
+    """
+    Validate a structured-output (JSON) response with InsightOutput. Bad list fields and titles
+    are repaired locally; only a bad summary costs a (small) second call. None if unusable.
+    """
+    try:
+        data = json.loads(gemini_output)
+    except json.JSONDecodeError as e:
+        print(f"❌ JSON parsing failed for user {user_id} for {period.value} period {start_date} to {end_date}: {e}")
+        return None
+    if not isinstance(data, dict):
+        print(f"❌ Gemini output is not a JSON object for user {user_id} for {period.value} period {start_date} to {end_date}.")
+        return None
+
+    try:
+        output = InsightOutput.model_validate(data)
+    except ValidationError:
+        print(f"⚠️ Gemini output has no valid summary for user {user_id} for {period.value} period {start_date} to {end_date}. Repairing it.")
+        data["summary"] = repair_insight_summary({k: v for k, v in data.items() if k != "summary"}, period, priority)
+        if data["summary"] is None:
+            return None
+        output = InsightOutput.model_validate(data)
+
+    json_data = validate_insight_json(output.model_dump(exclude={"title", "summary"}), user_id, period, start_date, end_date)
+    return {
+        "user_id": user_id,
+        "period": period,
+        "start_date": start_date,
+        "end_date": end_date,
+        "title": output.title or f"{period.value.title()} Health Insight",
+        "summary": output.summary,
+        "json_data": json.dumps(json_data)
+    }
+
+
+def parse_insight_output(gemini_output: str, user_id: int, period: InsightPeriod, start_date: date, end_date: date):
+    """Title, summary and guarded JSON from a single-user response, or None when it cannot be parsed."""
     # Parsing and validation logic (unchanged, but use start_date/end_date/period)
     title = f"{period.value.title()} Health Insight"
     summary = "No detailed summary provided by AI."
@@ -230,30 +454,7 @@ def generate_insight(db: Session, user_id: int, period: InsightPeriod, start_dat
         # --- Guardrail: Validate JSON Structure and Expected Keys ---
         if not isinstance(json_data, dict):
             raise ValueError("Parsed JSON is not a dictionary.")
-        for key in EXPECTED_INSIGHT_JSON_KEYS:
-            if key not in json_data or not isinstance(json_data[key], list):
-                # Ensure the key exists and its value is a list
-                print(f"⚠️ JSON missing expected key '{key}' or its value is not a list. Initializing as empty list.")
-                json_data[key] = [] # Set to empty list to prevent downstream errors
-            else:
-                # --- Contextual Guardrail: Check for Dangerous Recommendations (for smart_recommendations key) ---
-                if key == "smart_recommendations":
-                    filtered_recommendations = []
-                    for rec in json_data[key]:
-                        is_dangerous = False
-                        rec_lower = rec.lower()
-                        for keyword in DANGEROUS_RECOMMENDATION_KEYWORDS:
-                            if keyword in rec_lower:
-                                print(f"❌ Dangerous keyword '{keyword}' found in recommendation: '{rec}'. Filtering out.")
-                                is_dangerous = True
-                                break
-                        if not is_dangerous:
-                            filtered_recommendations.append(rec)
-                    json_data[key] = filtered_recommendations
-                    if not json_data[key]:
-                        print(f"⚠️ 'smart_recommendations' list became empty after filtering for user {user_id} for {period.value} period {start_date} to {end_date}. Adding generic advice.")
-                        json_data[key].append("Continue to monitor your health logs and consult your healthcare provider for personalized advice.")
-
+        json_data = validate_insight_json(json_data, user_id, period, start_date, end_date)
 
         # # --- Contextual Guardrail: Add Medical Disclaimer to JSON data ---
         # json_data["medical_disclaimer"] = MEDICAL_DISCLAIMER
@@ -296,6 +497,8 @@ def save_insight_to_db(db, user_id, period, start_date, end_date, title, summary
             json_data=json_data,
         )
         db.add(insight)
+        db.flush()
+        bump_version(db, user_id, VersionedResource.INSIGHTS)
         db.commit()
         db.refresh(insight)
         print(f"✅ Insight saved for user {user_id} on {start_date}")
@@ -312,7 +515,7 @@ def save_insight_to_db(db, user_id, period, start_date, end_date, title, summary
         return None
 
 # New function to generate and save
-def generate_and_save_insight(db: Session, user_id: int, period: InsightPeriod, start_date: date):
+def generate_and_save_insight(db: Session, user_id: int, period: InsightPeriod, start_date: date, priority: Priority = Priority.BATCH):
     """
     Calls generate_daily_insight, then saves the result to the database if generation succeeded.
     Returns the saved Insight object or None.
@@ -325,7 +528,7 @@ def generate_and_save_insight(db: Session, user_id: int, period: InsightPeriod,
     if existing:
         print(f"ℹ️ Insight for user {user_id} for {period.value} period starting {start_date} already exists. Skipping.")
         return None
-    insight_data = generate_insight(db, user_id, period, start_date)
+    insight_data = generate_insight(db, user_id, period, start_date, priority)
     if not insight_data:
         return None
     return save_insight_to_db(
@@ -338,3 +541,74 @@ def generate_and_save_insight(db: Session, user_id: int, period: InsightPeriod,
         summary=insight_data["summary"],
         json_data=insight_data["json_data"]
     )
+
+
+class InsightInProgress(Exception):
+    """Another worker is generating this insight right now; ask again shortly."""
+
+
+# Two-key advisory lock namespace for on-demand insight generation (see tasks.scheduler for the one-key lock)
+INSIGHT_LOCK_NAMESPACE = 7_340_002
+
+insight_flights = SingleFlight()
+
+
+def _generate_and_save_locked(db: Session, user_id: int, period: InsightPeriod, start_date: date, priority: Priority):
+    """
+    generate_and_save_insight behind a session-level advisory lock, so workers don't generate the
+    same insight twice. The lock lives on its own autocommit connection, so no transaction stays
+    open for the Gemini call, and is released in finally. A worker that finds it taken doesn't
+    wait for it: it returns the row if it was saved meanwhile, else raises InsightInProgress.
+    """
+    params = {"namespace": INSIGHT_LOCK_NAMESPACE, "key": advisory_lock_key(user_id, period.value, start_date)}
+    lock_connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        if not lock_connection.execute(text("SELECT pg_try_advisory_lock(:namespace, :key)"), params).scalar():
+            existing = get_insight_by_period_and_date(db, user_id, period, start_date)
+            if existing:
+                return existing
+            raise InsightInProgress(
+                f"The {period.value} insight for user {user_id} starting {start_date} is being generated by another worker."
+            )
+        try:
+            existing = get_insight_by_period_and_date(db, user_id, period, start_date)
+            if existing:
+                return existing
+            return generate_and_save_insight(db, user_id, period, start_date, priority)
+        finally:
+            try:
+                lock_connection.execute(text("SELECT pg_advisory_unlock(:namespace, :key)"), params)
+            except Exception as e:
+                # Never hand a connection that may still hold the lock back to the pool
+                print(f"❌ Could not release the insight lock, dropping its connection: {e}")
+                lock_connection.invalidate()
+    finally:
+        lock_connection.close()
+
+
+def get_or_generate_insight(
+    db: Session, user_id: int, period: InsightPeriod, start_date: date, priority: Priority = Priority.INTERACTIVE
+):
+    """
+    The stored insight, generated and saved first if missing. Concurrent requests for the same
+    insight share one Gemini call: threads via single-flight, workers via the advisory lock
+    (raises InsightInProgress when another worker has it). Someone is waiting on it, so Gemini
+    calls go out as INTERACTIVE unless told otherwise.
+    """
+    insight = get_insight_by_period_and_date(db, user_id, period, start_date)
+    if insight:
+        return insight
+    # Threads waiting on the single-flight below shouldn't keep a connection idle in transaction meanwhile
+    db.rollback()
+
+    def generate():
+        if settings.INSIGHT_ADVISORY_LOCK:
+            return _generate_and_save_locked(db, user_id, period, start_date, priority)
+        return generate_and_save_insight(db, user_id, period, start_date, priority)
+
+    insight, shared = insight_flights.do((user_id, period, start_date), generate)
+    if shared:
+        # The leader's Insight belongs to its own session
+        return get_insight_by_period_and_date(db, user_id, period, start_date)
+    return insight
+
@@ -0,0 +1,136 @@
+import json
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from models.insights import Insight, InsightPeriod
+from models.vitals_rollups import RollupGranularity, VitalMetric
+from crud.vitals_rollups import get_rollups, bucket_start
+
+# Weekly insights summarize daily ones, monthly insights summarize weekly ones
+CHILD_PERIOD = {
+    InsightPeriod.WEEKLY: InsightPeriod.DAILY,
+    InsightPeriod.MONTHLY: InsightPeriod.WEEKLY,
+}
+
+# Caps that keep the prompt size independent of how much a user logs
+MAX_SUMMARY_CHARS = 300
+MAX_FINDINGS_PER_KEY = 2
+MAX_FINDING_CHARS = 160
+
+VITAL_LABELS = [
+    (VitalMetric.SYSTOLIC, "Systolic", "mmHg"),
+    (VitalMetric.DIASTOLIC, "Diastolic", "mmHg"),
+    (VitalMetric.PULSE, "Pulse", "bpm"),
+    (VitalMetric.SUGAR_FASTING, "Fasting sugar", "mg/dL"),
+    (VitalMetric.SUGAR_RANDOM, "Random sugar", "mg/dL"),
+]
+
+
+def _clip(text, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def child_insight_starts(period: InsightPeriod, start_date: date, end_date: date) -> List[date]:
+    """Start dates of the child insights a weekly (days) or monthly (overlapping weeks) insight is built from."""
+    if period == InsightPeriod.WEEKLY:
+        return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    week = bucket_start(start_date, RollupGranularity.WEEKLY)
+    starts = []
+    while week <= end_date:
+        starts.append(week)
+        week += timedelta(days=7)
+    return starts
+
+
+def get_child_insights(db: Session, user_id: int, period: InsightPeriod, starts: Sequence[date]) -> List[Insight]:
+    return db.query(Insight).filter(
+        Insight.user_id == user_id,
+        Insight.period == CHILD_PERIOD[period],
+        Insight.start_date.in_(list(starts))
+    ).order_by(Insight.start_date).all()
+
+
+def format_child_insights(children: List[Insight], child_period: InsightPeriod, starts: Sequence[date], keys: Sequence[str]) -> str:
+    """One clipped summary per child plus its first few findings under each insight key."""
+    by_start = {child.start_date: child for child in children}
+    lines = []
+    for start in starts:
+        child = by_start.get(start)
+        label = start.strftime("%a %Y-%m-%d") if child_period == InsightPeriod.DAILY else f"Week of {start}"
+        if child is None:
+            lines.append(f"- {label}: no insight available")
+            continue
+        lines.append(f"- {label}: {_clip(child.summary, MAX_SUMMARY_CHARS)}")
+        try:
+            data = json.loads(child.json_data or "{}")
+        except ValueError:
+            data = {}
+        for key in keys:
+            findings = data.get(key) if isinstance(data, dict) else None
+            if isinstance(findings, list) and findings:
+                clipped = "; ".join(_clip(f, MAX_FINDING_CHARS) for f in findings[:MAX_FINDINGS_PER_KEY])
+                lines.append(f"    {key}: {clipped}")
+    return "\n".join(lines)
+
+
+def format_vitals_rollups(db: Session, user_id: int, period: InsightPeriod, start_date: date, end_date: date) -> str:
+    """
+    Per-metric average/min/max over the period from the daily rollups, with a per-day
+    (weekly) or per-week (monthly) average trend. Never reads the raw logs.
+    """
+    rows = get_rollups(db, user_id, RollupGranularity.DAILY, start_date, end_date)
+    if not rows:
+        return "No readings."
+
+    by_metric: Dict[VitalMetric, list] = {}
+    for row in rows:
+        by_metric.setdefault(row.metric, []).append(row)
+
+    lines = []
+    for metric, label, unit in VITAL_LABELS:
+        metric_rows = by_metric.get(metric)
+        if not metric_rows:
+            continue
+        count = sum(r.count for r in metric_rows)
+        mean = sum(r.sum_value for r in metric_rows) / count
+
+        trend: Dict[date, List[float]] = {}
+        for r in metric_rows:
+            key = r.bucket_start if period == InsightPeriod.WEEKLY else bucket_start(r.bucket_start, RollupGranularity.WEEKLY)
+            totals = trend.setdefault(key, [0.0, 0])
+            totals[0] += r.sum_value
+            totals[1] += r.count
+        trend_str = ", ".join(
+            f"{key.strftime('%a') if period == InsightPeriod.WEEKLY else 'wk ' + key.strftime('%m-%d')} {total / n:.0f}"
+            for key, (total, n) in sorted(trend.items())
+        )
+        lines.append(
+            f"- {label}: avg {mean:.0f} {unit} (min {min(r.min_value for r in metric_rows):.0f}, "
+            f"max {max(r.max_value for r in metric_rows):.0f}, {count} readings); averages: {trend_str}"
+        )
+    return "\n".join(lines) or "No readings."
+
+
+def build_hierarchical_context(
+    db: Session,
+    user_id: int,
+    period: InsightPeriod,
+    start_date: date,
+    end_date: date,
+    keys: Sequence[str],
+) -> Optional[Dict[str, str]]:
+    """
+    Child insight and rollup sections for a weekly/monthly prompt, or None when no child
+    insight exists yet (the caller then falls back to the raw logs).
+    """
+    starts = child_insight_starts(period, start_date, end_date)
+    children = get_child_insights(db, user_id, period, starts)
+    if not children:
+        return None
+    return {
+        "child_insights": format_child_insights(children, CHILD_PERIOD[period], starts, keys),
+        "vitals": format_vitals_rollups(db, user_id, period, start_date, end_date),
+    }
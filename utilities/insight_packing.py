@@ -0,0 +1,115 @@
+import json
+import re
+from datetime import date
+from typing import Dict, List, Optional
+
+import tenacity
+from google.api_core.exceptions import GoogleAPIError
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from models.insights import InsightPeriod
+from schemas.insights import InsightOutput
+from utilities.gemini_client import generate_gemini_response
+from utilities.gemini_governor import GeminiUnavailable
+from utilities.insight_generator import (
+    EXPECTED_INSIGHT_JSON_KEYS,
+    INSIGHT_RESPONSE_SCHEMA,
+    SAFETY_GUIDELINES,
+    collect_insight_sections,
+    insight_generation_config,
+    insight_period_end,
+    validate_insight_json,
+)
+
+
+def _user_ref(index: int) -> str:
+    # Users are referred to by position only, so no ids or names reach the prompt
+    return f"U{index + 1}"
+
+
+def build_packed_prompt(period: InsightPeriod, start_date: date, end_date: date, user_sections: Dict[str, Dict[str, str]]) -> str:
+    """One prompt for several users: the instructions once, then each user's labelled data sections."""
+    period_label = period.value.title()
+    date_range_str = f"{start_date} to {end_date}" if start_date != end_date else f"{start_date}"
+    keys = "\n".join(f'    -   "{key}": list of strings' for key in EXPECTED_INSIGHT_JSON_KEYS)
+    users = "\n\n".join(
+        f"### User {ref}\n" + "\n\n".join(f"{label}:\n{text}" for label, text in sections.items())
+        for ref, sections in user_sections.items()
+    )
+    return f"""
+You are an AI health assistant for HealthMate, focused on managing chronic conditions like diabetes and hypertension.
+Below are the {period_label.lower()} health data of {len(user_sections)} separate users for {date_range_str}. Write an independent, concise {period_label.lower()} health insight for EACH user.
+Use only that user's own section; never mix data between users.
+
+**Packed Response Format (Strictly Adhere):**
+Respond with a single JSON object and nothing else.
+Its keys are the user references ({", ".join(user_sections)}); each value is an object with:
+    -   "title": a concise, informative title (e.g., "{period_label} Health Summary for {date_range_str}")
+    -   "summary": a brief overall summary of the user's {period_label.lower()} health
+{keys}
+Ensure all JSON values are valid strings, numbers, or boolean types.
+
+{SAFETY_GUIDELINES}
+{users}
+
+Remember to provide insights relevant to managing chronic conditions.
+"""
+
+
+def parse_packed_output(gemini_output: str, refs: Dict[str, int], period: InsightPeriod, start_date: date, end_date: date) -> Dict[int, Optional[dict]]:
+    """
+    Insight data per user id, each section checked on its own by the usual guardrails.
+    A user whose section is missing or malformed maps to None.
+    """
+    results: Dict[int, Optional[dict]] = {user_id: None for user_id in refs.values()}
+    # Structured mode returns bare JSON; a free-text reply may still fence it
+    json_block_match = re.search(r"```(?:json)?\s*(\{.*\})\s*```", gemini_output or "", re.DOTALL)
+    try:
+        packed = json.loads(json_block_match.group(1) if json_block_match else gemini_output or "null")
+    except json.JSONDecodeError as e:
+        print(f"❌ Packed {period.value} insight response for {start_date} is not valid JSON: {e}")
+        return results
+    if not isinstance(packed, dict):
+        print(f"❌ Packed {period.value} insight response for {start_date} has no JSON object.")
+        return results
+
+    for ref, user_id in refs.items():
+        try:
+            output = InsightOutput.model_validate(packed.get(ref))
+        except ValidationError:
+            print(f"⚠️ Packed {period.value} insight response has no usable section for user {user_id} ({ref}).")
+            continue
+        json_data = validate_insight_json(output.model_dump(exclude={"title", "summary"}), user_id, period, start_date, end_date)
+        results[user_id] = {
+            "user_id": user_id,
+            "period": period,
+            "start_date": start_date,
+            "end_date": end_date,
+            "title": output.title or f"{period.value.title()} Health Insight",
+            "summary": output.summary,
+            "json_data": json.dumps(json_data),
+        }
+    return results
+
+
+def generate_packed_insights(db: Session, user_ids: List[int], period: InsightPeriod, start_date: date) -> Dict[int, Optional[dict]]:
+    """
+    Generate the insights of several users with one Gemini call. Returns insight data
+    (as from generate_insight) per user id, or None for users the caller should generate singly.
+    """
+    end_date = insight_period_end(period, start_date)
+    refs = {_user_ref(i): user_id for i, user_id in enumerate(user_ids)}
+    user_sections = {ref: collect_insight_sections(db, user_id, period, start_date, end_date)[0] for ref, user_id in refs.items()}
+    prompt = build_packed_prompt(period, start_date, end_date, user_sections)
+    # Everything is read; end the read transaction so its connection goes back to the pool for the Gemini call
+    db.rollback()
+    print(f"🛠️ Packed {period.value} insight prompt for {len(user_ids)} users ({len(prompt)} chars)")
+
+    try:
+        schema = {"type": "object", "properties": {ref: INSIGHT_RESPONSE_SCHEMA for ref in refs}, "required": list(refs)}
+        gemini_output = generate_gemini_response(prompt, generation_config=insight_generation_config(schema))
+    except (GoogleAPIError, tenacity.RetryError, ValueError, GeminiUnavailable) as e:
+        print(f"❌ Packed {period.value} insight call for users {user_ids} failed: {e}")
+        return {user_id: None for user_id in user_ids}
+    return parse_packed_output(gemini_output, refs, period, start_date, end_date)
@@ -0,0 +1,115 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from config import settings
+from models.medicines import Medicine
+from utilities.medicine_index import normalize_medicine_name, normalize_strength
+
+
+class MedicineCatalog:
+    """
+    Process-wide read-through cache of Medicine rows, by id and by normalized (name, strength).
+
+    Medicines are reference data that is only ever added to, so a cached row never goes stale.
+    Entries are detached copies; get/get_many merge them into the caller's session without a
+    query, and attach() sets `medication.medicine` from them so it is never lazy loaded.
+    `version` moves whenever medicines are created or the cache is cleared; a load that raced
+    with one of those is used for that call but not kept.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.version = 0
+        self._lock = threading.Lock()
+        self._by_id: "OrderedDict[int, Medicine]" = OrderedDict()
+        self._by_key: Dict[Tuple[str, str], int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _detached_copy(row) -> Medicine:
+        medicine = Medicine(**{column.key: getattr(row, column.key) for column in Medicine.__table__.columns})
+        make_transient_to_detached(medicine)
+        return medicine
+
+    def _store(self, medicines: Iterable[Medicine], version: int):
+        with self._lock:
+            if version != self.version:
+                return
+            for medicine in medicines:
+                self._by_id[medicine.id] = medicine
+                self._by_id.move_to_end(medicine.id)
+                self._by_key[(medicine.normalized_name, medicine.normalized_strength)] = medicine.id
+            while len(self._by_id) > self.max_entries:
+                _, evicted = self._by_id.popitem(last=False)
+                self._by_key.pop((evicted.normalized_name, evicted.normalized_strength), None)
+
+    def _load(self, db: Session, *criteria) -> List[Medicine]:
+        version = self.version
+        rows = db.query(Medicine.__table__).filter(*criteria).all()
+        medicines = [self._detached_copy(row) for row in rows]
+        self._store(medicines, version)
+        return medicines
+
+    def get_many(self, db: Session, medicine_ids: Iterable[int]) -> Dict[int, Medicine]:
+        """Medicines by id, bound to `db`; one query for all the ids not cached yet."""
+        found: Dict[int, Medicine] = {}
+        missing = []
+        with self._lock:
+            for medicine_id in set(medicine_ids):
+                cached = self._by_id.get(medicine_id)
+                if cached is None:
+                    missing.append(medicine_id)
+                else:
+                    self._by_id.move_to_end(medicine_id)
+                    found[medicine_id] = cached
+            self.hits += len(found)
+            self.misses += len(missing)
+        if missing:
+            found.update((medicine.id, medicine) for medicine in self._load(db, Medicine.id.in_(missing)))
+        return {medicine_id: db.merge(medicine, load=False) for medicine_id, medicine in found.items()}
+
+    def attach(self, db: Session, medications: Iterable) -> None:
+        """Fill `medicine` on already loaded Medication rows from the cache, instead of a join or a lazy load each."""
+        medications = list(medications)
+        medicines = self.get_many(db, {medication.medicine_id for medication in medications})
+        for medication in medications:
+            medicine = medicines.get(medication.medicine_id)
+            if medicine is not None:
+                set_committed_value(medication, "medicine", medicine)
+
+    def get(self, db: Session, medicine_id: int) -> Optional[Medicine]:
+        return self.get_many(db, [medicine_id]).get(medicine_id)
+
+    def get_by_name_and_strength(self, db: Session, name: str, strength: str) -> Optional[Medicine]:
+        key = (normalize_medicine_name(name), normalize_strength(strength))
+        with self._lock:
+            medicine_id = self._by_key.get(key)
+        if medicine_id is not None:
+            medicine = self.get(db, medicine_id)
+            if medicine is not None:
+                return medicine
+        loaded = self._load(db, Medicine.normalized_name == key[0], Medicine.normalized_strength == key[1])
+        return db.merge(loaded[0], load=False) if loaded else None
+
+    def invalidate(self, keys: Iterable[Tuple[str, str]] = None):
+        """Forget the given normalized (name, strength) lookups, or everything when no keys are given."""
+        with self._lock:
+            self.version += 1
+            if keys is None:
+                self._by_id.clear()
+                self._by_key.clear()
+                return
+            for key in keys:
+                self._by_key.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._by_id), "version": self.version, "hits": self.hits, "misses": self.misses}
+
+
+medicine_catalog = MedicineCatalog(settings.MEDICINE_CACHE_SIZE)
@@ -0,0 +1,126 @@
+import re
+import threading
+import time
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import settings
+
+_SPACES_RE = re.compile(r"\s+")
+# Spacing around these never distinguishes two medicines ("co - amoxiclav", "co-amoxiclav")
+_JOINERS_RE = re.compile(r"\s*([-/+,()])\s*")
+
+# Medicine rows added in a session, published to the index once that session commits (see crud.medicines)
+PENDING_KEY = "medicine_index_pending"
+
+
+def clean_medicine_text(value: str) -> str:
+    """Display form: trimmed, inner whitespace collapsed."""
+    return _SPACES_RE.sub(" ", unicodedata.normalize("NFKC", value)).strip()
+
+
+def normalize_medicine_name(name: str) -> str:
+    """Dedup/search key: "  Metformin  HCl " and "metformin hcl" are the same medicine."""
+    return _JOINERS_RE.sub(r"\1", clean_medicine_text(name).casefold()).rstrip(".")
+
+
+def normalize_strength(strength: str) -> str:
+    """"500 mg", "500MG" and "500mg" are the same strength."""
+    return _SPACES_RE.sub("", unicodedata.normalize("NFKC", strength)).casefold()
+
+
+class _Node:
+    __slots__ = ("children", "ids", "order")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.ids: List[int] = []
+        self.order: Optional[List[str]] = None  # children keys, reverse-sorted for the search stack; None when stale
+
+    def child(self, char: str) -> "_Node":
+        node = self.children.get(char)
+        if node is None:
+            node = self.children[char] = _Node()
+            self.order = None
+        return node
+
+    def sorted_children(self) -> List["_Node"]:
+        if self.order is None:
+            self.order = sorted(self.children, reverse=True)
+        return [self.children[char] for char in self.order]
+
+
+class MedicineIndex:
+    """
+    In-memory prefix trie over normalized medicine names for typeahead. Every word start is
+    indexed, so "met" finds "Metformin" and "Glucophage (metformin)". Loaded from the table on
+    first use and reloaded every `refresh_seconds` (other workers' inserts); medicines created
+    in this process are added as soon as their transaction commits.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._root = _Node()
+        self._entries: Dict[int, Tuple[str, str, str]] = {}  # id -> (name, strength, normalized name)
+        self._loaded_at: Optional[float] = None
+
+    def _insert(self, medicine_id: int, name: str, strength: str):
+        key = normalize_medicine_name(name)
+        self._entries[medicine_id] = (name, strength, key)
+        starts = [0] + [m.end() for m in re.finditer(r"[\s\-/+,(]+", key)]
+        for start in dict.fromkeys(starts):
+            node = self._root
+            for char in key[start:]:
+                node = node.child(char)
+            node.ids.append(medicine_id)
+
+    def load(self, rows: Iterable[Tuple[int, str, str]]):
+        root, entries = self._root, self._entries
+        with self._lock:
+            self._root, self._entries = _Node(), {}
+            try:
+                for medicine_id, name, strength in rows:
+                    self._insert(medicine_id, name, strength)
+            except Exception:
+                self._root, self._entries = root, entries
+                raise
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, fetch: Callable[[], Iterable[Tuple[int, str, str]]]):
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.refresh_seconds:
+            self.load(fetch())
+
+    def add(self, rows: Iterable[Tuple[int, str, str]]):
+        with self._lock:
+            for medicine_id, name, strength in rows:
+                if medicine_id not in self._entries:
+                    self._insert(medicine_id, name, strength)
+
+    def search(self, prefix: str, limit: int) -> List[Tuple[int, str, str]]:
+        """Up to `limit` (id, name, strength), names starting with the prefix first, then alphabetical."""
+        prefix = normalize_medicine_name(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            node = self._root
+            for char in prefix:
+                node = node.children.get(char)
+                if node is None:
+                    return []
+            # Walk the subtree alphabetically; a few extra candidates leave room for the ranking below
+            wanted = limit * 4
+            found: Dict[int, None] = {}
+            stack = [node]
+            while stack and len(found) < wanted:
+                current = stack.pop()
+                found.update(dict.fromkeys(current.ids[:wanted - len(found)]))
+                stack.extend(current.sorted_children())
+            entries = [(medicine_id, self._entries[medicine_id]) for medicine_id in found]
+        entries.sort(key=lambda item: (not item[1][2].startswith(prefix), item[1][2], item[1][1]))
+        return [(medicine_id, name, strength) for medicine_id, (name, strength, _) in entries[:limit]]
+
+
+medicine_index = MedicineIndex(settings.MEDICINE_INDEX_REFRESH_SECONDS)
+
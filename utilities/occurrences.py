@@ -0,0 +1,105 @@
+from datetime import date, datetime, time, timedelta, tzinfo
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from pytz import timezone
+from sqlalchemy.orm import Session
+
+from config import settings
+
+from models.daily_adherence import AdherenceKind
+from models.medications import Medication
+from models.medication_schedules import MedicationSchedule
+from models.bp_schedules import BloodPressureSchedule
+from models.sugar_schedules import SugarSchedule
+
+
+class ScheduleSpan(NamedTuple):
+    """A schedule that fires daily at `time` from `start` to `end` (inclusive, None = open-ended)."""
+    kind: AdherenceKind
+    schedule_id: int
+    time: time
+    start: date
+    end: Optional[date]
+
+
+class Occurrence(NamedTuple):
+    kind: AdherenceKind
+    schedule_id: int
+    day: date
+    time: time
+
+    def at(self, tz: Optional[tzinfo] = None) -> datetime:
+        return occurrence_at(self.day, self.time, tz)
+
+
+APP_TIMEZONE = timezone(settings.APP_TIMEZONE)
+
+
+def app_today() -> date:
+    """Today in the app time zone (the scheduler's), not the server's."""
+    return datetime.now(APP_TIMEZONE).date()
+
+
+def _as_date(value) -> Optional[date]:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def occurrence_at(day: date, at: time, tz: Optional[tzinfo] = None) -> datetime:
+    """When an occurrence fires; naive (server local, like the stored schedule times) unless `tz` is given."""
+    return datetime.combine(day, at.replace(tzinfo=None), tzinfo=tz)
+
+
+def overlaps(start, end, window_start: date, window_end: date) -> bool:
+    """Whether a (start, end) span, dates or datetimes with None as open-ended, touches the window."""
+    start, end = _as_date(start), _as_date(end)
+    return start <= window_end and (end is None or end >= window_start)
+
+
+def expand_occurrences(spans: Iterable[ScheduleSpan], start_date: date, end_date: date) -> Iterator[Occurrence]:
+    """
+    Every (schedule, day) occurrence in [start_date, end_date]. Each span is clamped to the
+    window once and its days counted off by ordinal, so the cost is the number of occurrences,
+    not days x schedules.
+    """
+    window_start, window_end = start_date.toordinal(), end_date.toordinal()
+    for span in spans:
+        first = max(window_start, span.start.toordinal())
+        last = window_end if span.end is None else min(window_end, span.end.toordinal())
+        for ordinal in range(first, last + 1):
+            yield Occurrence(span.kind, span.schedule_id, date.fromordinal(ordinal), span.time)
+
+
+def load_schedule_spans(db: Session, user_id: int, start_date: date, end_date: date) -> List[ScheduleSpan]:
+    """
+    The user's active schedules of every kind that touch the window, in one query per kind.
+    Medication schedules take their span from the medication.
+    """
+    spans = [
+        ScheduleSpan(AdherenceKind.MEDICATION, row.id, row.time, _as_date(row.start_date), _as_date(row.end_date))
+        for row in db.query(
+            MedicationSchedule.id, MedicationSchedule.time, Medication.start_date, Medication.end_date
+        ).join(Medication, Medication.id == MedicationSchedule.medication_id).filter(
+            Medication.user_id == user_id,
+            Medication.is_active == True,
+            MedicationSchedule.is_active == True,
+            # end_date is a timestamp; comparing with the window's first midnight keeps that day's end_date
+            Medication.start_date < datetime.combine(end_date + timedelta(days=1), time.min),
+            (Medication.end_date == None) | (Medication.end_date >= datetime.combine(start_date, time.min))
+        )
+    ]
+    for kind, schedule_model in (
+        (AdherenceKind.BLOOD_PRESSURE, BloodPressureSchedule),
+        (AdherenceKind.SUGAR, SugarSchedule),
+    ):
+        spans.extend(
+            ScheduleSpan(kind, row.id, row.time, row.start_date, row.end_date)
+            for row in db.query(
+                schedule_model.id, schedule_model.time, schedule_model.start_date, schedule_model.end_date
+            ).filter(
+                schedule_model.user_id == user_id,
+                schedule_model.is_active == True,
+                schedule_model.start_date <= end_date,
+                (schedule_model.end_date == None) | (schedule_model.end_date >= start_date)
+            )
+        )
+    return spans
@@ -0,0 +1,71 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(sort_value, row_id: int) -> str:
+    """Encode the (sort value, id) of the last row on a page as an opaque cursor."""
+    value = sort_value.isoformat() if hasattr(sort_value, "isoformat") else repr(sort_value)
+    raw = f"{value}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, parse: Callable = datetime.fromisoformat) -> Tuple[object, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        value, row_id = raw.rsplit("|", 1)
+        return parse(value), int(row_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor."
+        )
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> List[str]:
+    """Turn a comma-separated `fields=` value into a validated list (all allowed fields when omitted)."""
+    allowed = list(allowed)
+    if not fields:
+        return allowed
+
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}."
+        )
+    return selected
+
+
+def keyset_page(query: Query, sort_column, id_column, cursor: Optional[str], limit: int,
+                parse: Callable = datetime.fromisoformat, ascending: bool = False):
+    """
+    Fetch one page of `query` ordered by (sort_column, id_column), newest first unless `ascending`.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        value, row_id = decode_cursor(cursor, parse)
+        if ascending:
+            query = query.filter(tuple_(sort_column, id_column) > tuple_(value, row_id))
+        else:
+            query = query.filter(tuple_(sort_column, id_column) < tuple_(value, row_id))
+
+    if ascending:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+    else:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
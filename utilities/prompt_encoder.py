@@ -0,0 +1,179 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from models.sugar_logs import SugarType
+from utilities.token_budget import fit_sections
+
+# Readings outside these ranges are listed individually as outliers
+BP_HIGH_SYSTOLIC = 140
+BP_HIGH_DIASTOLIC = 90
+BP_LOW_SYSTOLIC = 90
+SUGAR_RANGES = {
+    SugarType.FASTING: (70, 126),
+    SugarType.RANDOM: (70, 200),
+}
+MAX_OUTLIERS = 5
+MAX_MISSED_DATES = 10
+
+
+def _stat(values: Iterable[Optional[float]]) -> str:
+    """avg(min-max), or the value when they are all equal, or '-' when nothing was recorded."""
+    values = [v for v in values if v is not None]
+    if not values:
+        return "-"
+    if min(values) == max(values):
+        return f"{values[0]:.0f}"
+    return f"{sum(values) / len(values):.0f}({min(values):.0f}-{max(values):.0f})"
+
+
+def _time_label(schedule_times: Dict[int, object], schedule_id: Optional[int]) -> str:
+    scheduled = schedule_times.get(schedule_id)
+    return scheduled.strftime("%H:%M") if scheduled else "-"
+
+
+def _outlier_line(outliers: List[str], limit: int) -> str:
+    if not outliers:
+        return "Out of range: none"
+    more = f" (+{len(outliers) - limit} more)" if len(outliers) > limit else ""
+    return f"Out of range ({len(outliers)}): {', '.join(outliers[:limit])}{more}"
+
+
+def _render(header: str, outliers: str, table: List[str]) -> str:
+    return "\n".join([header, outliers, *table])
+
+
+def encode_bp(logs, schedule_times: Dict[int, object]) -> List[str]:
+    """BP renderings, most to least detailed: per day and schedule, per day, period stats only."""
+    if not logs:
+        return ["No blood pressure readings."]
+
+    overall = (
+        f"{len(logs)} readings; systolic {_stat(l.systolic for l in logs)}, "
+        f"diastolic {_stat(l.diastolic for l in logs)}, pulse {_stat(l.pulse for l in logs)}"
+    )
+
+    def severity(log):
+        return max(log.systolic - BP_HIGH_SYSTOLIC, log.diastolic - BP_HIGH_DIASTOLIC, BP_LOW_SYSTOLIC - log.systolic)
+
+    outliers = [
+        f"{log.checked_at.strftime('%m-%d %H:%M')} {log.systolic}/{log.diastolic}"
+        for log in sorted((l for l in logs if severity(l) >= 0), key=severity, reverse=True)
+    ]
+
+    by_slot = defaultdict(list)
+    by_day = defaultdict(list)
+    for log in logs:
+        by_slot[(log.checked_at.date(), _time_label(schedule_times, log.schedule_id))].append(log)
+        by_day[log.checked_at.date()].append(log)
+
+    def row(group):
+        return f"{len(group)}|{_stat(l.systolic for l in group)}|{_stat(l.diastolic for l in group)}|{_stat(l.pulse for l in group)}"
+
+    slot_table = ["date|time|n|systolic|diastolic|pulse"] + [
+        f"{day.strftime('%m-%d')}|{time_label}|{row(group)}" for (day, time_label), group in sorted(by_slot.items())
+    ]
+    day_table = ["date|n|systolic|diastolic|pulse"] + [
+        f"{day.strftime('%m-%d')}|{row(group)}" for day, group in sorted(by_day.items())
+    ]
+    return [
+        _render(overall, _outlier_line(outliers, MAX_OUTLIERS), slot_table),
+        _render(overall, _outlier_line(outliers, MAX_OUTLIERS), day_table),
+        _render(overall, _outlier_line(outliers, 3), []),
+    ]
+
+
+def encode_sugar(logs, schedule_times: Dict[int, object]) -> List[str]:
+    """Sugar renderings (mg/dL), most to least detailed: per day/schedule/type, per day/type, period stats only."""
+    if not logs:
+        return ["No sugar readings."]
+
+    by_type = defaultdict(list)
+    for log in logs:
+        by_type[log.type].append(log.value)
+    overall = f"{len(logs)} readings (mg/dL); " + ", ".join(
+        f"{sugar_type.value} {_stat(values)}" for sugar_type, values in by_type.items()
+    )
+
+    def severity(log):
+        low, high = SUGAR_RANGES.get(log.type, (70, 200))
+        return max(log.value - high, low - log.value)
+
+    outliers = [
+        f"{log.checked_at.strftime('%m-%d %H:%M')} {log.type.value} {log.value:.0f}"
+        for log in sorted((l for l in logs if severity(l) >= 0), key=severity, reverse=True)
+    ]
+
+    by_slot = defaultdict(list)
+    by_day = defaultdict(list)
+    for log in logs:
+        by_slot[(log.checked_at.date(), _time_label(schedule_times, log.schedule_id), log.type.value)].append(log.value)
+        by_day[(log.checked_at.date(), log.type.value)].append(log.value)
+
+    slot_table = ["date|time|type|n|mg/dL"] + [
+        f"{day.strftime('%m-%d')}|{time_label}|{sugar_type}|{len(values)}|{_stat(values)}"
+        for (day, time_label, sugar_type), values in sorted(by_slot.items())
+    ]
+    day_table = ["date|type|n|mg/dL"] + [
+        f"{day.strftime('%m-%d')}|{sugar_type}|{len(values)}|{_stat(values)}"
+        for (day, sugar_type), values in sorted(by_day.items())
+    ]
+    return [
+        _render(overall, _outlier_line(outliers, MAX_OUTLIERS), slot_table),
+        _render(overall, _outlier_line(outliers, MAX_OUTLIERS), day_table),
+        _render(overall, _outlier_line(outliers, 3), []),
+    ]
+
+
+def encode_meds(logs) -> List[str]:
+    """
+    Medication renderings, most to least detailed: per medicine and dose time with the missed
+    dates, per medicine, overall. Each medicine is named once instead of once per log.
+    """
+    if not logs:
+        return ["No medication logs."]
+
+    by_dose = defaultdict(list)
+    by_medicine = defaultdict(list)
+    for log in logs:
+        schedule = log.medication_schedule
+        medicine = schedule.medication.medicine
+        name = f"{medicine.name} {medicine.strength}"
+        by_dose[(name, schedule.time.strftime("%H:%M"))].append(log)
+        by_medicine[name].append(log)
+
+    def taken(group):
+        return sum(1 for log in group if log.taken_at)
+
+    def missed_dates(group):
+        missed = sorted({log.scheduled_date for log in group if not log.taken_at})
+        if not missed:
+            return ""
+        shown = ", ".join(day.strftime("%m-%d") for day in missed[:MAX_MISSED_DATES])
+        more = f" (+{len(missed) - MAX_MISSED_DATES} more)" if len(missed) > MAX_MISSED_DATES else ""
+        return f"; missed {shown}{more}"
+
+    overall = f"Taken {taken(logs)}/{len(logs)} logged doses"
+    dose_lines = [
+        f"- {name} @{time_label}: taken {taken(group)}/{len(group)}{missed_dates(group)}"
+        for (name, time_label), group in sorted(by_dose.items())
+    ]
+    medicine_lines = [
+        f"- {name}: taken {taken(group)}/{len(group)}" for name, group in sorted(by_medicine.items())
+    ]
+    return [
+        "\n".join([overall, *dose_lines]),
+        "\n".join([overall, *medicine_lines]),
+        overall,
+    ]
+
+
+def encode_log_sections(bp_logs, sugar_logs, med_logs, bp_schedule_times, sugar_schedule_times, budget: int) -> Dict[str, str]:
+    """Compact bp/sugar/meds prompt sections, stepped down in detail until together they fit `budget` tokens."""
+    return fit_sections(
+        {
+            "bp": encode_bp(bp_logs, bp_schedule_times),
+            "sugar": encode_sugar(sugar_logs, sugar_schedule_times),
+            "meds": encode_meds(med_logs),
+        },
+        budget,
+    )
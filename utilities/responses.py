@@ -0,0 +1,87 @@
+import inspect
+from typing import Any
+
+from fastapi import FastAPI, routing
+from fastapi.datastructures import Default
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+
+from config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+# Reports and static files are already compressed; recompressing them only burns CPU
+SKIP_COMPRESSION_TYPES = (
+    "application/pdf",
+    "image/*",
+    "font/*",
+    "audio/*",
+    "video/*",
+    "application/zip",
+    "application/gzip",
+    "text/event-stream",
+)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; falls back to the stdlib encoder if orjson is missing."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def has_pydantic_fast_path() -> bool:
+    # Newer FastAPI dumps response_model routes straight to JSON bytes in pydantic-core,
+    # but only while the route keeps the default response class
+    return "dump_json" in inspect.signature(routing.serialize_response).parameters
+
+
+def json_response_class():
+    """
+    Default response class for the app, from JSON_RESPONSE:
+    - auto: keep FastAPI's pydantic-core serializer where it exists, orjson otherwise
+    - orjson: orjson for every route (jsonable_encoder still runs first)
+    - json: stock JSONResponse
+    """
+    mode = settings.JSON_RESPONSE.lower()
+    if mode == "json" or orjson is None:
+        return Default(JSONResponse)
+    if mode == "auto" and has_pydantic_fast_path():
+        # Must stay a Default placeholder, a concrete class would switch the fast path off
+        return Default(JSONResponse)
+    return FastJSONResponse
+
+
+def add_compression(app: FastAPI) -> None:
+    """Compress responses over COMPRESSION_MIN_SIZE bytes with gzip, or brotli (gzip fallback) if installed."""
+    mode = settings.COMPRESSION.lower()
+    if mode == "off":
+        return
+
+    if mode == "br":
+        if BrotliMiddleware is not None:
+            app.add_middleware(
+                BrotliMiddleware,
+                quality=settings.BROTLI_QUALITY,
+                minimum_size=settings.COMPRESSION_MIN_SIZE,
+                gzip_fallback=True,
+            )
+            return
+        print("❌ COMPRESSION=br but brotli-asgi is not installed, falling back to gzip")
+
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        compresslevel=settings.GZIP_LEVEL,
+        exclude_content_types=SKIP_COMPRESSION_TYPES,
+    )
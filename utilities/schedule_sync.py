@@ -0,0 +1,84 @@
+from datetime import date, time
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import case, insert, update
+from sqlalchemy.orm import Session
+
+
+def create_timed_schedules(db: Session, model, user_id: int, times: Iterable[time], start_date: date, end_date: date) -> List:
+    """
+    BP/sugar schedules for each submitted time over one date span, in the submitted order.
+
+    The user's active schedules with the same span are loaded once; times that already have one
+    are returned as they are (a retried request does not duplicate them), the rest go out as a
+    single multi-row INSERT. Does not commit.
+    """
+    times = list(dict.fromkeys(times))
+    existing = {
+        schedule.time: schedule for schedule in db.query(model).filter(
+            model.user_id == user_id,
+            model.start_date == start_date,
+            model.end_date == end_date,
+            model.is_active.is_(True),
+            model.time.in_(times),
+        )
+    }
+    missing = [t for t in times if t not in existing]
+    if missing:
+        duration_days = (end_date - start_date).days + 1
+        created = db.scalars(
+            insert(model).returning(model),
+            [
+                {"user_id": user_id, "time": t, "duration_days": duration_days, "start_date": start_date, "end_date": end_date}
+                for t in missing
+            ],
+        ).all()
+        existing.update((schedule.time, schedule) for schedule in created)
+    return [existing[t] for t in times]
+
+
+def sync_medication_schedules(db: Session, model, medication_id: int, submitted: Dict[time, Optional[str]]) -> Dict[str, int]:
+    """
+    Apply the submitted {time: dosage instruction} map to a medication's schedules.
+
+    One load of the existing rows, then at most one INSERT (new times) and one UPDATE (reactivated
+    times and changed instructions, set per row with CASE). A None instruction keeps the current
+    one on an active schedule; times that are not submitted are left as they are. Returns the
+    counts per change; does not commit.
+    """
+    existing = {
+        row.time: row for row in db.query(model.id, model.time, model.is_active, model.dosage_instruction)
+        .filter(model.medication_id == medication_id)
+    }
+
+    inserts = []
+    changes = {}  # id -> dosage_instruction
+    counts = {"created": 0, "reactivated": 0, "updated": 0}
+    for t, instruction in submitted.items():
+        row = existing.get(t)
+        if row is None:
+            # ➕ New time — insert
+            inserts.append({"medication_id": medication_id, "time": t, "dosage_instruction": instruction, "is_active": True})
+            counts["created"] += 1
+        elif not row.is_active:
+            # ✅ Exists but inactive — reactivate and update instruction
+            changes[row.id] = instruction
+            counts["reactivated"] += 1
+        elif instruction is not None and instruction != row.dosage_instruction:
+            # ✏️ Exists and active — update instruction only if provided
+            changes[row.id] = instruction
+            counts["updated"] += 1
+
+    if inserts:
+        db.execute(insert(model), inserts)
+    if changes:
+        db.execute(
+            update(model)
+            .where(model.id.in_(changes))
+            .values(
+                is_active=True,
+                dosage_instruction=case(changes, value=model.id),
+            )
+            .execution_options(synchronize_session=False)
+        )
+    return counts
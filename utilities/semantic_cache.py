@@ -0,0 +1,143 @@
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+_NUMBER_RE = re.compile(r"\d")
+_APOSTROPHE_RE = re.compile(r"n['’]t\b")
+
+# Words that flip what a question asks ("what should I eat" vs "what should I not eat");
+# the n't contractions ("can't" is tokenized as "cant") count as "not"
+NEGATIONS = {"not": "not", "no": "no", "never": "never", "without": "without", "avoid": "avoid"}
+NEGATIONS.update((word, "not") for word in "cannot dont cant wont shouldnt isnt arent doesnt didnt".split())
+
+STOP_WORDS = frozenset(
+    "a an and are am be been but by can could do does did for from had has have how i if in is it its "
+    "me my of on or should so that the this to was what when which who why will with would you your "
+    "im ive please tell".split()
+)
+
+
+def tokenize(text: str) -> Counter:
+    text = _APOSTROPHE_RE.sub("nt", text.lower())
+    return Counter(token for token in _TOKEN_RE.findall(text) if token not in STOP_WORDS)
+
+
+def _numbers(tokens: Counter) -> Set[str]:
+    return {token for token in tokens if _NUMBER_RE.match(token)}
+
+
+def _negations(tokens: Counter) -> Set[str]:
+    return {NEGATIONS[token] for token in tokens if token in NEGATIONS}
+
+
+class _Entry:
+    def __init__(self, tokens: Counter, response: str):
+        self.tokens = tokens
+        self.numbers = _numbers(tokens)
+        self.negations = _negations(tokens)
+        self.response = response
+        self.stored_at = time.monotonic()
+
+
+class SemanticCache:
+    """
+    In-process cache of answers to general (non-personalized) questions, matched by TF-IDF
+    cosine similarity so rewordings of the same question share one Gemini answer.
+
+    Questions with numbers only match questions with the same numbers ("150/95" never hits
+    "130/85"), and the same goes for negations ("what should I not eat" never hits "what
+    should I eat"), which cosine similarity alone barely notices. Bounded by max_entries (least recently used goes first) and ttl_seconds.
+    """
+
+    def __init__(self, max_entries: int, threshold: float, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # token -> keys of the entries containing it; also gives document frequencies for the idf
+        self._index: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(tokens: Counter) -> str:
+        return " ".join(sorted(tokens.elements()))
+
+    def _idf(self, token: str) -> float:
+        return math.log((1 + len(self._entries)) / (1 + len(self._index.get(token, ())))) + 1
+
+    def _vector(self, tokens: Counter) -> Dict[str, float]:
+        return {token: (1 + math.log(count)) * self._idf(token) for token, count in tokens.items()}
+
+    @staticmethod
+    def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+        dot = sum(weight * b.get(token, 0.0) for token, weight in a.items())
+        norm = math.sqrt(sum(w * w for w in a.values())) * math.sqrt(sum(w * w for w in b.values()))
+        return dot / norm if norm else 0.0
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        for token in entry.tokens:
+            keys = self._index.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[token]
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        # Entries are ordered by use, not age, so check them all; the cache is small
+        for key in [key for key, entry in self._entries.items() if entry.stored_at < cutoff]:
+            self._remove(key)
+
+    def get(self, question: str) -> Optional[Tuple[str, float]]:
+        """(cached answer, similarity) for the closest stored question above the threshold, else None."""
+        tokens = tokenize(question)
+        if not tokens:
+            return None
+        with self._lock:
+            self._expire()
+            numbers, negations = _numbers(tokens), _negations(tokens)
+            best_key, best_score = None, 0.0
+            exact = self._key(tokens)
+            if exact in self._entries:
+                best_key, best_score = exact, 1.0
+            else:
+                candidates = set().union(*(self._index.get(token, ()) for token in tokens))
+                query = self._vector(tokens)
+                for key in candidates:
+                    entry = self._entries[key]
+                    if entry.numbers != numbers or entry.negations != negations:
+                        continue
+                    score = self._cosine(query, self._vector(entry.tokens))
+                    if score > best_score:
+                        best_key, best_score = key, score
+            if best_key is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return self._entries[best_key].response, best_score
+
+    def put(self, question: str, response: str):
+        tokens = tokenize(question)
+        if not tokens or not response:
+            return
+        key = self._key(tokens)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(tokens, response)
+            for token in tokens:
+                self._index.setdefault(token, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,52 @@
+import threading
+import zlib
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key inside this process: the first caller runs
+    `fn`, later callers block until it finishes and share its outcome instead of running it again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Returns (result, shared); shared is True for callers that waited on someone else's run."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+def advisory_lock_key(*parts) -> int:
+    """Stable signed 32-bit key for pg_advisory_*(namespace, key) built from arbitrary parts."""
+    crc = zlib.crc32(":".join(str(part) for part in parts).encode())
+    return crc - 2 ** 32 if crc >= 2 ** 31 else crc
@@ -0,0 +1,52 @@
+from typing import Dict, List
+
+# Rough average for English and number-heavy text; avoids a tokenizer/API call per prompt
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "… (truncated)"
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text at a line boundary so it fits max_tokens, marking the cut."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max(0, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER) - 1)
+    cut = text[:limit]
+    if "\n" in cut:
+        cut = cut[:cut.rindex("\n")]
+    return f"{cut}\n{TRUNCATION_MARKER}" if cut else TRUNCATION_MARKER
+
+
+def fit_sections(sections: Dict[str, List[str]], budget: int) -> Dict[str, str]:
+    """
+    Pick one rendering per section so the total fits `budget` tokens.
+
+    Each section lists its renderings from most to least detailed. Everything starts at full
+    detail; while over budget the section currently costing the most steps down one level.
+    If even the least detailed renderings are too big, the largest is truncated.
+    """
+    levels = {name: 0 for name in sections}
+
+    def cost(name):
+        return estimate_tokens(sections[name][levels[name]])
+
+    while sum(cost(name) for name in sections) > budget:
+        reducible = [name for name in sections if levels[name] < len(sections[name]) - 1]
+        if not reducible:
+            break
+        levels[max(reducible, key=cost)] += 1
+
+    chosen = {name: sections[name][levels[name]] for name in sections}
+    overflow = sum(estimate_tokens(text) for text in chosen.values()) - budget
+    while overflow > 0 and chosen:
+        largest = max(chosen, key=lambda name: estimate_tokens(chosen[name]))
+        size = estimate_tokens(chosen[largest])
+        chosen[largest] = truncate_to_tokens(chosen[largest], max(0, size - overflow))
+        new_overflow = sum(estimate_tokens(text) for text in chosen.values()) - budget
+        if new_overflow >= overflow:
+            break
+        overflow = new_overflow
+    return chosen